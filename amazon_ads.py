@@ -150,7 +150,7 @@ class AmazonAds(PlaywrightAsync):
             for _ in range(3):
                 url: str = config.USERS[self.user_id]["ads"]
                 try:
-                    await self.page.goto(url=url, timeout=30000)
+                    await self.goto(url=url, timeout=30000)
                     is_opened: bool = True
                     logger.info(f"page is opened :: {url}")
                     break
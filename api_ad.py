@@ -1,16 +1,19 @@
 import os
 import re
+import copy
 import json
-import time
 import gzip
 import asyncio
 import requests
+import typing as t
 import pandas as pd
 from uuid import uuid4
 from pathlib import Path
 from datetime import datetime, timedelta
 
+from ad_api.auth import AccessTokenResponse
 from ad_api.base import ApiResponse
+from ad_api.base.exceptions import AdvertisingApiTooManyRequestsException
 from ad_api.base.marketplaces import Marketplaces
 from ad_api.api.reports import Reports
 
@@ -19,6 +22,8 @@ try:
     from utils.decorators import utils
     from settings.config import config
     from database.database import db
+    from utils.rate_limiter import rate_limiter
+    from utils.token_cache import token_cache
     from database.postgres_db import postgres_db
 except ImportError as ie:
     exit(f"{ie} :: {Path(__file__).resolve()}")
@@ -29,7 +34,11 @@ class AmazonAD:
 
     def __init__(self, **kwargs):
         # self.period = int(period)
-        self.client: Reports = self._init()
+        # settings/ad_profiles.json gives a mapping, the .env variable the same mapping as a json string
+        profiles: dict | str = config.AD_PROFILES or {"US": config.AD_PROFILE_ID}
+        self.profiles: dict = json.loads(profiles) if isinstance(profiles, str) else profiles
+        self.marketplace: str = next(iter(self.profiles))
+        self.client: Reports = self._init(marketplace=self.marketplace, profile_id=self.profiles[self.marketplace])
 
     @staticmethod
     def camel_to_snake(name: str) -> str:
@@ -38,33 +47,26 @@ class AmazonAD:
         return name.lower()
 
     @staticmethod
-    def _init() -> Reports:
+    def _init(marketplace: str = "US", profile_id: t.Optional[str] = None) -> Reports:
         credentials: dict = {
             "refresh_token": config.AD_REFRESH_TOKEN,
             "client_id": config.AD_CLIENT_ID,
             "client_secret": config.AD_CLIENT_SECRET,
-            "profile_id": config.AD_PROFILE_ID
+            "profile_id": profile_id or config.AD_PROFILE_ID
         }
-        return Reports(credentials=credentials, marketplace=Marketplaces.US)
+        # access tokens are shared with every other process through the token cache
+        client: Reports = Reports(credentials=credentials, marketplace=Marketplaces[marketplace])
+        return token_cache.wrap(client=client, response_class=AccessTokenResponse)
 
-    @utils.exception
-    def create_report(self, data: dict) -> str:
-        response: ApiResponse = self.client.post_report(body=data)
-        return response.payload.get("reportId")
-
-    @utils.exception
-    def report_status(self, report_id: str) -> str:
-        while True:
-            payload: dict = self.client.get_report(report_id).payload
-            status: str = payload.get("status")
-            logger.info(f"status :: {status} :: {report_id}")
-
-            if status == "COMPLETED":
-                return payload.get("url")
-            elif status in ["FATAL", "CANCELLED"]:
-                break
+    def for_marketplace(self, marketplace: str) -> "AmazonAD":
+        # one client per profile, the refresh token and its cached access token are the same for all of them
+        service: AmazonAD = copy.copy(self)
+        service.marketplace = marketplace
+        service.client = self._init(marketplace=marketplace, profile_id=self.profiles[marketplace])
+        return service
 
-            time.sleep(120)
+    def rate_key(self, operation: str) -> str:
+        return f"{operation}:{Marketplaces[self.marketplace].region_url}"
 
     @utils.exception
     def download_report(self, report_name: str, period: str, url: str) -> bool:
@@ -85,11 +87,19 @@ class AmazonAD:
             ]
 
             df: pd.DataFrame = pd.DataFrame(data)
+            if "marketplace" not in df.columns:
+                df.insert(loc=0, column="marketplace", value=self.marketplace)
+
+            # a DAILY report is split into one row per day, shaped like the single day SUMMARY rows
+            if "date" in df.columns:
+                for column in ("start_date", "end_date"):
+                    if column not in df.columns:
+                        df[column] = df["date"]
 
             report_dir = os.path.join(config.reports_path, self.service_name)
             os.makedirs(report_dir, exist_ok=True)
 
-            report_path = os.path.join(report_dir, f"{report_name}_{period}.csv")
+            report_path = os.path.join(report_dir, f"{report_name}_{self.marketplace}_{period}.csv")
             df.to_csv(report_path, index=False, encoding="utf-8")
         except Exception as e:
             logger.error(e)
@@ -219,62 +229,143 @@ class AmazonAD:
     #
     #     return True
 
-    @utils.exception
-    def get_report(self) -> bool:
-        period_days: int = 7
-        for days in range(1, period_days + 1):
-            logger.info(f"getting report for {days} days")
-
-            end_date: datetime = datetime.now().date() - timedelta(days=days)
-            start_date: datetime = end_date
-            period: str = f"{start_date.isoformat()}_{end_date.isoformat()}"
-
-            report_ids = dict()
-
-            for category, report_config in config.API_AD.items():
-                for data in report_config:
-                    if "_campaign" not in data["name"]:
-                        continue
-
-                    data["startDate"] = start_date.isoformat()
-                    data["endDate"] = end_date.isoformat()
-
-                    name: str = data["name"]
-                    logger.info(f"processing :: {category} :: {name} :: {period}")
-
-                    while True:
-                        try:
-                            report_id: str = self.create_report(data=data)
-                            if report_id:
-                                break
-                        except Exception as e:
-                            logger.error(e)
-
-                        time.sleep(180)
-
-                    if not report_id:
-                        logger.error("failed to create report")
-                        return False
-
-                    logger.info(f"report was successfully created :: {category} :: {name} :: {period} :: {report_id}")
+    @staticmethod
+    def daily_configuration(configuration: dict) -> dict:
+        # DAILY reports carry the day in "date" and reject startDate/endDate columns
+        columns: list = [column for column in configuration.get("columns", []) if column not in ["startDate", "endDate"]]
+        if "date" not in columns:
+            columns.insert(0, "date")
+
+        return {**configuration, "timeUnit": "DAILY", "columns": columns}
+
+    def new_job(self, category: str, data: dict, start_date: datetime, end_date: datetime, time_unit: str) -> dict:
+        body: dict = {**data, "startDate": start_date.isoformat(), "endDate": end_date.isoformat()}
+        if time_unit == "DAILY":
+            body["configuration"] = self.daily_configuration(configuration=data.get("configuration") or {})
+
+        return {
+            "marketplace": self.marketplace,
+            "category": category,
+            "name": data["name"],
+            "period": f"{start_date.isoformat()}_{end_date.isoformat()}",
+            "body": body,
+            "report_id": None,
+            "url": None,
+            "status": "pending"
+        }
 
-                    report_ids[name] = report_id
-                    time.sleep(180)
+    async def submit_job(self, job: dict) -> t.Optional[str]:
+        # throttling is absorbed by the rate limiter, what reaches here is a real error
+        for attempt in range(5):
+            try:
+                response: ApiResponse = await rate_limiter.async_call(
+                    self.rate_key("ad.createReport"),
+                    self.client.post_report,
+                    body=job["body"],
+                    throttled=(AdvertisingApiTooManyRequestsException,)
+                )
+                report_id: t.Optional[str] = response.payload.get("reportId")
+                if report_id:
+                    return report_id
+            except Exception as e:
+                logger.error(f"{job['name']} :: {job['period']} :: {e}")
+
+            await asyncio.sleep(rate_limiter.backoff(attempt=attempt, base=30))
+
+    async def poll_job(self, job: dict, interval: int = 60, attempts: int = 180) -> t.Optional[str]:
+        # a report stuck in PENDING / PROCESSING fails after three hours instead of holding up the whole run
+        for _ in range(attempts):
+            payload: dict = (await rate_limiter.async_call(
+                self.rate_key("ad.getReport"),
+                self.client.get_report,
+                job["report_id"],
+                throttled=(AdvertisingApiTooManyRequestsException,)
+            )).payload
+            status: str = payload.get("status")
+            logger.info(f"status :: {status} :: {job['name']} :: {job['period']} :: {job['report_id']}")
 
-            for report_name, report_id in report_ids.items():
-                url: str = self.report_status(report_id=report_id)
+            if status == "COMPLETED":
+                return payload.get("url")
+            elif status in ["FAILED", "FATAL", "CANCELLED"]:
+                return None
 
-                if not url:
-                    logger.error("url not found")
-                    continue
+            await asyncio.sleep(interval)
 
-                logger.info(f"document was successfully created :: {report_name} :: {period}")
+        logger.error(f"report was not generated in time :: {job['name']} :: {job['period']} :: {job['report_id']}")
+        return None
 
-                if not self.download_report(report_name=report_name, period=period, url=url):
-                    logger.error("report download failed")
-                    continue
+    async def run_job(self, job: dict, sink_locks: dict) -> bool:
+        name: str = job["name"]
+        try:
+            job["report_id"] = await self.submit_job(job)
+            if not job["report_id"]:
+                job["status"] = "failed"
+                logger.error(f"failed to create report :: {self.marketplace} :: {name} :: {job['period']}")
+                return False
+
+            job["status"] = "submitted"
+            logger.info(f"report was successfully created :: {self.marketplace} :: {name} :: {job['period']} :: {job['report_id']}")
+
+            job["url"] = await self.poll_job(job)
+            if not job["url"]:
+                job["status"] = "failed"
+                logger.error(f"url not found :: {self.marketplace} :: {name} :: {job['period']}")
+                return False
+
+            job["status"] = "done"
+            logger.info(f"document was successfully created :: {self.marketplace} :: {name} :: {job['period']}")
+
+            # the postgres sink stages every load through one temp table per target, loads into a table go one at a time
+            async with sink_locks.setdefault(name, asyncio.Lock()):
+                is_loaded: bool = await asyncio.to_thread(
+                    self.download_report, report_name=name, period=job["period"], url=job["url"]
+                )
+
+            if not is_loaded:
+                job["status"] = "failed"
+                logger.error(f"report download failed :: {self.marketplace} :: {name} :: {job['period']}")
+                return False
+
+            job["status"] = "ingested"
+            return True
+        except Exception as e:
+            job["status"] = "failed"
+            logger.error(f"{name} :: {job['period']} :: {e}")
+            return False
 
-        return True
+    @utils.async_exception
+    async def collect_reports(self, period_days: int = 7) -> bool:
+        end_date: datetime = datetime.now().date() - timedelta(days=1)
+        start_date: datetime = end_date - timedelta(days=period_days - 1)
+
+        # DAILY asks for the whole window once and gets a row per day, SUMMARY needs a report per day
+        time_unit: str = config.AD_TIME_UNIT or "DAILY"
+        if time_unit == "DAILY":
+            windows: list = [(start_date, end_date)]
+        else:
+            windows: list = [(end_date - timedelta(days=offset),) * 2 for offset in range(period_days)]
+
+        # every (profile x window x report) is submitted up front as fast as the createReport bucket allows,
+        # then all of them are polled together and each one is loaded as soon as it is COMPLETED
+        services: list = [self.for_marketplace(marketplace) for marketplace in self.profiles]
+        jobs: list = [
+            (service, service.new_job(
+                category=category, data=data, start_date=window[0], end_date=window[1], time_unit=time_unit
+            ))
+            for service in services
+            for window in windows
+            for category, report_config in config.API_AD.items()
+            for data in report_config
+            if "_campaign" in data["name"]
+        ]
+        sink_locks: dict = dict()
+
+        results: list = await asyncio.gather(*(service.run_job(job, sink_locks) for service, job in jobs))
+
+        for _, job in jobs:
+            logger.info(f"job :: {job['marketplace']} :: {job['name']} :: {job['period']} :: {job['status']}")
+
+        return all(results)
 
     @utils.async_exception
     async def execute(self) -> None:
@@ -287,7 +378,7 @@ class AmazonAD:
         await db.update_task(task=self.task)
 
         try:
-            if not await asyncio.to_thread(self.get_report):
+            if not await self.collect_reports():
                 self.task["status"] = "failed"
         finally:
             if self.task["status"] == "started":
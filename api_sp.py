@@ -1,11 +1,17 @@
 import os
 import re
+import copy
 import io
 import ast
 import sys
 import time
 import json
+import gzip
+import tempfile
 import asyncio
+import requests
+import typing as t
+import numpy as np
 import pandas as pd
 from uuid import uuid4
 from pathlib import Path
@@ -13,6 +19,7 @@ from datetime import datetime, timedelta
 
 import xml.etree.ElementTree as ET
 from sp_api.api import Reports, Orders
+from sp_api.auth import AccessTokenResponse
 from sp_api.base import ApiResponse, ReportType
 from sp_api.base.marketplaces import Marketplaces
 from sp_api.base.exceptions import SellingApiRequestThrottledException
@@ -24,63 +31,257 @@ try:
     from utils.decorators import utils
     from settings.config import config
     from database.database import db
+    from utils.rate_limiter import rate_limiter
+    from utils.token_cache import token_cache
     from database.big_query import big_query
     from database.postgres_db import postgres_db
 except ImportError as ie:
     exit(f"{ie} :: {Path(__file__).resolve()}")
 
 
+JSON_CATEGORIES: list = [
+    "GET_BRAND_ANALYTICS_MARKET_BASKET_REPORT",
+    "GET_BRAND_ANALYTICS_REPEAT_PURCHASE_REPORT",
+    "GET_BRAND_ANALYTICS_SEARCH_QUERY_PERFORMANCE_REPORT",
+    "GET_SALES_AND_TRAFFIC_REPORT"
+]
+
+STREAM_CHUNK_ROWS: int = 50000
+
+ORDERS_CATEGORY: str = "ORDERS"
+ORDERS_OVERLAP_MINUTES: int = 5
+
+
 class AmazonSP:
     service_name: str = "api_sp"
 
     def __init__(self, category: str, **kwargs):
         self.category: str = category
-        self.client: Reports | Orders = self._init(
-            client_type="orders" if category and "order" in category.lower() else "reports"
-        )
+        self.client_type: str = "orders" if category and "order" in category.lower() else "reports"
+        # settings/sp_marketplaces.json gives a list, the .env variable the same list as a json string
+        marketplaces: list | str = config.SP_MARKETPLACES or ["US"]
+        self.marketplaces: list = json.loads(marketplaces) if isinstance(marketplaces, str) else marketplaces
+        self.marketplace: str = self.marketplaces[0]
+        self.client: Reports | Orders = self._init(client_type=self.client_type, marketplace=self.marketplace)
         self.report_path = None
         self.current_date = None
         self.report_config = None
 
     @staticmethod
-    def _init(client_type: str) -> Reports | Orders:
+    def _init(client_type: str, marketplace: str = "US") -> Reports | Orders:
         credentials: dict = {
             "refresh_token": config.SP_REFRESH_TOKEN,
             "lwa_app_id": config.SP_LWA_APP_ID,
             "lwa_client_secret": config.SP_LWA_CLIENT_SECRET
         }
+        # access tokens are shared with every other process through the token cache
         if client_type == "orders":
-            return Orders(credentials=credentials, marketplace=Marketplaces.US)
+            client: Orders = Orders(credentials=credentials, marketplace=Marketplaces[marketplace])
         else:
-            return Reports(credentials=credentials, marketplace=Marketplaces.US)
+            client: Reports = Reports(credentials=credentials, marketplace=Marketplaces[marketplace])
+        return token_cache.wrap(client=client, response_class=AccessTokenResponse)
+
+    def for_marketplace(self, marketplace: str) -> "AmazonSP":
+        # every marketplace gets its own client, they share one refresh token and with it one cached access token
+        service: AmazonSP = copy.copy(self)
+        service.marketplace = marketplace
+        service.client = self._init(client_type=self.client_type, marketplace=marketplace)
+        return service
+
+    @property
+    def marketplace_id(self) -> str:
+        return Marketplaces[self.marketplace].marketplace_id
+
+    def rate_key(self, operation: str) -> str:
+        # marketplaces of one region share the selling partner quota, so buckets are kept per region endpoint
+        return f"{operation}:{Marketplaces[self.marketplace].region}"
+
+    def with_marketplace(self, df: pd.DataFrame) -> pd.DataFrame:
+        if "marketplace" not in df.columns:
+            df.insert(loc=0, column="marketplace", value=self.marketplace)
+        return df
 
     @utils.exception
     def get_reports(self) -> str:
-        reports: ApiResponse = self.client.get_reports(reportTypes=self.category, marketplaceIds=[Marketplaces.US.marketplace_id])
+        reports: ApiResponse = self.client.get_reports(reportTypes=self.category, marketplaceIds=[self.marketplace_id])
         reports_list: dict = reports.payload.get("reports", [])
         for report in reports_list:
             if report["processingStatus"] == "DONE":
                 return report.get("reportDocumentId")
 
-    @utils.exception
-    def get_orders(self, report_path: str) -> list:
-        # args: dict = report_config.get("args")
-        now: datetime = datetime.now().date()
+    def report_key(self, category: str, **kwargs) -> str:
+        return json.dumps({
+            "reportType": category,
+            "marketplaceIds": [self.marketplace_id],
+            "dataStartTime": kwargs.get("dataStartTime"),
+            "dataEndTime": kwargs.get("dataEndTime"),
+            "reportOptions": kwargs.get("reportOptions") or {}
+        }, sort_keys=True)
+
+    @staticmethod
+    def _parse_time(value: t.Optional[str]) -> t.Optional[datetime]:
+        if not value:
+            return None
 
-        reports: ApiResponse = self.client.get_orders(
-            LastUpdatedAfter=(now - timedelta(days=30)).isoformat() + "T00:00:00Z",
-            MarketplaceIds=[Marketplaces.US.marketplace_id]
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(microsecond=0)
+
+    def find_report(self, category: str, days: int = 3, **kwargs) -> t.Optional[dict]:
+        # the reports list carries no reportOptions, so only types whose content does not depend on them
+        # are matched by type and data window alone, the others are reused through the local index only
+        if category.startswith("GET_BRAND_ANALYTICS_") or category == "GET_SALES_AND_TRAFFIC_REPORT":
+            return None
+
+        response: ApiResponse = rate_limiter.call(
+            self.rate_key("sp.getReports"),
+            self.client.get_reports,
+            reportTypes=[category],
+            processingStatuses=["DONE", "IN_PROGRESS", "IN_QUEUE"],
+            createdSince=(datetime.utcnow() - timedelta(days=days)).isoformat(timespec="seconds") + "Z",
+            marketplaceIds=[self.marketplace_id],
+            throttled=(SellingApiRequestThrottledException,)
         )
 
-        data: dict = reports.payload.get("Orders", [])
-        df: pd.DataFrame = pd.DataFrame(data)
+        start: t.Optional[datetime] = self._parse_time(kwargs.get("dataStartTime"))
+        end: t.Optional[datetime] = self._parse_time(kwargs.get("dataEndTime"))
+        for report in response.payload.get("reports", []):
+            if (self._parse_time(report.get("dataStartTime")), self._parse_time(report.get("dataEndTime"))) == (start, end):
+                return report
+
+        return None
+
+    @classmethod
+    def _flatten_order(cls, data: dict, prefix: str = "") -> dict:
+        # orders carry Money objects and nested addresses, keys keep their parent name so
+        # OrderTotal and ItemPrice do not collapse into one Amount column
+        result: dict = dict()
+
+        for key, value in data.items():
+            name: str = f"{prefix}{key}"
+            if isinstance(value, dict):
+                if "Amount" in value and "CurrencyCode" in value:
+                    result[name] = value["Amount"]
+                    result[f"{name}CurrencyCode"] = value["CurrencyCode"]
+                else:
+                    result.update(cls._flatten_order(data=value, prefix=name))
+            elif isinstance(value, list):
+                result[name] = json.dumps(value)
+            else:
+                result[name] = value
+
+        return result
+
+    def get_orders(self, last_updated_after: str) -> list:
+        orders: list = list()
+        next_token: t.Optional[str] = None
 
-        df.to_csv(report_path, index=False, encoding="utf-8")
+        while True:
+            kwargs: dict = {"NextToken": next_token} if next_token else {"LastUpdatedAfter": last_updated_after}
+            response: ApiResponse = rate_limiter.call(
+                self.rate_key("sp.getOrders"),
+                self.client.get_orders,
+                MarketplaceIds=[self.marketplace_id],
+                throttled=(SellingApiRequestThrottledException,),
+                **kwargs
+            )
+
+            orders.extend(self._flatten_order(order) for order in response.payload.get("Orders", []))
+            logger.info(f"orders page :: {self.marketplace} :: {len(orders)} orders")
+
+            next_token = response.payload.get("NextToken")
+            if not next_token:
+                return orders
+
+    def get_order_items(self, order_id: str) -> list:
+        items: list = list()
+        next_token: t.Optional[str] = None
+
+        while True:
+            kwargs: dict = {"NextToken": next_token} if next_token else {}
+            response: ApiResponse = rate_limiter.call(
+                self.rate_key("sp.getOrderItems"),
+                self.client.get_order_items,
+                order_id,
+                throttled=(SellingApiRequestThrottledException,),
+                **kwargs
+            )
+
+            items.extend(
+                {"AmazonOrderId": order_id, **self._flatten_order(item)}
+                for item in response.payload.get("OrderItems", [])
+            )
+
+            next_token = response.payload.get("NextToken")
+            if not next_token:
+                return items
+
+    async def collect_order_items(self, orders: list, width: int) -> list:
+        # items are one call per order, a few run at once so their latency overlaps while the bucket sets the pace
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(width)
+
+        async def fetch(order_id: str) -> list:
+            async with semaphore:
+                return await asyncio.to_thread(self.get_order_items, order_id)
+
+        results: list = await asyncio.gather(*(fetch(order["AmazonOrderId"]) for order in orders))
+        return [item for items in results for item in items]
+
+    @utils.async_exception
+    async def sync_orders(self, sink_locks: dict) -> bool:
+        # amazon wants LastUpdatedAfter at least two minutes in the past, the next run starts a few minutes
+        # before this one so late updates are picked up again and merged by order id
+        started_at: datetime = datetime.utcnow() - timedelta(minutes=ORDERS_OVERLAP_MINUTES)
+        last_updated_after: str = await db.get_orders_watermark(marketplace_id=self.marketplace_id) or (
+            (datetime.utcnow() - timedelta(days=30)).isoformat(timespec="seconds") + "Z"
+        )
+        logger.info(f"orders sync :: {self.marketplace} :: since {last_updated_after}")
+
+        orders: list = await asyncio.to_thread(self.get_orders, last_updated_after)
+        if orders:
+            items: list = await self.collect_order_items(orders=orders, width=int(config.SP_ORDER_ITEMS_WIDTH or 4))
+
+            for table, rows in (("orders", orders), ("order_items", items)):
+                if not rows:
+                    continue
+
+                async with sink_locks.setdefault(table, asyncio.Lock()):
+                    is_loaded: bool = await asyncio.to_thread(
+                        postgres_db.add_dataframe,
+                        df=self.with_marketplace(pd.DataFrame(rows)),
+                        dataset=self.service_name,
+                        table=table,
+                        is_camel=True
+                    )
+
+                if not is_loaded:
+                    logger.error(f"orders sync failed :: {self.marketplace} :: {table}")
+                    return False
+
+            logger.info(f"orders synced :: {self.marketplace} :: {len(orders)} orders :: {len(items)} items")
+
+        # the watermark only moves once the whole delta is in postgres
+        await db.update_orders_watermark(
+            marketplace_id=self.marketplace_id,
+            last_updated_after=started_at.isoformat(timespec="seconds") + "Z"
+        )
         return True
 
+    @utils.async_exception
+    async def collect_orders(self) -> bool:
+        sink_locks: dict = dict()
+        results: list = await asyncio.gather(*(
+            self.for_marketplace(marketplace).sync_orders(sink_locks) for marketplace in self.marketplaces
+        ))
+        return all(results)
+
     # @utils.exception
-    def create_report(self, **kwargs) -> str:
-        response: ApiResponse = self.client.create_report(reportType=self.category, **kwargs)
+    def create_report(self, category: t.Optional[str] = None, **kwargs) -> str:
+        response: ApiResponse = rate_limiter.call(
+            self.rate_key("sp.createReport"),
+            self.client.create_report,
+            reportType=category or self.category,
+            throttled=(SellingApiRequestThrottledException,),
+            **kwargs
+        )
         # {'errors': None,
         #  'headers': {'Server': 'Server', 'Date': 'Mon, 01 Sep 2025 09:19:09 GMT', 'Content-Type': 'application/json', 'Content-Length': '28', 'Connection': 'keep-alive', 'x-amz-rid': 'PZ8SZQ3KA660HBYA3XBP', 'x-amzn-RateLimit-Limit': '0.0167', 'x-amzn-RequestId': '1fcfe756-f056-4524-85fd-f15669be61c3', 'x-amz-apigw-id': 'OPF1fcfe756f056', 'X-Amzn-Trace-Id': 'Root=1-68b5650d-1fcfe756f0564524', 'Vary': 'Content-Type,Accept-Encoding,User-Agent', 'Strict-Transport-Security': 'max-age=47474747; includeSubDomains; preload'},
         #  'next_token': None,
@@ -119,7 +320,105 @@ class AmazonSP:
 
         return result
 
-    def _parse_xml_document(self, document: str) -> pd.DataFrame:
+    @staticmethod
+    def _xml_chunks(source: str | t.BinaryIO, size: int = 1 << 20) -> t.Iterator[str | bytes]:
+        # the documents come with doubled quotes, they are undone chunk by chunk; an odd run of quotes at the
+        # end of a chunk keeps its last quote for the next chunk so pairs split across chunks collapse the same way
+        if isinstance(source, str):
+            chunks: t.Iterator = (source[index:index + size] for index in range(0, len(source), size))
+        else:
+            chunks: t.Iterator = iter(lambda: source.read(size), b"")
+
+        pending: str | bytes = ""
+        is_first: bool = True
+        for chunk in chunks:
+            quote: str | bytes = '"' if isinstance(chunk, str) else b'"'
+            chunk = (pending or chunk[:0]) + chunk
+
+            run: int = len(chunk) - len(chunk.rstrip(quote))
+            chunk, pending = (chunk[:-1], quote) if run % 2 else (chunk, "")
+            chunk = chunk.replace(quote * 2, quote)
+
+            if is_first:
+                chunk = chunk.lstrip()
+                is_first = not chunk
+
+            if chunk:
+                yield chunk
+
+        if pending:
+            yield pending
+
+    def iter_xml_records(self, source: str | t.BinaryIO, record_tag: t.Optional[str] = None) -> t.Iterator[dict]:
+        # records are flattened as soon as they close, yielded and cleared right after, so the tree never holds
+        # more than the record being read. without record_tag the first of Node/Record/Row/Item to open becomes
+        # the record tag for the rest of the document; reports mixing them are read by that first tag only
+        candidates: set = {record_tag} if record_tag else {"Node", "Record", "Row", "Item"}
+        top_level: list = list()
+
+        parser: ET.XMLPullParser = ET.XMLPullParser(events=("start", "end"))
+        root: t.Optional[ET.Element] = None
+        depth: int = 0
+        open_records: list = list()
+        group: list = list()
+
+        for chunk in self._xml_chunks(source):
+            parser.feed(chunk)
+            try:
+                for event, element in parser.read_events():
+                    if event == "start":
+                        depth += 1
+                        if depth == 1:
+                            root = element
+                            continue
+
+                        if not record_tag and element.tag in candidates:
+                            record_tag = element.tag
+                            top_level.clear()
+                        if element.tag == record_tag:
+                            open_records.append(len(group) + len(open_records))
+                        continue
+
+                    depth -= 1
+                    if not depth:
+                        if not record_tag and not top_level:
+                            top_level.append(self._xml_element_to_dict(element))
+                        break
+
+                    if element.tag == record_tag:
+                        # nested records are released together in document order once the outermost one closes
+                        group.append((open_records.pop(), self._xml_element_to_dict(element)))
+                        if not open_records:
+                            for _, row in sorted(group, key=lambda item: item[0]):
+                                yield row
+                            group.clear()
+                            element.clear()
+                    elif depth == 1 and not record_tag:
+                        top_level.append(self._xml_element_to_dict(element))
+
+                    # whatever hangs under the root is dropped as soon as its top-level element closes
+                    if depth == 1:
+                        element.clear()
+                        root.remove(element)
+            except ET.ParseError:
+                # anything after the root closing tag is noise the report appends, the tree parser cut it off too
+                if root is None or depth:
+                    raise
+
+            if root is not None and not depth:
+                break
+
+        yield from top_level
+
+    def _parse_xml_document(self, document: str | t.BinaryIO, record_tag: t.Optional[str] = None) -> pd.DataFrame:
+        try:
+            return pd.DataFrame(list(self.iter_xml_records(source=document, record_tag=record_tag)))
+        except ET.ParseError as e:
+            logger.error(f"XML parsing error: {e}")
+            raise
+
+    def _parse_xml_tree(self, document: str) -> pd.DataFrame:
+        # the former whole-tree parser, kept as the reference for benchmark/bench_parsers.py
         xml_content = document.replace('""', '"').strip()
 
         root_tag_match = re.search(r'<(\w+)[>\s]', xml_content)
@@ -190,8 +489,8 @@ class AmazonSP:
 
         return result
 
-    @utils.exception
-    def processing_dataframe(self, df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    def _processing_dataframe_rows(self, df: pd.DataFrame, columns: list) -> pd.DataFrame:
+        # row by row reference for bench_parsers.py, processing_dataframe builds the same frame column-wise
         for col in columns:
             df[col] = df[col].apply(self._parse_column_value)
 
@@ -213,15 +512,104 @@ class AmazonSP:
 
         return pd.DataFrame(processed_rows)
 
+    @staticmethod
+    def _factorize_column(values: pd.Series) -> tuple:
+        try:
+            return pd.factorize(values)
+        except TypeError:
+            # cells that are already dicts are not hashable, their json text stands in for them
+            return pd.factorize(values.map(lambda x: json.dumps(x, default=str) if isinstance(x, (dict, list)) else x))
+
+    def _flatten_column(self, values: pd.Series, source: int) -> tuple:
+        codes, uniques = self._factorize_column(values)
+
+        # uniques come in order of appearance, so the first row of every distinct cell is known up front
+        valid: np.ndarray = np.flatnonzero(codes >= 0)
+        first_rows: np.ndarray = valid[np.unique(codes[valid], return_index=True)[1]]
+
+        # every distinct cell is parsed and flattened once, the key schema is built over them and not over rows
+        schema: dict = dict()
+        for code, value in enumerate(uniques):
+            data: t.Any = self._parse_column_value(value)
+            if not isinstance(data, dict):
+                continue
+
+            for index, (key, item) in enumerate(self._flatten_dict(data).items()):
+                if key not in schema:
+                    # the last slot stays empty for missing cells, code -1 lands there
+                    schema[key] = {
+                        "order": (int(first_rows[code]), source, index),
+                        "values": np.full(len(uniques) + 1, np.nan, dtype=object),
+                        "present": np.zeros(len(uniques) + 1, dtype=bool)
+                    }
+                schema[key]["values"][code] = item
+                schema[key]["present"][code] = True
+
+        return codes, schema
+
     @utils.exception
-    def download_report(self, document_id: str) -> bool:
+    def processing_dataframe(self, df: pd.DataFrame, columns: list) -> pd.DataFrame:
+        if df.empty:
+            return pd.DataFrame()
+
+        output: dict = dict()
+        order: dict = dict()
+
+        for index, col in enumerate(c for c in df.columns if c not in columns):
+            output[col] = df[col].reset_index(drop=True)
+            order[col] = (0, 0, index)
+
+        # later columns overwrite keys of earlier ones only on the rows where they carry them, like dict.update
+        for source, col in enumerate(columns, start=1):
+            codes, schema = self._flatten_column(values=df[col], source=source)
+            for key, entry in schema.items():
+                values: np.ndarray = entry["values"][codes]
+                if key in output:
+                    present: np.ndarray = entry["present"][codes]
+                    values: np.ndarray = np.where(present, values, np.asarray(output[key], dtype=object))
+                    order[key] = min(order[key], entry["order"])
+                else:
+                    order[key] = entry["order"]
+                output[key] = values
+
+        # columns keep the order they first appear in row by row, the way the frame used to be built from dicts
+        result: pd.DataFrame = pd.DataFrame(
+            {key: output[key] for key in sorted(order, key=order.get)},
+            index=pd.RangeIndex(len(df))
+        )
+        return result.infer_objects()
+
+    def new_job(self, category: str, report_config: t.Optional[dict] = None) -> dict:
+        report_dir: str = os.path.join(config.reports_path, self.service_name)
+        os.makedirs(report_dir, exist_ok=True)
+
+        return {
+            "category": category,
+            "report_config": report_config or {},
+            "marketplace": self.marketplace,
+            "report_path": os.path.join(report_dir, f"{category}_{self.marketplace}.csv"),
+            "report_id": None,
+            "document_id": None,
+            "status": "pending"
+        }
+
+    @utils.exception
+    def download_report(self, document_id: str, job: t.Optional[dict] = None) -> bool:
+        job: dict = job or {
+            "category": self.category,
+            "report_config": self.report_config or {},
+            "report_path": self.report_path
+        }
+        category: str = job["category"]
+        report_config: dict = job["report_config"]
+
         response: ApiResponse = self.client.get_report_document(document_id, download=True)
         document: str = response.payload.get("document")
 
         if not document:
             return False
 
-        if self.category in [
+        if category in [
             "GET_BRAND_ANALYTICS_MARKET_BASKET_REPORT",
             "GET_BRAND_ANALYTICS_REPEAT_PURCHASE_REPORT",
             "GET_BRAND_ANALYTICS_SEARCH_QUERY_PERFORMANCE_REPORT"
@@ -229,13 +617,13 @@ class AmazonSP:
             data: dict = json.loads(document)
             records: list = data.get('dataByAsin', [])
             df: pd.DataFrame = pd.DataFrame(records)
-        elif self.category == "GET_SALES_AND_TRAFFIC_REPORT":
+        elif category == "GET_SALES_AND_TRAFFIC_REPORT":
             data: dict = json.loads(document)
             records: list = data.get("salesAndTrafficByDate", [])
             df: pd.DataFrame = pd.DataFrame(records)
-        elif self.report_config.get("format") == "xml":
+        elif report_config.get("format") == "xml":
             df: pd.DataFrame = self._parse_xml_document(document)
-        elif self.report_config.get("format") == "json":
+        elif report_config.get("format") == "json":
             try:
                 data = json.loads(document)
                 if isinstance(data, list):
@@ -258,14 +646,117 @@ class AmazonSP:
                 logger.error(e)
                 return False
 
-        json_columns = self.report_config.get("json_columns")
+        json_columns = report_config.get("json_columns")
         if json_columns:
             df: pd.DataFrame = self.processing_dataframe(df=df, columns=json_columns)
 
-        if self.category == "GET_BRAND_ANALYTICS_REPEAT_PURCHASE_REPORT":
+        if category == "GET_BRAND_ANALYTICS_REPEAT_PURCHASE_REPORT":
             df.rename(columns={"amount": "repeat_purchase_revenue"}, inplace=True)
 
-        df.to_csv(self.report_path, index=False, encoding="utf-8")
+        df: pd.DataFrame = self.with_marketplace(df)
+        df.to_csv(job["report_path"], index=False, encoding="utf-8")
+        return True
+
+    @staticmethod
+    def is_streamable(job: dict) -> bool:
+        return job["category"] not in JSON_CATEGORIES and job["report_config"].get("format") != "json"
+
+    def xml_chunks(self, stream: t.BinaryIO, record_tag: t.Optional[str] = None) -> t.Iterator[pd.DataFrame]:
+        rows: list = list()
+        for row in self.iter_xml_records(source=stream, record_tag=record_tag):
+            rows.append(row)
+            if len(rows) >= STREAM_CHUNK_ROWS:
+                yield pd.DataFrame(rows)
+                rows: list = list()
+
+        if rows:
+            yield pd.DataFrame(rows)
+
+    @utils.exception
+    def stream_report(self, document_id: str, job: dict) -> bool:
+        # flat files are read straight from the document url, gunzipped on the fly and spooled to disk chunk by chunk,
+        # so memory stays at one chunk instead of the whole decompressed document
+        payload: dict = rate_limiter.call(
+            self.rate_key("sp.getReportDocument"),
+            self.client.get_report_document,
+            document_id,
+            throttled=(SellingApiRequestThrottledException,)
+        ).payload
+        json_columns: t.Optional[list] = job["report_config"].get("json_columns")
+        table: str = job["category"].lower()
+
+        with tempfile.TemporaryDirectory(prefix=f"{table}_") as spool_dir:
+            spooled: list = list()
+            # every column of the document with the dtype kinds pandas inferred for it chunk by chunk
+            columns: dict = dict()
+
+            with requests.get(payload["url"], stream=True, timeout=300) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                stream: t.BinaryIO = (
+                    gzip.GzipFile(fileobj=response.raw) if payload.get("compressionAlgorithm") == "GZIP" else response.raw
+                )
+
+                try:
+                    if job["report_config"].get("format") == "xml":
+                        chunks: t.Iterator[pd.DataFrame] = self.xml_chunks(
+                            stream=stream, record_tag=job["report_config"].get("record_tag")
+                        )
+                    else:
+                        chunks: t.Iterator[pd.DataFrame] = pd.read_csv(
+                            stream,
+                            sep="\t",
+                            encoding=response.encoding or "utf-8",
+                            encoding_errors="replace",
+                            chunksize=STREAM_CHUNK_ROWS
+                        )
+
+                    for chunk in chunks:
+                        if json_columns:
+                            chunk: pd.DataFrame = self.processing_dataframe(df=chunk, columns=json_columns)
+
+                        chunk: pd.DataFrame = self.with_marketplace(chunk)
+                        for column, dtype in chunk.dtypes.items():
+                            columns.setdefault(column, set()).add(dtype.kind)
+
+                        spooled.append(os.path.join(spool_dir, f"{len(spooled)}.pkl"))
+                        chunk.to_pickle(spooled[-1])
+                except pd.errors.EmptyDataError:
+                    logger.warning(f"document is empty :: {job['category']} :: {document_id}")
+
+            # the sink creates a missing table from the first chunk it gets and drops columns the table lacks, so every
+            # chunk is aligned to the columns of the whole document; a column the chunks disagree on (or one a chunk
+            # lacks) is widened to float when all of them were numeric and loaded as text otherwise
+            rows: int = 0
+            for index, path in enumerate(spooled):
+                chunk: pd.DataFrame = pd.read_pickle(path).reindex(columns=list(columns))
+                os.remove(path)
+
+                for column, kinds in columns.items():
+                    kinds: set = kinds | {chunk[column].dtype.kind}
+                    if len(kinds) == 1:
+                        continue
+                    elif kinds <= {"i", "u", "f"}:
+                        chunk[column] = chunk[column].astype("float64")
+                    else:
+                        chunk[column] = chunk[column].astype(object).where(chunk[column].notna(), None)
+
+                chunk.to_csv(job["report_path"], mode="w" if index == 0 else "a", header=index == 0,
+                             index=False, encoding="utf-8")
+
+                if not postgres_db.add_dataframe(
+                        df=chunk,
+                        dataset=self.service_name,
+                        table=table,
+                        is_camel=True,
+                        custom_date=self.current_date
+                ):
+                    logger.error(f"chunk was not loaded :: {job['category']} :: {rows} rows loaded before")
+                    return False
+
+                rows += len(chunk)
+                logger.info(f"chunk loaded :: {job['category']} :: {rows} rows")
+
         return True
 
     @utils.exception
@@ -284,16 +775,16 @@ class AmazonSP:
 
         logger.info(self.category)
 
-        while True:
+        report_id: t.Optional[str] = None
+        for attempt in range(5):
             try:
                 report_id = self.create_report(**kwargs)
                 if report_id:
                     break
-            # except SellingApiRequestThrottledException as e:
             except Exception as e:
                 logger.error(e)
 
-            time.sleep(1800)
+            time.sleep(rate_limiter.backoff(attempt=attempt, base=60))
 
         if not report_id:
             logger.error("failed to create report")
@@ -325,8 +816,133 @@ class AmazonSP:
 
         return True
 
-    @utils.exception
-    def collect_reports(self):
+    async def submit_job(self, job: dict, **kwargs) -> t.Optional[str]:
+        # throttling is absorbed by the rate limiter inside create_report, what reaches here is a real error
+        for attempt in range(5):
+            try:
+                report_id: t.Optional[str] = await asyncio.to_thread(
+                    self.create_report, category=job["category"], **kwargs
+                )
+                if report_id:
+                    return report_id
+            except Exception as e:
+                logger.error(f"{job['category']} :: {e}")
+
+            await asyncio.sleep(rate_limiter.backoff(attempt=attempt, base=60))
+
+    async def poll_job(self, job: dict, interval: int = 30, attempts: int = 240) -> t.Optional[str]:
+        # a report stuck in IN_QUEUE / IN_PROGRESS fails after two hours instead of holding up the whole run
+        for _ in range(attempts):
+            payload: dict = (await asyncio.to_thread(
+                rate_limiter.call,
+                self.rate_key("sp.getReport"),
+                self.client.get_report,
+                job["report_id"],
+                throttled=(SellingApiRequestThrottledException,)
+            )).payload
+            status: str = payload.get("processingStatus")
+            logger.info(f"status :: {status} :: {job['category']} :: {job['report_id']}")
+
+            if status == "DONE":
+                return payload.get("reportDocumentId")
+            elif status in ["FATAL", "CANCELLED"]:
+                return None
+
+            await asyncio.sleep(interval)
+
+        logger.error(f"report was not generated in time :: {job['category']} :: {job['report_id']}")
+        return None
+
+    async def reuse_job(self, job: dict, **kwargs) -> bool:
+        indexed: dict = await db.get_report_index(report_key=job["report_key"]) or {}
+        if indexed.get("status") == "ingested":
+            job["status"] = "skipped"
+            logger.info(f"report was already ingested :: {job['category']} :: {indexed['document_id']}")
+            return True
+
+        if indexed.get("report_id") and indexed.get("status") != "failed":
+            job["report_id"] = indexed["report_id"]
+            logger.info(f"report is reused from the index :: {job['category']} :: {job['report_id']}")
+            return True
+
+        report: t.Optional[dict] = await asyncio.to_thread(self.find_report, job["category"], **kwargs)
+        if report:
+            job["report_id"] = report["reportId"]
+            logger.info(f"report is reused from amazon :: {job['category']} :: {job['report_id']}")
+            return True
+
+        return False
+
+    async def run_job(self, job: dict, sink_locks: dict, **kwargs) -> bool:
+        category: str = job["category"]
+        job["report_key"] = self.report_key(category, **kwargs)
+        try:
+            if not await self.reuse_job(job, **kwargs):
+                job["report_id"] = await self.submit_job(job, **kwargs)
+                if not job["report_id"]:
+                    job["status"] = "failed"
+                    logger.error(f"failed to create report :: {category}")
+                    return False
+
+                logger.info(f"report was successfully created :: {category} :: {job['report_id']}")
+            elif job["status"] == "skipped":
+                return True
+
+            job["status"] = "submitted"
+            await db.update_report_index(
+                report_key=job["report_key"], report_type=category, status=job["status"], report_id=job["report_id"]
+            )
+
+            job["document_id"] = await self.poll_job(job)
+            if not job["document_id"]:
+                job["status"] = "failed"
+                await db.update_report_index(report_key=job["report_key"], report_type=category, status=job["status"])
+                logger.error(f"document id not found :: {category}")
+                return False
+
+            if await db.is_document_ingested(document_id=job["document_id"]):
+                job["status"] = "skipped"
+                logger.info(f"document was already ingested :: {category} :: {job['document_id']}")
+                return True
+
+            job["status"] = "done"
+            await db.update_report_index(
+                report_key=job["report_key"], report_type=category, status=job["status"], document_id=job["document_id"]
+            )
+            logger.info(f"document was successfully created :: {category} :: {job['document_id']}")
+
+            # the postgres sink stages every load through one temp table per target, loads into a table go one at a time
+            async with sink_locks.setdefault(category.lower(), asyncio.Lock()):
+                if self.is_streamable(job):
+                    is_loaded: bool = await asyncio.to_thread(self.stream_report, job["document_id"], job)
+                elif await asyncio.to_thread(self.download_report, job["document_id"], job):
+                    is_loaded: bool = await asyncio.to_thread(
+                        postgres_db.add_report,
+                        file_path=job["report_path"],
+                        dataset=self.service_name,
+                        table=category.lower(),
+                        is_camel=True,
+                        custom_date=self.current_date
+                    )
+                else:
+                    is_loaded: bool = False
+
+            if not is_loaded:
+                job["status"] = "failed"
+                await db.update_report_index(report_key=job["report_key"], report_type=category, status=job["status"])
+                logger.error(f"report download failed :: {category}")
+                return False
+
+            job["status"] = "ingested"
+            await db.update_report_index(report_key=job["report_key"], report_type=category, status=job["status"])
+            return True
+        except Exception as e:
+            job["status"] = "failed"
+            logger.error(f"{category} :: {e}")
+            return False
+
+    @utils.async_exception
+    async def collect_reports(self) -> bool:
         now: datetime = datetime.now().date()
         self.current_date: datetime = now - timedelta(days=1)
         kwargs: dict = {
@@ -337,16 +953,19 @@ class AmazonSP:
             }
         }
 
-        for category, report_config in config.API_SP.items():
-            self.category = category
-            self.report_config = report_config
+        # every report of every marketplace is requested up front and ingested as soon as it is DONE,
+        # a run takes about as long as the slowest report instead of the sum of all of them
+        services: list = [self.for_marketplace(marketplace) for marketplace in self.marketplaces]
+        jobs: list = [(service, service.new_job(category=category, report_config=report_config))
+                      for service in services for category, report_config in config.API_SP.items()]
+        sink_locks: dict = dict()
 
-            try:
-                self.get_report(**kwargs)
-            except Exception as e:
-                logger.error(e)
+        results: list = await asyncio.gather(*(service.run_job(job, sink_locks, **kwargs) for service, job in jobs))
 
-            # time.sleep(60)
+        for _, job in jobs:
+            logger.info(f"job :: {job['marketplace']} :: {job['category']} :: {job['status']}")
+
+        return all(results)
 
     @utils.async_exception
     async def execute(self) -> None:
@@ -359,7 +978,12 @@ class AmazonSP:
         await db.update_task(task=self.task)
 
         try:
-            if not await asyncio.to_thread(self.collect_reports):
+            if self.category == ORDERS_CATEGORY:
+                is_done: bool = await self.collect_orders()
+            else:
+                is_done: bool = await self.collect_reports()
+
+            if not is_done:
                 self.task["status"] = "failed"
         finally:
             if self.task["status"] == "started":
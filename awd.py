@@ -1,15 +1,17 @@
 import os
 import asyncio
+import contextlib
 import typing as t
 from uuid import uuid4
 from pathlib import Path
 from datetime import datetime
 
-from playwright.async_api import Playwright, ElementHandle, Locator, Download, TimeoutError
+from playwright.async_api import Playwright, Page, ElementHandle, Locator, TimeoutError
 
 try:
     from loggers.logger import logger
     from utils.decorators import utils
+    from utils.spans import spans
     from settings.config import config
     from utils.exceptions import BrowserExceptions
     from base.playwright_async import PlaywrightAsync
@@ -31,13 +33,16 @@ class Awd(PlaywrightAsync):
         self.url: str = config.URL[self.service_name].get(self.category, config.URL[self.service_name]["monthly"])
         self.task: t.Optional[dict] = None
         self.file_type: str = "csv" if self.category in ["inventory", "shipment_awd_inbound"] else "xlsx"
+        # the request list is one table for every awd category, tabs that share it take turns with their requests
+        self.request_lock: t.Optional[asyncio.Lock] = None
+        # the label of the requested report as the request list shows it
+        self.report_label: t.Optional[str] = None
 
     @utils.async_exception
+    @spans.traced("download_report")
     async def download_report(self, report_name: str) -> bool:
         if self.category == "inventory":
-            dropdown_button: ElementHandle = await self.wait_for_selector(
-                selector="//kat-dropdown-button[@id='downloadDropdown']"
-            )
+            dropdown_button: ElementHandle = await self.locate(name="awd.download_dropdown")
             if not dropdown_button:
                 logger.error("not found dropdown button")
                 return False
@@ -54,96 +59,82 @@ class Awd(PlaywrightAsync):
             await indicator.click()
             await asyncio.sleep(5)
 
-            download_button: ElementHandle = await self.page.wait_for_selector(
-                selector="button[data-action='DOWNLOAD_INVENTORY_DATA']"
-            )
+            download_button: ElementHandle = await self.locate(name="awd.download_inventory")
             if not download_button:
                 logger.error("not found download button")
                 return False
         else:
-            is_generated: bool = False
-            for _ in range(36):
-                request_button: ElementHandle = await self.wait_for_selector(
-                    selector="//kat-button[@label='Request .csv Download']" if self.category == "shipment_awd_inbound"
-                    else "//kat-button[@label='Request Download']"
-                )
-                if not request_button:
-                    logger.error("not found request button")
-                    await asyncio.sleep(10)
-                    continue
-
-                await asyncio.sleep(5)
+            # a monthly report row is told apart by its label and request date, so only the request itself and the
+            # appearance of its row take turns with the other tabs; polling and collecting run side by side
+            row_texts: list = [self.report_label, datetime.now().strftime("%m/%d/%Y")] if self.report_label else []
+            rows_selector: str = "//kat-table-row[@role='row']" if row_texts else "(//kat-table-row[@role='row'][1])[last()]"
+
+            async with self.request_lock or contextlib.nullcontext():
+                known_rows: int = len(await self.poller.find_rows(
+                    page=self.page, rows_selector=rows_selector, row_texts=row_texts
+                )) if row_texts else 0
+
+                is_generated: bool = False
+                for _ in range(36):
+                    request_button: ElementHandle = await self.locate(
+                        name="awd.request_csv_download" if self.category == "shipment_awd_inbound" else "awd.request_download"
+                    )
+                    if not request_button:
+                        logger.error("not found request button")
+                        await asyncio.sleep(10)
+                        continue
 
-                if not await self.scroll_to_element(element=request_button):
-                    await request_button.scroll_into_view_if_needed(timeout=10000)
+                    await asyncio.sleep(5)
 
-                await request_button.click()
+                    if not await self.scroll_to_element(element=request_button):
+                        await request_button.scroll_into_view_if_needed(timeout=10000)
 
-                modal_button = await self.wait_for_selector(
-                    selector="kat-modal[visible='true'] >>> div.container > div.dialog > div.header > button.close"
-                )
+                    await request_button.click()
 
-                if modal_button:
-                    logger.warning('found modal window')
-                    await modal_button.click()
-                    await asyncio.sleep(300)
-                else:
-                    logger.info("not found modal window")
-                    is_generated: bool = True
-                    break
+                    modal_button = await self.locate(name="awd.modal_close")
 
-            if not is_generated:
-                logger.error("report was not generated")
-                return False
+                    if modal_button:
+                        logger.warning('found modal window')
+                        await modal_button.click()
+                        await asyncio.sleep(300)
+                    else:
+                        logger.info("not found modal window")
+                        is_generated: bool = True
+                        break
 
-            await asyncio.sleep(10)
+                if not is_generated:
+                    logger.error("report was not generated")
+                    return False
+
+                if row_texts:
+                    for _ in range(30):
+                        rows: list = await self.poller.find_rows(page=self.page, rows_selector=rows_selector, row_texts=row_texts)
+                        if len(rows) > known_rows:
+                            break
+                        await asyncio.sleep(2)
+                    else:
+                        logger.error(f"report row did not appear :: {self.report_label}")
+                        return False
+                else:
+                    await asyncio.sleep(10)
 
-            report_row: ElementHandle = await self.wait_for_selector(
-                selector="(//kat-table-row[@role='row'][1])[last()]"
+            self.poller.add(
+                name=report_name,
+                rows_selector=rows_selector,
+                ready_selector="kat-button[label='Download']",
+                failed_texts=["No Data Available", "No Shipment Found"],
+                row_texts=row_texts
             )
-            if not report_row:
-                logger.error("not found report row")
-                return False
-
-            download_button: t.Optional[ElementHandle] = None
-
-            for _ in range(180):
-                tasks: list = [
-                    asyncio.create_task(report_row.text_content()),
-                    asyncio.create_task(
-                        report_row.wait_for_selector(selector="kat-button[label='Download']", timeout=10000)
-                    )
-                ]
-
-                text_content, download_button = await asyncio.gather(*tasks, return_exceptions=True)
-
-                if "No Data Available" in text_content or "No Shipment Found" in text_content:
-                    download_button = None
-                    logger.warning("no data available")
-                    break
 
-                if isinstance(download_button, ElementHandle):
-                    logger.info("report was generated")
-                    break
+            async for name, is_downloaded in self.collect_reports(file_type=self.file_type):
+                if name == report_name and not is_downloaded:
+                    logger.error("not found report row")
+                    return False
 
-                logger.warning("report is not ready")
-                await asyncio.sleep(50)
+            return True
 
-            if not download_button:
-                logger.error("not found report row")
-                return False
-
-        try:
-            async with self.page.expect_download() as download_info:
-                await download_button.click()
-
-            download: Download = await download_info.value
-            # report_path: str = os.path.join(config.reports_path, category, download.suggested_filename)
-            report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.{self.file_type}")
-            await download.save_as(path=report_path)
-            await asyncio.sleep(10)
-        except Exception as e:
-            logger.error(e)
+        report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.{self.file_type}")
+        await self.capture_download(trigger=download_button, report_path=report_path)
 
         return True
 
@@ -159,17 +150,12 @@ class Awd(PlaywrightAsync):
             await self.set_date(element=date_picker, period="current_month", category=self.category)
             await asyncio.sleep(5)
         elif self.category != "inventory":
-            categories: dict = {
-                "storage": "//kat-link[@label='AWD Monthly Storage Fee Report']",
-                "processing": "//kat-link[@label='AWD Monthly Processing Fee Report']",
-                "transportation": "//kat-link[@label='AWD Monthly Transportation Fee Report']"
-            }
-
-            category_button: ElementHandle = await self.wait_for_selector(selector=categories[self.category])
+            category_button: ElementHandle = await self.locate(name=f"awd.{self.category}")
             if not category_button:
                 logger.error("not found category button")
                 return False
 
+            self.report_label: t.Optional[str] = await category_button.get_attribute("label")
             await category_button.click()
             await asyncio.sleep(10)
 
@@ -182,7 +168,7 @@ class Awd(PlaywrightAsync):
             return False
 
         report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.{self.file_type}")
-        if not os.path.isfile(report_path):
+        if not self.has_download(report_path):
             logger.critical(f"report not found :: {report_path}")
             return False
 
@@ -196,6 +182,7 @@ class Awd(PlaywrightAsync):
         #     return False
         if not postgres_db.add_report(
             file_path=report_path,
+            buffer=self.pop_download(report_path),
             dataset=self.dataset,
             table=self.category,
             skip_rows=3 if self.category == "inventory" else 0,
@@ -206,6 +193,31 @@ class Awd(PlaywrightAsync):
         logger.info(f"report completed :: {self.service_name} :: {report_name}")
         return True
 
+    @utils.async_exception
+    async def get_monthly_reports(self) -> bool:
+        # the monthly fee reports are independent, each one gets its own tab of the logged-in context; only the
+        # request clicks go one tab at a time because every tab adds its row to the same table
+        categories: list = ["storage", "processing", "transportation"]
+        request_lock: asyncio.Lock = asyncio.Lock()
+
+        def unit(category: str) -> t.Callable[[Page], t.Awaitable]:
+            async def run_unit(page: Page) -> bool:
+                worker: Awd = self.fork(page=page, category=category, file_type="xlsx", request_lock=request_lock)
+                await worker.goto(url=worker.url, timeout=60000, page=page)
+                await asyncio.sleep(5)
+                return await worker.get_report()
+
+            return run_unit
+
+        results: dict = await self.run_in_tabs(units={category: unit(category) for category in categories})
+
+        failed: list = [category for category, is_done in results.items() if not is_done]
+        if failed:
+            logger.error(f"monthly reports failed :: {self.service_name} :: {failed}")
+            return False
+
+        return True
+
     @utils.playwright_initiator
     async def execute(self, playwright: Playwright) -> None:
         self.task: dict = {
@@ -233,7 +245,7 @@ class Awd(PlaywrightAsync):
                 is_opened: bool = False
                 for _ in range(3):
                     try:
-                        await self.page.goto(url=self.url, timeout=60000)
+                        await self.goto(url=self.url, timeout=60000)
                         is_opened: bool = True
                         logger.info(f"page is opened :: {self.url}")
                         break
@@ -245,12 +257,16 @@ class Awd(PlaywrightAsync):
                     self.task["status"] = "failed"
                     raise BrowserExceptions.PageError()
 
-                if not await self.get_report():
+                is_done: bool = await self.get_monthly_reports() if self.category == "monthly" else await self.get_report()
+                if not is_done:
                     self.task["status"] = "failed"
             else:
                 self.task["status"] = "failed"
                 logger.warning("login failed")
         finally:
+            await self.flush_downloads()
+            await self.stop_tracing(failed=self.task["status"] == "failed")
+
             if self.task["status"] == "started":
                 self.task["status"] = "stopped"
             await db.update_task(task=self.task)
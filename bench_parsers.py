@@ -0,0 +1,123 @@
+import io
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import typing as t
+import pandas as pd
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+try:
+    from services.api_sp import AmazonSP
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+# compares the report parsers of services/api_sp.py on synthetic documents, wall time and peak python memory
+def browse_tree(nodes: int) -> str:
+    # GET_XML_BROWSE_TREE_DATA shape, with the doubled quotes the documents arrive with
+    parts: list = ['<?xml version=""1.0"" encoding=""UTF-8""?>\n<Result>']
+    for index in range(nodes):
+        parts.append(
+            f'<Node><browseNodeId>{1000000 + index}</browseNodeId>'
+            f'<browseNodeAttributes count=""1""><attribute name=""refinement"">size</attribute></browseNodeAttributes>'
+            f'<browseNodeName>Category {index}</browseNodeName>'
+            f'<browseNodeStoreContextName>Store {index % 50}</browseNodeStoreContextName>'
+            f'<browsePathById>1,{index % 300},{index}</browsePathById>'
+            f'<browsePathByName>Root,Branch {index % 300},Category {index}</browsePathByName>'
+            f'<hasChildren>{str(index % 3 == 0).lower()}</hasChildren>'
+            f'<productTypeDefinitions>PRODUCT_{index % 20}</productTypeDefinitions></Node>'
+        )
+    parts.append("</Result>")
+    return "".join(parts)
+
+
+def order_report(rows: int) -> pd.DataFrame:
+    # flat-file order rows with the json columns as they come in the document, money objects included
+    cities: list = [f"City {index}" for index in range(2000)]
+    return pd.DataFrame({
+        "amazon-order-id": [f"111-{index:07d}-{index % 9973:07d}" for index in range(rows)],
+        "sku": [f"SKU-{index % 5000}" for index in range(rows)],
+        "quantity": [index % 4 + 1 for index in range(rows)],
+        "OrderTotal": [
+            json.dumps({"OrderTotal": {"amount": f"{index % 10000 / 100:.2f}", "currencyCode": "USD"}})
+            for index in range(rows)
+        ],
+        "ShippingAddress": [
+            json.dumps({
+                "ShippingAddress": {
+                    "City": cities[index % len(cities)],
+                    "StateOrRegion": f"S{index % 50}",
+                    "PostalCode": f"{index % 90000 + 10000}",
+                    "CountryCode": "US"
+                },
+                "IsBusinessOrder": index % 11 == 0
+            }) if index % 17 else None
+            for index in range(rows)
+        ]
+    })
+
+
+def measure(name: str, func: t.Callable, repeat: int) -> dict:
+    timings: list = list()
+    peak: int = 0
+    rows: int = 0
+    for _ in range(repeat):
+        tracemalloc.start()
+        start: float = time.perf_counter()
+        df = func()
+        timings.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        rows = df if isinstance(df, int) else len(df)
+
+    return {"name": name, "rows": rows, "seconds": min(timings), "peak_mb": peak / 1024 / 1024}
+
+
+def print_results(title: str, results: list) -> None:
+    print(f"\n{title}")
+    print(f"  {'parser':<28} {'rows':>9} {'best s':>9} {'peak mb':>9}")
+    for result in results:
+        print(f"  {result['name']:<28} {result['rows']:>9} {result['seconds']:>9.2f} {result['peak_mb']:>9.1f}")
+
+
+def bench_xml(parser: AmazonSP, nodes: int, repeat: int) -> list:
+    document: str = browse_tree(nodes=nodes)
+    encoded: bytes = document.encode("utf-8")
+    return [
+        measure("tree (fromstring)", lambda: parser._parse_xml_tree(document), repeat),
+        measure("iterparse, detected tag", lambda: parser._parse_xml_document(document), repeat),
+        measure("iterparse, record_tag", lambda: parser._parse_xml_document(document, record_tag="Node"), repeat),
+        # records consumed one by one from a stream, as stream_report reads them, without building a frame
+        measure("iterparse, streamed", lambda: sum(1 for _ in parser.iter_xml_records(source=io.BytesIO(encoded))), repeat)
+    ]
+
+
+def bench_json(parser: AmazonSP, rows: int, repeat: int) -> list:
+    df: pd.DataFrame = order_report(rows=rows)
+    columns: list = ["OrderTotal", "ShippingAddress"]
+    return [
+        measure("rows (iterrows)", lambda: parser._processing_dataframe_rows(df=df.copy(), columns=columns), repeat),
+        measure("columns (factorized)", lambda: parser.processing_dataframe(df=df.copy(), columns=columns), repeat)
+    ]
+
+
+def run() -> None:
+    arg_parser: argparse.ArgumentParser = argparse.ArgumentParser(description="benchmark report parsers")
+    arg_parser.add_argument("--nodes", type=int, default=200000, help="browse tree nodes")
+    arg_parser.add_argument("--rows", type=int, default=500000, help="order report rows for json_columns")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args: argparse.Namespace = arg_parser.parse_args()
+
+    # the parsers need no api client
+    parser: AmazonSP = AmazonSP.__new__(AmazonSP)
+
+    print_results(f"xml browse tree :: {args.nodes} nodes", bench_xml(parser=parser, nodes=args.nodes, repeat=args.repeat))
+    print_results(f"json columns :: {args.rows} rows", bench_json(parser=parser, rows=args.rows, repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    run()
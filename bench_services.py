@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+import typing as t
+from pathlib import Path
+
+import requests
+import uvicorn
+from playwright.sync_api import sync_playwright
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+try:
+    from loggers.logger import logger
+    from settings.config import config
+    from utils.spans import spans
+    from database.database import db
+    from database.big_query import big_query
+    from database.postgres_db import postgres_db
+    from benchmark.replica import app, urls
+    from benchmark.span_report import summarize
+    from services.awd import Awd
+    from services.fulfillment import Fulfillment
+    from services.payments import Payments
+    from services.shipments import Shipments
+    from services.support import Support
+    from services.business_reports import BusinessReports
+    from services.brand_analytics import BrandAnalytics
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+# runs the browser services headless against the offline replica (benchmark/replica.py)
+# and prints wall time per phase from the spans each run records
+SERVICES: dict = {
+    "fulfillment": Fulfillment,
+    "payments": Payments,
+    "awd": Awd,
+    "shipments": Shipments,
+    "support": Support,
+    "business_reports": BusinessReports,
+    "brand_analytics": BrandAnalytics
+}
+
+TARGETS: list = [
+    "fulfillment:fba_inventory",
+    "fulfillment:fulfilled_shipments",
+    "payments:transactions",
+    "awd:storage",
+    "awd:inventory",
+    "shipments:shipments",
+    "support:support",
+    "business_reports:brand_performance",
+    "brand_analytics:brand"
+]
+
+USER_ID: str = "bench"
+
+
+def start_replica(port: int) -> uvicorn.Server:
+    server: uvicorn.Server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+
+    for _ in range(100):
+        if server.started:
+            logger.info(f"replica started :: {port}")
+            return server
+        time.sleep(0.1)
+
+    raise RuntimeError("replica did not start")
+
+
+def start_browser(cdp_port: int, profile_path: str, executable_path: t.Optional[str] = None) -> subprocess.Popen:
+    if not executable_path:
+        with sync_playwright() as playwright:
+            executable_path: str = playwright.chromium.executable_path
+
+    args: list = [
+        executable_path,
+        "--headless=new",
+        f"--remote-debugging-port={cdp_port}",
+        f"--user-data-dir={profile_path}",
+        "--no-first-run",
+        "--no-default-browser-check"
+    ]
+    # chromium refuses to start as root with its sandbox on, which is the usual case in containers
+    if os.geteuid() == 0:
+        args.append("--no-sandbox")
+
+    process: subprocess.Popen = subprocess.Popen(
+        [*args, "about:blank"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+    for _ in range(100):
+        try:
+            requests.get(f"http://127.0.0.1:{cdp_port}/json/version", timeout=1)
+            logger.info(f"browser started :: {cdp_port}")
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+
+    process.kill()
+    raise RuntimeError("browser did not start")
+
+
+def prepare_environment(work_path: str, replica_port: int, cdp_port: int) -> None:
+    config.URL = urls(base_url=f"http://127.0.0.1:{replica_port}")
+    config.USERS[USER_ID] = {"port": cdp_port, "email": "bench@example.com", "username": "bench", "phone": ""}
+    config.reports_path = os.path.join(work_path, "reports")
+    config.screenshots_path = os.path.join(work_path, "screenshots")
+    config.db_path = os.path.join(work_path, "bench.db")
+
+    with sqlite3.connect(config.db_path) as connection:
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS task (
+                task_id TEXT PRIMARY KEY,
+                user_id TEXT,
+                service TEXT,
+                category TEXT,
+                status TEXT,
+                created_at TEXT,
+                description TEXT
+            )
+        """)
+
+
+def scale_sleeps(scale: float) -> None:
+    # the services pace themselves with fixed sleeps, scaling them leaves the browser and network time visible
+    original_sleep: t.Callable = asyncio.sleep
+
+    async def scaled_sleep(delay: float, result: t.Any = None) -> t.Any:
+        return await original_sleep(delay * scale, result)
+
+    asyncio.sleep = scaled_sleep
+
+
+def parse_only_sinks() -> None:
+    # reports are still parsed into dataframes, nothing is written to postgres or bigquery
+    def parse_report(file_path: str, skip_rows: int = 0, buffer: t.Any = None, **kwargs) -> bool:
+        df = postgres_db.read_file(file_path=file_path, skip_rows=skip_rows, buffer=buffer)
+        logger.info(f"report parsed :: {file_path} :: {0 if df is None else len(df)} rows")
+        return df is not None
+
+    def skip_update(*args, **kwargs) -> bool:
+        return True
+
+    for sink in (postgres_db, big_query):
+        sink.add_report = spans.traced("sink.add_report")(parse_report)
+        sink.update_data = spans.traced("sink.update_data")(skip_update)
+
+
+def run_target(target: str) -> dict:
+    service_name, _, category = target.partition(":")
+    service = SERVICES[service_name](user_id=USER_ID, category=category)
+    service.base_url = config.URL["base_url"]
+
+    started_at: str = time.strftime("%Y-%m-%d %H:%M:%S")
+    start: float = time.perf_counter()
+    service.run()
+    wall: float = time.perf_counter() - start
+
+    task: dict = service.task or {}
+    rows: list = asyncio.run(db.get_spans(since=started_at, service=service_name)) or []
+    rows = [row for row in rows if row["task_id"] == task.get("task_id")]
+
+    return {"target": target, "status": task.get("status"), "wall": wall, "steps": summarize(rows)}
+
+
+def print_result(result: dict) -> None:
+    print(f"\n{result['target']} :: {result['status']} :: {result['wall']:.1f}s")
+    print(f"  {'step':<44} {'count':>6} {'misses':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for step in sorted(result["steps"], key=lambda item: item["total"], reverse=True):
+        print(
+            f"  {step['step']:<44} {step['count']:>6} {step['misses']:>7} {step['total'] / 1000:>9.1f} "
+            f"{step['p50']:>9.0f} {step['p95']:>9.0f}"
+        )
+
+
+def run() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="benchmark browser services offline")
+    parser.add_argument("--targets", nargs="*", default=TARGETS, help="service:category pairs")
+    parser.add_argument("--replica-port", type=int, default=8700)
+    parser.add_argument("--cdp-port", type=int, default=9333)
+    parser.add_argument("--sleep-scale", type=float, default=1.0)
+    parser.add_argument("--sinks", action="store_true", help="write reports to the real sinks")
+    parser.add_argument("--browser-path", help="chromium executable, playwright's own build by default")
+    args: argparse.Namespace = parser.parse_args()
+
+    work_path: str = tempfile.mkdtemp(prefix="replica_bench_")
+    prepare_environment(work_path=work_path, replica_port=args.replica_port, cdp_port=args.cdp_port)
+
+    if args.sleep_scale != 1.0:
+        scale_sleeps(scale=args.sleep_scale)
+    if not args.sinks:
+        parse_only_sinks()
+
+    server: uvicorn.Server = start_replica(port=args.replica_port)
+    browser: subprocess.Popen = start_browser(
+        cdp_port=args.cdp_port, profile_path=os.path.join(work_path, "profile"), executable_path=args.browser_path
+    )
+
+    results: list = list()
+    try:
+        for target in args.targets:
+            results.append(run_target(target=target))
+            print_result(results[-1])
+    finally:
+        browser.terminate()
+        server.should_exit = True
+        shutil.rmtree(work_path, ignore_errors=True)
+
+    print(f"\ntotal :: {sum(result['wall'] for result in results):.1f}s")
+
+
+if __name__ == "__main__":
+    run()
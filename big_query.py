@@ -16,6 +16,7 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 try:
     from loggers.logger import logger
     from utils.decorators import utils
+    from utils.spans import spans
     from settings.config import config
 except ImportError as ie:
     exit(f"{ie} :: {Path(__file__).resolve()}")
@@ -34,11 +35,13 @@ class BigQuery:
         os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = config.service_account_path
 
     @staticmethod
-    def read_file(file_path: str, skip_rows: int = 0) -> pd.DataFrame:
+    def read_file(file_path: str, skip_rows: int = 0, buffer: t.Optional[t.BinaryIO] = None) -> pd.DataFrame:
+        source = buffer if buffer is not None else file_path
+
         if file_path.endswith('.csv'):
-            return pd.read_csv(file_path, skiprows=skip_rows)
+            return pd.read_csv(source, skiprows=skip_rows)
         elif file_path.endswith('.xlsx'):
-            return pd.read_excel(file_path, skiprows=skip_rows)
+            return pd.read_excel(source, skiprows=skip_rows)
 
     @staticmethod
     def add_column(
@@ -181,6 +184,7 @@ class BigQuery:
         logger.info(f"table was deduplicated :: {table_ref}")
 
     @utils.exception
+    @spans.traced("sink.update_data")
     def update_data(
             self,
             df: pd.DataFrame,
@@ -241,6 +245,7 @@ class BigQuery:
         return df
 
     @utils.exception
+    @spans.traced("sink.add_report")
     def add_report(
             self,
             file_path: str,
@@ -252,9 +257,10 @@ class BigQuery:
             custom_date: t.Optional[str] = None,
             period: t.Optional[str] = None,
             asin: t.Optional[str] = None,
-            write_disposition: str = "WRITE_APPEND"
+            write_disposition: str = "WRITE_APPEND",
+            buffer: t.Optional[t.BinaryIO] = None
     ) -> bool:
-        df: pd.DataFrame = self.read_file(file_path=file_path, skip_rows=skip_rows)
+        df: pd.DataFrame = self.read_file(file_path=file_path, skip_rows=skip_rows, buffer=buffer)
 
         if len(df) == 0:
             logger.warning("dataframe is empty")
@@ -1,3 +1,4 @@
+import io
 import os
 import random
 import re
@@ -6,15 +7,18 @@ import typing as t
 import pandas as pd
 from uuid import uuid4
 from pathlib import Path
+from datetime import datetime, timedelta
 
-from playwright.async_api import Playwright, Page, ElementHandle, Locator, Download, TimeoutError
+from playwright.async_api import Playwright, Page, ElementHandle, Locator, TimeoutError
 
 try:
     from loggers.logger import logger
     from utils.decorators import utils
+    from utils.spans import spans
     from settings.config import config
     from utils.exceptions import BrowserExceptions
     from base.playwright_async import PlaywrightAsync
+    from base.locators import locators
     from database.database import db
     from utils.google_sheets import gs
     from database.big_query import big_query
@@ -33,6 +37,7 @@ class BrandAnalytics(PlaywrightAsync):
         self.url: str = config.URL[self.service_name]
         self.task: t.Optional[dict] = None
         self.week_num: t.Optional[int] = None
+        self.download_manager_url: t.Optional[str] = None
 
     @utils.async_exception
     async def is_new_week(self) -> bool:
@@ -67,24 +72,28 @@ class BrandAnalytics(PlaywrightAsync):
         # return False
 
     @utils.async_exception
-    async def download_report(self, report_name: str) -> bool:
+    async def generate_report(self) -> t.Optional[Page]:
         for _ in range(2):
-            download_button: ElementHandle = await self.wait_for_selector(
-                selector="//kat-button[@id='downloadModalGenerateDownloadButton']"
-            )
+            download_button: ElementHandle = await self.locate(name="brand_analytics.modal_generate")
             if not download_button:
                 logger.error("not found download button")
-                return False
+                return None
 
             await download_button.click()
             # await self.click(element=download_button)
             await asyncio.sleep(10)
 
-        page: t.Optional[Page] = None
         for tab in self.context.pages:
             if "download-manager" in tab.url:
-                page: Page = tab
-                break
+                self.download_manager_url = tab.url
+                return tab
+
+        return None
+
+    @utils.async_exception
+    @spans.traced("download_report")
+    async def download_report(self, report_name: str) -> bool:
+        page: t.Optional[Page] = await self.generate_report()
 
         await asyncio.sleep(10)
 
@@ -94,7 +103,7 @@ class BrandAnalytics(PlaywrightAsync):
 
         for _ in range(180):
             try:
-                await page.wait_for_selector(selector="//kat-badge[@label='In Progress']", timeout=10000)
+                await locators.locate(page=page, name="brand_analytics.in_progress")
                 logger.warning("report is not ready")
             except TimeoutError:
                 logger.info("report was generated")
@@ -103,22 +112,13 @@ class BrandAnalytics(PlaywrightAsync):
             await asyncio.sleep(50)
 
         try:
-            async with page.expect_download() as download_info:
-                download_button: ElementHandle = await page.wait_for_selector(
-                    selector="//kat-icon[@name='file_download']"
-                )
-                if not download_button:
-                    logger.error("not found download button")
-                    return False
-
-                await download_button.click()
-                # await self.click(element=download_button)
+            download_button: ElementHandle = await self.locate(name="brand_analytics.file_download", page=page)
+            if not download_button:
+                logger.error("not found download button")
+                return False
 
-            download: Download = await download_info.value
-            # report_path: str = os.path.join(config.reports_path, category, download.suggested_filename)
             report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-            await download.save_as(path=report_path)
-            await asyncio.sleep(10)
+            await self.capture_download(trigger=download_button, report_path=report_path, page=page)
         except Exception as e:
             logger.error(e)
         finally:
@@ -131,9 +131,7 @@ class BrandAnalytics(PlaywrightAsync):
         await self.run_js("set_brand.js", brand)
         await asyncio.sleep(5)
 
-        apply_button: ElementHandle = await self.wait_for_selector(
-            selector="//kat-button[@data-test-id='RequiredFilterApplyButton']"
-        )
+        apply_button: ElementHandle = await self.locate(name="brand_analytics.apply_button")
         if not apply_button:
             logger.error("not found apply button")
             return False
@@ -142,9 +140,7 @@ class BrandAnalytics(PlaywrightAsync):
         # await self.click(element=apply_button)
         await asyncio.sleep(5)
 
-        download_button: ElementHandle = await self.wait_for_selector(
-            selector="//kat-button[@id='GenerateDownloadButton']"
-        )
+        download_button: ElementHandle = await self.locate(name="brand_analytics.generate_button")
         if not download_button:
             logger.error("not found download button")
             return False
@@ -190,7 +186,7 @@ class BrandAnalytics(PlaywrightAsync):
                 await asyncio.sleep(15)
 
                 report_path: str = os.path.join(config.reports_path, self.service_name, f"{brand}.csv")
-                if not os.path.isfile(report_path):
+                if not self.has_download(report_path):
                     logger.critical(f"report not found :: {report_path}")
                     return False
 
@@ -200,6 +196,7 @@ class BrandAnalytics(PlaywrightAsync):
 
                 if not big_query.add_report(
                     file_path=report_path,
+                    buffer=self.pop_download(report_path),
                     dataset="amzudc",
                     # table=brand.lower().replace(" ", "_"),
                     table="share_test",
@@ -212,16 +209,14 @@ class BrandAnalytics(PlaywrightAsync):
                 logger.info(f"report completed :: {brand}")
                 await asyncio.sleep(30)
 
-                if not await self.is_logged(reload=True):
+                if not await self.probe_session():
                     return False
 
         return True
 
     @utils.async_exception
-    async def get_asin_report(self, asin: str) -> bool:
-        asin_button: ElementHandle = await self.wait_for_selector(
-            selector="//kat-tab[@tab-id='query-performance-asin-view']"
-        )
+    async def get_asin_report(self, asin: str, download: bool = True) -> bool:
+        asin_button: ElementHandle = await self.locate(name="brand_analytics.asin_tab")
         if not asin_button:
             logger.error("not found asin button")
             return False
@@ -230,9 +225,7 @@ class BrandAnalytics(PlaywrightAsync):
         # await self.click(element=asin_button)
         await asyncio.sleep(5)
 
-        asin_input: ElementHandle = await self.wait_for_selector(
-            selector="//kat-input[@placeholder='Search for 1 ASIN']"
-        )
+        asin_input: ElementHandle = await self.locate(name="brand_analytics.asin_input")
         if not asin_input:
             logger.error("not found asin input")
             return False
@@ -281,11 +274,134 @@ class BrandAnalytics(PlaywrightAsync):
 
         await asyncio.sleep(5)
 
+        if not download:
+            page: t.Optional[Page] = await self.generate_report()
+            if not page:
+                logger.error("not found page")
+                return False
+
+            await page.close()
+            return True
+
         if not await self.download_report(report_name=asin):
             return False
 
         return True
 
+    @staticmethod
+    def report_asin(buffer: io.BytesIO) -> t.Optional[str]:
+        first_line: str = buffer.getvalue().split(b"\n", 1)[0].decode("utf-8", errors="ignore")
+        match: t.Optional[re.Match] = re.search(r'ASIN=\["?([A-Z0-9]+)"?\]', first_line)
+        return match.group(1) if match else None
+
+    @utils.async_exception
+    async def harvest_reports(self, batch: dict) -> dict:
+        # batch and result are keyed by (asin, sku), an asin listed under several skus is requested once per sku
+        page: Page = await self.context.new_page()
+        harvested: dict = dict()
+
+        try:
+            await self.goto(url=self.download_manager_url, timeout=60000, page=page)
+
+            for _ in range(180):
+                try:
+                    await locators.locate(page=page, name="brand_analytics.in_progress")
+                    logger.warning("reports are not ready")
+                except TimeoutError:
+                    logger.info("reports were generated")
+                    break
+
+                await asyncio.sleep(50)
+
+            # the newest reports are listed first, the batch occupies the top rows
+            buttons: list = await page.query_selector_all(locators.selector("brand_analytics.file_download"))
+            prefix: str = f"{self.category}_{datetime.now().strftime('%d_%m_%Y_%H%M%S')}"
+
+            for index, button in enumerate(buttons[:len(batch)]):
+                report_path: str = os.path.join(config.reports_path, self.service_name, f"{prefix}_{index}.csv")
+                if not await self.capture_download(trigger=button, report_path=report_path, page=page):
+                    continue
+
+                asin: t.Optional[str] = self.report_asin(buffer=self.downloads[report_path])
+                key: t.Optional[tuple] = next((key for key in batch if key[0] == asin and key not in harvested), None)
+                if not key:
+                    logger.warning(f"unexpected report :: {asin} :: {report_path}")
+                    self.pop_download(report_path)
+                    continue
+
+                harvested[key] = report_path
+                await asyncio.sleep(random.uniform(1, 3))
+        finally:
+            await page.close()
+
+        return harvested
+
+    async def ingest_reports(self, queue: asyncio.Queue) -> None:
+        # a single consumer, the postgres sink stages every load through the same temp table
+        while True:
+            item: t.Optional[dict] = await queue.get()
+            if item is None:
+                break
+
+            sku, asin = item["sku"], item["asin"]
+            is_done: bool = False
+            try:
+                is_done: bool = bool(await asyncio.to_thread(
+                    postgres_db.add_report,
+                    file_path=item["report_path"],
+                    buffer=self.pop_download(item["report_path"]),
+                    dataset=self.service_name,
+                    table=self.category,
+                    skip_rows=1,
+                    asin=sku
+                ))
+                if is_done:
+                    logger.info(f"report completed :: {asin} :: {sku}")
+            except Exception as e:
+                logger.error(f"report ingestion error :: {asin} :: {sku} :: {e}")
+
+            await db.ack_asin_item(item=item, user_id=self.user_id, is_done=is_done)
+
+    @utils.async_exception
+    async def get_asin_pipelined(self, week: str, batch_size: int) -> bool:
+        queue: asyncio.Queue = asyncio.Queue()
+        worker: asyncio.Task = asyncio.create_task(self.ingest_reports(queue=queue))
+
+        try:
+            while True:
+                items: list = await db.claim_asin_items(user_id=self.user_id, week=week, limit=batch_size)
+                if not items:
+                    break
+
+                batch: dict = dict()
+                for item in items:
+                    logger.info(f"requesting :: {item['asin']} :: {item['sku']}")
+                    if await self.get_asin_report(asin=item["asin"], download=False):
+                        batch[(item["asin"], item["sku"])] = item
+
+                    await asyncio.sleep(random.randint(5, 15))
+
+                # waiting for the batch can take up to 180 polls of 50 s, the claims are renewed before it starts
+                await db.renew_asin_items(items=items, user_id=self.user_id)
+                harvested: dict = await self.harvest_reports(batch=batch) if batch and self.download_manager_url else {}
+
+                for item in items:
+                    key: tuple = (item["asin"], item["sku"])
+                    if key in (harvested or {}):
+                        queue.put_nowait({**item, "report_path": harvested[key]})
+                        continue
+
+                    logger.warning(f"report was not harvested :: {item['asin']} :: {item['sku']}")
+                    await db.ack_asin_item(item=item, user_id=self.user_id, is_done=False)
+
+                if not await self.probe_session():
+                    await self.recover_session()
+        finally:
+            await queue.put(None)
+            await worker
+
+        return True
+
     @utils.async_exception
     async def process_asin(self, sku: str, asin: str) -> bool:
         logger.info(f"processing :: {asin} :: {sku}")
@@ -299,7 +415,7 @@ class BrandAnalytics(PlaywrightAsync):
         await asyncio.sleep(15)
 
         report_path: str = os.path.join(config.reports_path, self.service_name, f"{asin}.csv")
-        if not os.path.isfile(report_path):
+        if not self.has_download(report_path):
             logger.critical(f"report not found :: {report_path}")
             return False
 
@@ -317,6 +433,7 @@ class BrandAnalytics(PlaywrightAsync):
         #     return False
         if not postgres_db.add_report(
             file_path=report_path,
+            buffer=self.pop_download(report_path),
             dataset=self.service_name,
             table=self.category,
             skip_rows=1,
@@ -337,43 +454,58 @@ class BrandAnalytics(PlaywrightAsync):
             logger.error("not found asin report")
             return False
 
-        df_loc: pd.DataFrame = df.loc[:99, ["sku", "ASIN"]] if self.user_id == "1" else df.loc[98:, ["sku", "ASIN"]]
+        # every browser user shares one queue for the reporting week, which ends on the last saturday
+        days_back: int = (datetime.now().weekday() + 2) % 7 or 7
+        week: str = (datetime.now() - timedelta(days=days_back)).date().isoformat()
 
-        for value in df_loc.itertuples(index=False):
-            for _ in range(3):
-                if not await self.process_asin(sku=value.sku, asin=value.ASIN):
-                    continue
+        items: list = [(value.sku, value.ASIN) for value in df[["sku", "ASIN"]].itertuples(index=False) if value.ASIN]
+        added: int = await db.add_asin_items(items=items, week=week)
+        logger.info(f"asin queue :: {week} :: added {added or 0} of {len(items)}")
 
-                if not await self.is_logged(reload=True):
-                    await asyncio.sleep(300)
-
-                    is_logged: bool = await self.is_logged()
-                    if is_logged is None:
-                        raise BrowserExceptions.PageError()
-                    elif not is_logged:
-                        if await self.login():
-                            is_logged: bool = True
-
-                    if is_logged:
-                        is_opened: bool = False
-                        for _ in range(3):
-                            try:
-                                await self.page.goto(url=self.url, timeout=60000)
-                                is_opened: bool = True
-                                logger.info(f"page is opened :: {self.url}")
-                                break
-                            except (BrowserExceptions.PageError, TimeoutError):
-                                logger.warning(f"page is not opened :: {self.url}")
-                                continue
-
-                        if not is_opened:
-                            self.task["status"] = "failed"
-                            raise BrowserExceptions.PageError()
+        batch_size: int = int(config.BA_ASIN_BATCH or 0)
+        if batch_size > 1:
+            return await self.get_asin_pipelined(week=week, batch_size=batch_size)
 
+        while True:
+            claimed: list = await db.claim_asin_items(user_id=self.user_id, week=week)
+            if not claimed:
                 break
 
+            item: dict = claimed[0]
+            is_done: bool = bool(await self.process_asin(sku=item["sku"], asin=item["asin"]))
+            await db.ack_asin_item(item=item, user_id=self.user_id, is_done=is_done)
+
+            if is_done and not await self.probe_session():
+                await self.recover_session()
+
         return True
 
+    async def recover_session(self) -> None:
+        await asyncio.sleep(300)
+
+        is_logged: bool = await self.is_logged()
+        if is_logged is None:
+            raise BrowserExceptions.PageError()
+        elif not is_logged:
+            if await self.login():
+                is_logged: bool = True
+
+        if is_logged:
+            is_opened: bool = False
+            for _ in range(3):
+                try:
+                    await self.goto(url=self.url, timeout=60000)
+                    is_opened: bool = True
+                    logger.info(f"page is opened :: {self.url}")
+                    break
+                except (BrowserExceptions.PageError, TimeoutError):
+                    logger.warning(f"page is not opened :: {self.url}")
+                    continue
+
+            if not is_opened:
+                self.task["status"] = "failed"
+                raise BrowserExceptions.PageError()
+
     @utils.playwright_initiator
     async def execute(self, playwright: Playwright) -> None:
         self.task: dict = {
@@ -401,7 +533,7 @@ class BrandAnalytics(PlaywrightAsync):
                 is_opened: bool = False
                 for _ in range(3):
                     try:
-                        await self.page.goto(url=self.url, timeout=60000)
+                        await self.goto(url=self.url, timeout=60000)
                         is_opened: bool = True
                         logger.info(f"page is opened :: {self.url}")
                         break
@@ -423,6 +555,9 @@ class BrandAnalytics(PlaywrightAsync):
                 self.task["status"] = "failed"
                 logger.warning("login failed")
         finally:
+            await self.flush_downloads()
+            await self.stop_tracing(failed=self.task["status"] == "failed")
+
             if self.task["status"] == "started":
                 self.task["status"] = "stopped"
 
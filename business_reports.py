@@ -6,11 +6,12 @@ from pathlib import Path
 from datetime import datetime, timedelta
 
 import pandas as pd
-from playwright.async_api import Playwright, ElementHandle, Download, TimeoutError
+from playwright.async_api import Playwright, ElementHandle, TimeoutError
 
 try:
     from loggers.logger import logger
     from utils.decorators import utils
+    from utils.spans import spans
     from settings.config import config
     from utils.exceptions import BrowserExceptions
     from base.playwright_async import PlaywrightAsync
@@ -33,37 +34,27 @@ class BusinessReports(PlaywrightAsync):
         self.task: t.Optional[dict] = None
 
     @utils.async_exception
+    @spans.traced("download_report")
     async def download_report(self, report_name: str) -> bool:
-        download_button: ElementHandle = await self.page.wait_for_selector(
-            selector="//kat-button[@data-testid='BR_TABLE_BAR_DOWNLOAD_BUTTON']"
-        )
+        download_button: ElementHandle = await self.locate(name="business_reports.download_button")
         if not download_button:
             logger.error("not found download button")
             return False
 
-        try:
-            async with self.page.expect_download() as download_info:
-                await download_button.click()
-
-            download: Download = await download_info.value
-            # report_path: str = os.path.join(config.reports_path, category, download.suggested_filename)
-            report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-            await download.save_as(path=report_path)
-            await asyncio.sleep(10)
-        except Exception as e:
-            logger.error(e)
+        report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
+        await self.capture_download(trigger=download_button, report_path=report_path)
 
         return True
 
     @utils.async_exception
     async def get_report(self) -> bool:
         categories: dict = {
-            "brand_performance": "//span[text()='Brand Performance']",
-            "sales_traffic_daily": "(//span[text()='Detail Page Sales and Traffic'])[2]",
-            "sales_traffic_weekly": "(//span[text()='Detail Page Sales and Traffic'])[2]",
+            "brand_performance": "business_reports.brand_performance",
+            "sales_traffic_daily": "business_reports.sales_traffic",
+            "sales_traffic_weekly": "business_reports.sales_traffic",
         }
 
-        category_button: ElementHandle = await self.wait_for_selector(selector=categories[self.category])
+        category_button: ElementHandle = await self.locate(name=categories[self.category])
         if not category_button:
             logger.error("not found category button")
             return False
@@ -91,7 +82,7 @@ class BusinessReports(PlaywrightAsync):
                 return False
 
             report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-            if not os.path.isfile(report_path):
+            if not self.has_download(report_path):
                 logger.critical(f"report not found :: {report_path}")
                 return False
 
@@ -108,6 +99,7 @@ class BusinessReports(PlaywrightAsync):
             custom_date: str = datetime.strptime(date_period.split("-")[0], "%m/%d/%Y").strftime("%Y-%m-%d")
             postgres_db.add_report(
                 file_path=report_path,
+                buffer=self.pop_download(report_path),
                 dataset=self.service_name,
                 table=self.category,
                 period=date_period if self.category != "sales_traffic_daily" else None,
@@ -173,7 +165,7 @@ class BusinessReports(PlaywrightAsync):
                     is_opened: bool = False
                     for _ in range(3):
                         try:
-                            await self.page.goto(url=self.url, timeout=60000)
+                            await self.goto(url=self.url, timeout=60000)
                             is_opened: bool = True
                             logger.info(f"page is opened :: {self.url}")
                             break
@@ -191,6 +183,9 @@ class BusinessReports(PlaywrightAsync):
                     self.task["status"] = "failed"
                     logger.warning("login failed")
         finally:
+            await self.flush_downloads()
+            await self.stop_tracing(failed=self.task["status"] == "failed")
+
             if self.task["status"] == "started":
                 self.task["status"] = "stopped"
             await db.update_task(task=self.task)
@@ -1,3 +1,5 @@
+import asyncio
+import sqlite3
 from pathlib import Path
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
@@ -8,6 +10,7 @@ try:
     from loggers.logger import logger
     from utils.decorators import utils
     from settings.config import config
+    from utils.spans import spans
 except ImportError as ie:
     exit(f"{ie} :: {Path(__file__).resolve()}")
 
@@ -15,7 +18,8 @@ except ImportError as ie:
 class Database:
     @asynccontextmanager
     async def connection(self) -> aiosqlite.Connection:
-        connection: aiosqlite.Connection = await aiosqlite.connect(database=config.db_path)
+        # writers wait for each other's lock up to the busy timeout instead of failing at once
+        connection: aiosqlite.Connection = await aiosqlite.connect(database=config.db_path, timeout=30)
         connection.row_factory = aiosqlite.Row
 
         try:
@@ -93,6 +97,59 @@ class Database:
             await session.execute(query, values)
             await session.commit()
 
+        # spans recorded while the task runs are written once it leaves the started state
+        if task.get("status") == "started":
+            spans.bind(task=task)
+        else:
+            await self.add_spans(records=spans.drain(task_id=task.get("task_id")))
+
+    @staticmethod
+    async def create_span(session: aiosqlite.Connection) -> None:
+        await session.execute("""
+            CREATE TABLE IF NOT EXISTS span (
+                task_id TEXT NOT NULL,
+                service TEXT,
+                category TEXT,
+                step TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                duration_ms REAL NOT NULL,
+                is_ok INTEGER NOT NULL
+            )
+        """)
+        await session.execute("CREATE INDEX IF NOT EXISTS span_service_step ON span (service, step)")
+
+    @utils.async_exception
+    async def add_spans(self, records: list) -> None:
+        if not records:
+            return
+
+        query: str = """
+            INSERT INTO span (task_id, service, category, step, started_at, duration_ms, is_ok)
+            VALUES (:task_id, :service, :category, :step, :started_at, :duration_ms, :is_ok)
+        """
+
+        async with self.connection() as session:
+            await self.create_span(session=session)
+            await session.executemany(query, records)
+            await session.commit()
+
+        logger.info(f"spans saved :: {records[0]['task_id']} :: {len(records)}")
+
+    @utils.async_exception
+    async def get_spans(self, since: str, service: str = None) -> list:
+        query: str = f"""
+            SELECT task_id, service, step, duration_ms, is_ok
+            FROM span
+            WHERE started_at >= ? {'AND service = ?' if service else ''}
+        """
+        values: tuple = (since, service) if service else (since,)
+
+        async with self.connection() as session:
+            await self.create_span(session=session)
+            async with session.execute(query, values) as cursor:
+                rows: list = await cursor.fetchall()
+                return [dict(row) for row in rows]
+
     @utils.async_exception
     async def add_sms(self, sms_to: str, otp_code: str) -> None:
         query: str = """
@@ -123,5 +180,238 @@ class Database:
                 row: aiosqlite.Row = await cursor.fetchone()
                 return dict(row)["otp_code"] if row else None
 
+    @staticmethod
+    async def create_asin_queue(session: aiosqlite.Connection) -> None:
+        await session.execute("""
+            CREATE TABLE IF NOT EXISTS asin_queue (
+                sku TEXT NOT NULL,
+                asin TEXT NOT NULL,
+                week TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                user_id TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                claimed_at TEXT,
+                updated_at TEXT,
+                PRIMARY KEY (sku, asin, week)
+            )
+        """)
+
+    @utils.async_exception
+    async def add_asin_items(self, items: list, week: str) -> int:
+        query: str = """
+            INSERT OR IGNORE INTO asin_queue (sku, asin, week, status, updated_at)
+            VALUES (?, ?, ?, 'pending', ?)
+        """
+        now: str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        values: list = [(sku, asin, week, now) for sku, asin in items]
+
+        async with self.connection() as session:
+            await self.create_asin_queue(session=session)
+            cursor: aiosqlite.Cursor = await session.executemany(query, values)
+            await session.commit()
+            return cursor.rowcount
+
+    async def claim_asin_items(self, user_id: str, week: str, limit: int = 1, lease: int = 14400) -> list:
+        # an empty list is the only way to say the queue is drained, a database that stays locked is retried
+        # and then raised so a caller never takes it for an empty queue
+        for attempt in range(1, 4):
+            try:
+                return await self._claim_asin_items(user_id=user_id, week=week, limit=limit, lease=lease)
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or attempt == 3:
+                    raise
+
+                logger.warning(f"asin queue is locked, retrying :: {week} :: attempt {attempt}")
+                await asyncio.sleep(attempt * 5)
+
+    async def _claim_asin_items(self, user_id: str, week: str, limit: int, lease: int) -> list:
+        now: datetime = datetime.now()
+        threshold: str = (now - timedelta(seconds=lease)).strftime("%Y-%m-%d %H:%M:%S")
+
+        async with self.connection() as session:
+            await self.create_asin_queue(session=session)
+            # the write lock is taken up front so two browsers never claim the same row
+            await session.execute("BEGIN IMMEDIATE")
+            try:
+                await session.execute(
+                    """
+                    UPDATE asin_queue
+                    SET status = 'pending', user_id = NULL
+                    WHERE week = ? AND status = 'claimed' AND claimed_at < ?
+                    """,
+                    (week, threshold)
+                )
+
+                async with session.execute(
+                    """
+                    SELECT sku, asin, week
+                    FROM asin_queue
+                    WHERE week = ? AND status = 'pending'
+                    ORDER BY attempts, rowid
+                    LIMIT ?
+                    """,
+                    (week, limit)
+                ) as cursor:
+                    rows: list = [dict(row) for row in await cursor.fetchall()]
+
+                await session.executemany(
+                    """
+                    UPDATE asin_queue
+                    SET status = 'claimed', user_id = ?, attempts = attempts + 1, claimed_at = ?, updated_at = ?
+                    WHERE sku = ? AND asin = ? AND week = ?
+                    """,
+                    [
+                        (user_id, now.strftime("%Y-%m-%d %H:%M:%S"), now.strftime("%Y-%m-%d %H:%M:%S"),
+                         row["sku"], row["asin"], row["week"])
+                        for row in rows
+                    ]
+                )
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+        return rows
+
+    @utils.async_exception
+    async def renew_asin_items(self, items: list, user_id: str) -> None:
+        # a claim is only reclaimed by other browsers once its lease runs out, a long harvest pushes it forward
+        now: str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        query: str = """
+            UPDATE asin_queue
+            SET claimed_at = ?, updated_at = ?
+            WHERE sku = ? AND asin = ? AND week = ? AND status = 'claimed' AND user_id = ?
+        """
+        values: list = [(now, now, item["sku"], item["asin"], item["week"], user_id) for item in items]
+
+        async with self.connection() as session:
+            await session.executemany(query, values)
+            await session.commit()
+
+    @utils.async_exception
+    async def ack_asin_item(self, item: dict, user_id: str, is_done: bool, max_attempts: int = 3) -> None:
+        # a failed item goes back to the queue for any browser until it runs out of attempts;
+        # only the current owner acks, a claim that expired and went to another browser is left to it
+        query: str = """
+            UPDATE asin_queue
+            SET status = CASE
+                    WHEN ? THEN 'done'
+                    WHEN attempts >= ? THEN 'failed'
+                    ELSE 'pending'
+                END,
+                updated_at = ?
+            WHERE sku = ? AND asin = ? AND week = ? AND user_id = ? AND status = 'claimed'
+        """
+        values: tuple = (
+            is_done,
+            max_attempts,
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            item["sku"],
+            item["asin"],
+            item["week"],
+            user_id
+        )
+
+        async with self.connection() as session:
+            cursor: aiosqlite.Cursor = await session.execute(query, values)
+            await session.commit()
+
+        if not cursor.rowcount:
+            logger.warning(f"stale asin ack, the claim is gone :: {item['sku']} :: {item['asin']} :: {user_id}")
+
+    @staticmethod
+    async def create_report_index(session: aiosqlite.Connection) -> None:
+        await session.execute("""
+            CREATE TABLE IF NOT EXISTS report_index (
+                report_key TEXT PRIMARY KEY,
+                report_type TEXT NOT NULL,
+                report_id TEXT,
+                document_id TEXT,
+                status TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        await session.execute("CREATE INDEX IF NOT EXISTS report_index_document ON report_index (document_id)")
+
+    @utils.async_exception
+    async def get_report_index(self, report_key: str) -> dict:
+        async with self.connection() as session:
+            await self.create_report_index(session=session)
+            async with session.execute("SELECT * FROM report_index WHERE report_key = ?", (report_key,)) as cursor:
+                row: aiosqlite.Row = await cursor.fetchone()
+                return dict(row) if row else {}
+
+    @utils.async_exception
+    async def is_document_ingested(self, document_id: str) -> bool:
+        query: str = "SELECT 1 FROM report_index WHERE document_id = ? AND status = 'ingested' LIMIT 1"
+
+        async with self.connection() as session:
+            await self.create_report_index(session=session)
+            async with session.execute(query, (document_id,)) as cursor:
+                return await cursor.fetchone() is not None
+
+    @utils.async_exception
+    async def update_report_index(self, report_key: str, report_type: str, status: str, **fields) -> None:
+        now: str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        query: str = """
+            INSERT INTO report_index (report_key, report_type, report_id, document_id, status, created_at, updated_at)
+            VALUES (:report_key, :report_type, :report_id, :document_id, :status, :now, :now)
+            ON CONFLICT (report_key) DO UPDATE SET
+                report_id = COALESCE(excluded.report_id, report_id),
+                document_id = COALESCE(excluded.document_id, document_id),
+                status = excluded.status,
+                updated_at = excluded.updated_at
+        """
+        values: dict = {
+            "report_key": report_key,
+            "report_type": report_type,
+            "report_id": fields.get("report_id"),
+            "document_id": fields.get("document_id"),
+            "status": status,
+            "now": now
+        }
+
+        async with self.connection() as session:
+            await self.create_report_index(session=session)
+            await session.execute(query, values)
+            await session.commit()
+
+    @staticmethod
+    async def create_orders_watermark(session: aiosqlite.Connection) -> None:
+        await session.execute("""
+            CREATE TABLE IF NOT EXISTS orders_watermark (
+                marketplace_id TEXT PRIMARY KEY,
+                last_updated_after TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+
+    @utils.async_exception
+    async def get_orders_watermark(self, marketplace_id: str) -> str:
+        query: str = "SELECT last_updated_after FROM orders_watermark WHERE marketplace_id = ?"
+
+        async with self.connection() as session:
+            await self.create_orders_watermark(session=session)
+            async with session.execute(query, (marketplace_id,)) as cursor:
+                row: aiosqlite.Row = await cursor.fetchone()
+                return row["last_updated_after"] if row else None
+
+    @utils.async_exception
+    async def update_orders_watermark(self, marketplace_id: str, last_updated_after: str) -> None:
+        query: str = """
+            INSERT INTO orders_watermark (marketplace_id, last_updated_after, updated_at)
+            VALUES (?, ?, ?)
+            ON CONFLICT (marketplace_id) DO UPDATE SET
+                last_updated_after = excluded.last_updated_after,
+                updated_at = excluded.updated_at
+        """
+        values: tuple = (marketplace_id, last_updated_after, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+        async with self.connection() as session:
+            await self.create_orders_watermark(session=session)
+            await session.execute(query, values)
+            await session.commit()
+
 
 db: Database = Database()
@@ -5,11 +5,12 @@ from uuid import uuid4
 from pathlib import Path
 from datetime import datetime
 
-from playwright.async_api import Playwright, ElementHandle, Download, TimeoutError
+from playwright.async_api import Playwright, ElementHandle, TimeoutError
 
 try:
     from loggers.logger import logger
     from utils.decorators import utils
+    from utils.spans import spans
     from settings.config import config
     from utils.exceptions import BrowserExceptions
     from base.playwright_async import PlaywrightAsync
@@ -32,12 +33,10 @@ class Fulfillment(PlaywrightAsync):
         self.task: t.Optional[dict] = None
 
     @utils.async_exception
-    async def download_report(self, report_name: str) -> bool:
+    async def request_report(self, report_name: str) -> bool:
         is_generated: bool = False
         for _ in range(36):
-            request_button: ElementHandle = await self.wait_for_selector(
-                selector="//kat-button[@class='download-report-page-kat-button-primary']"
-            )
+            request_button: ElementHandle = await self.locate(name="fulfillment.request_button")
             if not request_button:
                 logger.error("not found request button")
                 await asyncio.sleep(10)
@@ -50,9 +49,7 @@ class Fulfillment(PlaywrightAsync):
 
             await request_button.click()
 
-            modal_button = await self.wait_for_selector(
-                selector="kat-modal[visible='true'] >>> div.container > div.dialog > div.header > button.close"
-            )
+            modal_button = await self.locate(name="fulfillment.modal_close")
 
             if modal_button:
                 logger.warning('found modal window')
@@ -67,79 +64,56 @@ class Fulfillment(PlaywrightAsync):
             logger.error("report was not generated")
             return False
 
-        await asyncio.sleep(10)
-
-        report_rowgroup: ElementHandle = await self.wait_for_selector(
-            selector="//kat-table-body[@role='rowgroup']"
+        self.poller.add(
+            name=report_name,
+            rows_selector="kat-table-body[role='rowgroup'] kat-table-row[role='row']",
+            ready_selector="kat-button[label='Download']",
+            failed_texts=["No Data Available", "Canceled"]
         )
-        if not report_rowgroup:
-            logger.error("not found report rowgroup")
-            return False
-
-        report_row: ElementHandle = await report_rowgroup.wait_for_selector(
-            selector="kat-table-row[role='row']:first-child"
-        )
-        if not report_row:
-            logger.error("not found report row")
-            return False
-
-        download_button: t.Optional[ElementHandle] = None
-
-        for _ in range(180):
-            tasks: list = [
-                asyncio.create_task(report_row.text_content()),
-                asyncio.create_task(
-                    report_row.wait_for_selector(selector="kat-button[label='Download']", timeout=10000)
-                )
-            ]
 
-            text_content, download_button = await asyncio.gather(*tasks, return_exceptions=True)
-
-            if "No Data Available" in text_content or "Canceled" in text_content:
-                download_button = None
-                logger.warning("no data available")
-                break
-
-            if isinstance(download_button, ElementHandle):
-                logger.info("report was generated")
-                break
-
-            logger.warning("report is not ready")
-            await asyncio.sleep(50)
+        await asyncio.sleep(10)
+        return True
 
-        if not download_button:
-            logger.error("not found report row")
+    @utils.async_exception
+    @spans.traced("download_report")
+    async def download_report(self, report_name: str) -> bool:
+        if not await self.request_report(report_name=report_name):
             return False
 
-        try:
-            async with self.page.expect_download() as download_info:
-                await download_button.click()
-
-            download: Download = await download_info.value
-            # report_path: str = os.path.join(config.reports_path, category, download.suggested_filename)
-            report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-            await download.save_as(path=report_path)
-            await asyncio.sleep(10)
-        except Exception as e:
-            logger.error(e)
+        async for name, is_downloaded in self.collect_reports():
+            if name == report_name and not is_downloaded:
+                return False
 
         return True
 
     @utils.async_exception
-    async def get_report(self, period: t.Optional[str] = None, report_name: t.Optional[str] = None) -> bool:
+    async def get_report(
+            self,
+            period: t.Optional[str] = None,
+            report_name: t.Optional[str] = None,
+            wait: bool = True
+    ) -> bool:
+        if not report_name:
+            report_name: str = self.category
+
+        report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
+        if await self.direct_report(
+            service_name=self.service_name, category=self.category, report_path=report_path, period=period
+        ):
+            return True
+
         if self.category in [
             "fba_inventory", "manage_fba_inventory", "reimbursements", "inventory_surcharge", "promotions"
         ]:
-            selector: t.Optional[str] = None
+            locator: t.Optional[str] = None
             if self.category in ["reimbursements", "inventory_surcharge"]:
-                selector: str = "(//label[@class='reports-nav-show-link'])[3]"
+                locator: str = "fulfillment.show_payments"
             elif self.category in ["fba_inventory", "manage_fba_inventory"]:
-                selector: str = "//label[@class='reports-nav-show-link']"
+                locator: str = "fulfillment.show_inventory"
             elif self.category == "promotions":
-                selector: str = "(//label[@class='reports-nav-show-link'])[2]"
-
+                locator: str = "fulfillment.show_promotions"
 
-            show_button: ElementHandle = await self.wait_for_selector(selector=selector)
+            show_button: ElementHandle = await self.locate(name=locator)
             if not show_button:
                 logger.error("not found show button")
                 return False
@@ -154,21 +128,7 @@ class Fulfillment(PlaywrightAsync):
             await show_button.click()
             await asyncio.sleep(5)
 
-        categories: dict = {
-            "fulfilled_shipments": "//span[text()='Amazon Fulfilled Shipments']",
-            "fba_inventory": "//span[text()='FBA Inventory']",
-            "manage_fba_inventory": "//span[text()='Manage FBA Inventory']",
-            "replacements": "//span[text()='Replacements']",
-            "reimbursements": "//span[text()='Reimbursements']",
-            "order_detail": "//span[text()='Removal Order Detail']",
-            "shipment_detail": "//span[text()='Removal Shipment Detail']",
-            "storage_fees": "//span[text()='Monthly Storage Fees']",
-            "inventory_surcharge": "//span[text()='Aged Inventory Surcharge report']",
-            "promotions": "//span[text()='Promotions']",
-            "fba_customer_returns": "//span[text()='FBA customer returns']",
-        }
-
-        category_button: ElementHandle = await self.wait_for_selector(selector=categories[self.category])
+        category_button: ElementHandle = await self.locate(name=f"fulfillment.{self.category}")
         if not category_button:
             logger.error("not found category button")
             return False
@@ -182,7 +142,7 @@ class Fulfillment(PlaywrightAsync):
         await asyncio.sleep(5)
 
         if self.category in ["fulfilled_shipments", "replacements", "reimbursements", "order_detail", "shipment_detail"]:
-            download_button: ElementHandle = await self.wait_for_selector(selector="//a[@id='reportpage_download_tab']")
+            download_button: ElementHandle = await self.locate(name="fulfillment.download_tab")
             if not download_button:
                 logger.error("not found download button")
                 return False
@@ -208,9 +168,7 @@ class Fulfillment(PlaywrightAsync):
 
             await asyncio.sleep(5)
 
-            date_picker: ElementHandle = await self.wait_for_selector(
-                selector="//kat-date-range-picker[@id='daily-time-picker-kat-date-range-picker']"
-            )
+            date_picker: ElementHandle = await self.locate(name="fulfillment.date_picker")
             if not date_picker:
                 logger.error("not found date picker")
                 return False
@@ -220,7 +178,7 @@ class Fulfillment(PlaywrightAsync):
             await asyncio.sleep(5)
 
         if self.category in ["storage_fees", "inventory_surcharge"]:
-            download_button: ElementHandle = await self.wait_for_selector(selector="//a[@id='reportpage_download_tab']")
+            download_button: ElementHandle = await self.locate(name="fulfillment.download_tab")
             if not download_button:
                 logger.error("not found download button")
                 return False
@@ -239,7 +197,7 @@ class Fulfillment(PlaywrightAsync):
             await asyncio.sleep(5)
 
         if self.category in ["promotions", "fba_customer_returns"]:
-            download_button: ElementHandle = await self.wait_for_selector(selector="//a[@id='reportpage_download_tab']")
+            download_button: ElementHandle = await self.locate(name="fulfillment.download_tab")
             if not download_button:
                 logger.error("not found download button")
                 return False
@@ -250,8 +208,8 @@ class Fulfillment(PlaywrightAsync):
             await asyncio.sleep(5)
             await download_button.click()
 
-        if not report_name:
-            report_name: str = self.category
+        if not wait:
+            return await self.request_report(report_name=report_name)
 
         if not await self.download_report(report_name=report_name):
             return False
@@ -264,7 +222,7 @@ class Fulfillment(PlaywrightAsync):
             return False
 
         report_path: str = os.path.join(config.reports_path, self.service_name, f"{self.category}.csv")
-        if not os.path.isfile(report_path):
+        if not self.has_download(report_path):
             logger.critical(f"report not found :: {report_path}")
             return False
 
@@ -277,6 +235,7 @@ class Fulfillment(PlaywrightAsync):
         #     return False
         if not postgres_db.add_report(
             file_path=report_path,
+            buffer=self.pop_download(report_path),
             dataset=self.dataset,
             table=self.category,
             add_date=True if self.category == "manage_fba_inventory" else False
@@ -296,16 +255,27 @@ class Fulfillment(PlaywrightAsync):
         if today <= 3 and self.category not in previous_month_categories:
             periods.append("previous_month")
 
+        report_names: list = list()
+
+        # every period is requested up front so their generation overlaps, then collected together
         for period in periods:
             month, year = await self.get_date(period=period)
 
             report_name: str = f"{self.category}_{month}_{year}"
 
-            if not await self.get_report(period=period, report_name=report_name):
+            if not await self.get_report(period=period, report_name=report_name, wait=False):
                 continue
 
+            report_names.append(report_name)
+
+        async for report_name, is_downloaded in self.collect_reports():
+            if not is_downloaded:
+                logger.error(f"report was not downloaded :: {report_name}")
+                report_names.remove(report_name)
+
+        for report_name in report_names:
             report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-            if not os.path.isfile(report_path):
+            if not self.has_download(report_path):
                 logger.critical(f"report not found :: {report_path}")
                 return False
 
@@ -318,15 +288,18 @@ class Fulfillment(PlaywrightAsync):
             date = datetime.now().date().isoformat()
             postgres_db.add_report(
                 file_path=report_path,
+                buffer=self.pop_download(report_path),
                 dataset=self.dataset,
                 table=self.category,
                 add_date=date if self.category == "storage_fees" else False
             )
 
             logger.info(f"report completed :: {self.service_name} :: {report_name}")
+
+        if report_names:
             await asyncio.sleep(30)
 
-            if not await self.is_logged(reload=True):
+            if not await self.probe_session():
                 return False
 
         return True
@@ -350,7 +323,7 @@ class Fulfillment(PlaywrightAsync):
             return False
 
         report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-        if not os.path.isfile(report_path):
+        if not self.has_download(report_path):
             logger.critical(f"report not found :: {report_path}")
             return False
 
@@ -362,6 +335,7 @@ class Fulfillment(PlaywrightAsync):
         #     return False
         if not postgres_db.add_report(
             file_path=report_path,
+            buffer=self.pop_download(report_path),
             dataset=self.dataset,
             table=self.category
         ):
@@ -370,7 +344,7 @@ class Fulfillment(PlaywrightAsync):
         logger.info(f"report completed :: {self.service_name} :: {report_name}")
         await asyncio.sleep(30)
 
-        if not await self.is_logged(reload=True):
+        if not await self.probe_session():
             return False
 
         return True
@@ -402,7 +376,7 @@ class Fulfillment(PlaywrightAsync):
                 is_opened: bool = False
                 for _ in range(3):
                     try:
-                        await self.page.goto(url=self.url, timeout=60000)
+                        await self.goto(url=self.url, timeout=60000)
                         is_opened: bool = True
                         logger.info(f"page is opened :: {self.url}")
                         break
@@ -429,6 +403,9 @@ class Fulfillment(PlaywrightAsync):
                 self.task["status"] = "failed"
                 logger.warning("login failed")
         finally:
+            await self.flush_downloads()
+            await self.stop_tracing(failed=self.task["status"] == "failed")
+
             if self.task["status"] == "started":
                 self.task["status"] = "stopped"
             await db.update_task(task=self.task)
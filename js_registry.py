@@ -0,0 +1,97 @@
+import os
+import json
+import typing as t
+from pathlib import Path
+
+from playwright.async_api import Page, BrowserContext, ElementHandle
+
+try:
+    from loggers.logger import logger
+    from settings.config import config
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+class JsRegistry:
+    namespace: str = "__reports_js"
+    missing: str = "__reports_js_missing__"
+
+    def __init__(self, js_path: str):
+        self.js_path: str = js_path
+        self.snippets: t.Optional[dict] = None
+        self.bundle: t.Optional[str] = None
+        self.contexts: set = set()
+
+    @staticmethod
+    def _wrap(source: str) -> str:
+        source = source.strip()
+        if source.startswith(("(", "function", "async")):
+            return source
+
+        # plain statement scripts (e.g. set_report_view.js) are turned into a callable
+        return f"() => {{\n{source}\n}}"
+
+    def load(self) -> dict:
+        if self.snippets is not None:
+            return self.snippets
+
+        self.snippets = dict()
+        for file in sorted(os.listdir(self.js_path)):
+            if not file.endswith(".js"):
+                continue
+
+            source: str = Path(os.path.join(self.js_path, file)).read_text(encoding="utf-8")
+            self.snippets[file[:-3]] = self._wrap(source)
+
+        entries: str = ",\n".join(f"{json.dumps(name)}: ({source})" for name, source in self.snippets.items())
+        self.bundle = f"window.{self.namespace} = Object.assign(window.{self.namespace} || {{}}, {{\n{entries}\n}});"
+
+        logger.info(f"js snippets loaded :: {len(self.snippets)}")
+        return self.snippets
+
+    @staticmethod
+    def snippet_name(js_file: str) -> str:
+        return js_file[:-3] if js_file.endswith(".js") else js_file
+
+    async def install(self, page: Page) -> None:
+        self.load()
+
+        context: BrowserContext = page.context
+        if id(context) not in self.contexts:
+            await context.add_init_script(script=self.bundle)
+            self.contexts.add(id(context))
+
+        await page.evaluate(f"() => {{ {self.bundle} }}")
+        logger.info("js snippets installed")
+
+    async def call(self, page: Page, js_file: str, arg: t.Any = None, element: t.Optional[ElementHandle] = None) -> t.Any:
+        name: str = self.snippet_name(js_file)
+        if name not in self.load():
+            raise FileNotFoundError(os.path.join(self.js_path, js_file))
+
+        if element:
+            expression: str = f"""
+                (el, {{name, arg}}) => {{
+                    const fn = window.{self.namespace} && window.{self.namespace}[name];
+                    return fn ? fn(el, arg === null ? undefined : arg) : '{self.missing}';
+                }}
+                """
+            target = element
+        else:
+            expression: str = f"""
+                ({{name, arg}}) => {{
+                    const fn = window.{self.namespace} && window.{self.namespace}[name];
+                    return fn ? (arg === null ? fn() : fn(arg)) : '{self.missing}';
+                }}
+                """
+            target = page
+
+        result: t.Any = await target.evaluate(expression, {"name": name, "arg": arg})
+        if result == self.missing:
+            await self.install(page=page)
+            result: t.Any = await target.evaluate(expression, {"name": name, "arg": arg})
+
+        return result
+
+
+js_registry: JsRegistry = JsRegistry(js_path=config.js_path)
@@ -0,0 +1,225 @@
+import time
+import typing as t
+from pathlib import Path
+
+from playwright.async_api import Page, ElementHandle, TimeoutError
+
+try:
+    from loggers.logger import logger
+    from utils.spans import spans
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+# named locators per page; css and role selectors pierce the kat-* shadow roots and are tried first,
+# xpath is kept for positional lookups and as a fallback. timeout is the budget for the preferred strategy,
+# a fallback only gets FALLBACK_TIMEOUT so a stale selector shows up in the stats instead of costing double
+FALLBACK_TIMEOUT: int = 1000
+
+LOCATORS: dict = {
+    "home": {
+        "settings": {"css": "div[aria-label='Settings']", "xpath": "//div[@aria-label='Settings']", "timeout": 10000}
+    },
+    "login": {
+        "login_button": {"css": "strong:text-is('Log in')", "xpath": "//strong[text()='Log in']", "timeout": 10000},
+        "email_input": {"css": "input[type='email']", "xpath": "//input[@type='email']"},
+        "password_input": {"css": "input[type='password']", "xpath": "//input[@type='password']"},
+        "submit_button": {"css": "input[type='submit']", "xpath": "//input[@type='submit']"},
+        "new_otp_link": {"css": "a#auth-get-new-otp-link", "xpath": "//a[@id='auth-get-new-otp-link']", "timeout": 5000},
+        "otp_device": {"xpath": "(//input[@name='otpDeviceContext'])[1]"},
+        "send_code": {"css": "input#auth-send-code", "xpath": "//input[@id='auth-send-code']"},
+        "tel_input": {"css": "input[type='tel']", "xpath": "//input[@type='tel']"},
+        "region_button": {"xpath": "//span[contains(text(), 'United States')]", "timeout": 10000},
+        "region_submit": {"role": ("button", "Select account"), "xpath": "//button[contains(text(), 'Select account')]"}
+    },
+    "fulfillment": {
+        "request_button": {
+            "css": "kat-button.download-report-page-kat-button-primary",
+            "xpath": "//kat-button[@class='download-report-page-kat-button-primary']"
+        },
+        "modal_close": {
+            "css": "kat-modal[visible='true'] >>> div.container > div.dialog > div.header > button.close",
+            "timeout": 5000
+        },
+        "download_tab": {"css": "a#reportpage_download_tab", "xpath": "//a[@id='reportpage_download_tab']"},
+        "date_picker": {
+            "css": "kat-date-range-picker#daily-time-picker-kat-date-range-picker",
+            "xpath": "//kat-date-range-picker[@id='daily-time-picker-kat-date-range-picker']"
+        },
+        "show_inventory": {"xpath": "//label[@class='reports-nav-show-link']"},
+        "show_promotions": {"xpath": "(//label[@class='reports-nav-show-link'])[2]"},
+        "show_payments": {"xpath": "(//label[@class='reports-nav-show-link'])[3]"},
+        "fulfilled_shipments": {"css": "span:text-is('Amazon Fulfilled Shipments')", "xpath": "//span[text()='Amazon Fulfilled Shipments']"},
+        "fba_inventory": {"css": "span:text-is('FBA Inventory')", "xpath": "//span[text()='FBA Inventory']"},
+        "manage_fba_inventory": {"css": "span:text-is('Manage FBA Inventory')", "xpath": "//span[text()='Manage FBA Inventory']"},
+        "replacements": {"css": "span:text-is('Replacements')", "xpath": "//span[text()='Replacements']"},
+        "reimbursements": {"css": "span:text-is('Reimbursements')", "xpath": "//span[text()='Reimbursements']"},
+        "order_detail": {"css": "span:text-is('Removal Order Detail')", "xpath": "//span[text()='Removal Order Detail']"},
+        "shipment_detail": {"css": "span:text-is('Removal Shipment Detail')", "xpath": "//span[text()='Removal Shipment Detail']"},
+        "storage_fees": {"css": "span:text-is('Monthly Storage Fees')", "xpath": "//span[text()='Monthly Storage Fees']"},
+        "inventory_surcharge": {
+            "css": "span:text-is('Aged Inventory Surcharge report')",
+            "xpath": "//span[text()='Aged Inventory Surcharge report']"
+        },
+        "promotions": {"css": "span:text-is('Promotions')", "xpath": "//span[text()='Promotions']"},
+        "fba_customer_returns": {"css": "span:text-is('FBA customer returns')", "xpath": "//span[text()='FBA customer returns']"}
+    },
+    "payments": {
+        "request_report": {"css": "kat-button[label='Request Report']", "xpath": "//kat-button[@label='Request Report']"}
+    },
+    "awd": {
+        "download_dropdown": {"css": "kat-dropdown-button#downloadDropdown", "xpath": "//kat-dropdown-button[@id='downloadDropdown']"},
+        "download_inventory": {"css": "button[data-action='DOWNLOAD_INVENTORY_DATA']"},
+        "request_download": {"css": "kat-button[label='Request Download']", "xpath": "//kat-button[@label='Request Download']"},
+        "request_csv_download": {
+            "css": "kat-button[label='Request .csv Download']",
+            "xpath": "//kat-button[@label='Request .csv Download']"
+        },
+        "modal_close": {
+            "css": "kat-modal[visible='true'] >>> div.container > div.dialog > div.header > button.close",
+            "timeout": 5000
+        },
+        "storage": {"css": "kat-link[label='AWD Monthly Storage Fee Report']", "xpath": "//kat-link[@label='AWD Monthly Storage Fee Report']"},
+        "processing": {
+            "css": "kat-link[label='AWD Monthly Processing Fee Report']",
+            "xpath": "//kat-link[@label='AWD Monthly Processing Fee Report']"
+        },
+        "transportation": {
+            "css": "kat-link[label='AWD Monthly Transportation Fee Report']",
+            "xpath": "//kat-link[@label='AWD Monthly Transportation Fee Report']"
+        }
+    },
+    "shipments": {
+        "export_link": {"css": "kat-link.export-table-link", "xpath": "//kat-link[@class='export-table-link']"},
+        "apply_button": {"css": "kat-button[class='date-range-apply-button']"},
+        "results_range": {"css": "kat-dropdown[value='25']", "xpath": "//kat-dropdown[@value='25']", "timeout": 10000},
+        "next_page": {"role": ("link", "Next"), "xpath": "//a[text()='Next']", "timeout": 10000}
+    },
+    "support": {
+        "export_button": {"css": "kat-button.export-report-button", "xpath": "//kat-button[@class='export-report-button']"},
+        "results_range": {"css": "kat-dropdown[value='10']", "xpath": "//kat-dropdown[@value='10']", "timeout": 10000},
+        "pagination": {"css": "kat-pagination", "xpath": "//kat-pagination"}
+    },
+    "business_reports": {
+        "download_button": {
+            "css": "kat-button[data-testid='BR_TABLE_BAR_DOWNLOAD_BUTTON']",
+            "xpath": "//kat-button[@data-testid='BR_TABLE_BAR_DOWNLOAD_BUTTON']"
+        },
+        "brand_performance": {"css": "span:text-is('Brand Performance')", "xpath": "//span[text()='Brand Performance']"},
+        "sales_traffic": {"xpath": "(//span[text()='Detail Page Sales and Traffic'])[2]"}
+    },
+    "brand_analytics": {
+        "modal_generate": {
+            "css": "kat-button#downloadModalGenerateDownloadButton",
+            "xpath": "//kat-button[@id='downloadModalGenerateDownloadButton']"
+        },
+        "apply_button": {
+            "css": "kat-button[data-test-id='RequiredFilterApplyButton']",
+            "xpath": "//kat-button[@data-test-id='RequiredFilterApplyButton']"
+        },
+        "generate_button": {"css": "kat-button#GenerateDownloadButton", "xpath": "//kat-button[@id='GenerateDownloadButton']"},
+        "asin_tab": {
+            "css": "kat-tab[tab-id='query-performance-asin-view']",
+            "xpath": "//kat-tab[@tab-id='query-performance-asin-view']"
+        },
+        "asin_input": {"css": "kat-input[placeholder='Search for 1 ASIN']", "xpath": "//kat-input[@placeholder='Search for 1 ASIN']"},
+        # a miss is the expected outcome once the reports are ready, so no fallback is tried
+        "in_progress": {"css": "kat-badge[label='In Progress']", "timeout": 10000},
+        "file_download": {"css": "kat-icon[name='file_download']", "xpath": "//kat-icon[@name='file_download']"}
+    }
+}
+
+
+class Locators:
+    def __init__(self, registry: dict, default_timeout: int = 15000):
+        self.registry: dict = registry
+        self.default_timeout: int = default_timeout
+        self.compiled: dict = dict()
+        self.stats: dict = dict()
+
+    @staticmethod
+    def _strategies(entry: dict) -> list:
+        strategies: list = list()
+        if entry.get("role"):
+            role, name = entry["role"]
+            strategies.append(("role", f"role={role}[name=\"{name}\" s]"))
+        if entry.get("css"):
+            strategies.append(("css", f"css={entry['css']}" if ">>>" not in entry["css"] else entry["css"]))
+        if entry.get("xpath"):
+            strategies.append(("xpath", f"xpath={entry['xpath']}"))
+        return strategies
+
+    def get(self, name: str) -> dict:
+        if name in self.compiled:
+            return self.compiled[name]
+
+        page_name, _, locator_name = name.partition(".")
+        entry: t.Optional[dict] = self.registry.get(page_name, {}).get(locator_name)
+        if not entry:
+            raise KeyError(f"locator is not registered :: {name}")
+
+        self.compiled[name] = {
+            "strategies": self._strategies(entry),
+            "timeout": entry.get("timeout", self.default_timeout)
+        }
+        return self.compiled[name]
+
+    def selector(self, name: str) -> str:
+        return self.get(name)["strategies"][0][1]
+
+    def record(self, name: str, strategy: t.Optional[str], elapsed: float) -> None:
+        stats: dict = self.stats.setdefault(name, {"hits": 0, "fallbacks": 0, "misses": 0, "seconds": 0.0})
+        if strategy is None:
+            stats["misses"] += 1
+        elif strategy == self.get(name)["strategies"][0][0]:
+            stats["hits"] += 1
+        else:
+            stats["fallbacks"] += 1
+            logger.warning(f"locator resolved by fallback :: {name} :: {strategy}")
+
+        stats["seconds"] += elapsed
+
+    async def locate(
+            self,
+            page: Page,
+            name: str,
+            timeout: t.Optional[int] = None,
+            state: str = "visible"
+    ) -> t.Optional[ElementHandle]:
+        compiled: dict = self.get(name)
+        budget: int = timeout if timeout is not None else compiled["timeout"]
+
+        with spans.span(step=f"locator.{name}"):
+            start: float = time.perf_counter()
+            for index, (strategy, selector) in enumerate(compiled["strategies"]):
+                try:
+                    element: ElementHandle = await page.wait_for_selector(
+                        selector=selector, timeout=budget if index == 0 else FALLBACK_TIMEOUT, state=state
+                    )
+                except TimeoutError:
+                    continue
+
+                self.record(name=name, strategy=strategy, elapsed=time.perf_counter() - start)
+                return element
+
+            self.record(name=name, strategy=None, elapsed=time.perf_counter() - start)
+            raise TimeoutError(f"locator not found :: {name}")
+
+    def summary(self) -> list:
+        return sorted(
+            ({"name": name, **stats} for name, stats in self.stats.items()),
+            key=lambda item: item["seconds"],
+            reverse=True
+        )
+
+    def log_summary(self) -> None:
+        for item in self.summary():
+            logger.info(
+                f"locator stats :: {item['name']} :: hits {item['hits']} :: fallbacks {item['fallbacks']} :: "
+                f"misses {item['misses']} :: {item['seconds']:.1f}s"
+            )
+
+        self.stats.clear()
+
+
+locators: Locators = Locators(registry=LOCATORS)
@@ -5,11 +5,12 @@ from uuid import uuid4
 from pathlib import Path
 from datetime import datetime
 
-from playwright.async_api import Playwright, ElementHandle, Download, TimeoutError
+from playwright.async_api import Playwright, ElementHandle, TimeoutError
 
 try:
     from loggers.logger import logger
     from utils.decorators import utils
+    from utils.spans import spans
     from settings.config import config
     from utils.exceptions import BrowserExceptions
     from base.playwright_async import PlaywrightAsync
@@ -32,92 +33,33 @@ class Payments(PlaywrightAsync):
         self.task: t.Optional[dict] = None
 
     @utils.async_exception
+    @spans.traced("download_report")
     async def download_report(self, report_name: str) -> bool:
-        report_rowgroup: ElementHandle = await self.wait_for_selector(
-            selector="//kat-table-body[@role='rowgroup']"
-        )
-        if not report_rowgroup:
-            logger.error("not found report rowgroup")
-            return False
-
-        report_row: ElementHandle = await report_rowgroup.wait_for_selector(
-            selector="kat-table-row[role='row']:first-child"
-        )
-        if not report_row:
-            logger.error("not found report row")
-            return False
-
-        download_button: t.Optional[ElementHandle] = None
-
-        for _ in range(180):
-            tasks: list = [
-                asyncio.create_task(report_row.text_content()),
-                asyncio.create_task(
-                    report_row.wait_for_selector(selector="kat-button[label='Download CSV']", timeout=10000)
-                ),
-                asyncio.create_task(
-                    report_row.wait_for_selector(selector="//kat-button[@label='Refresh']", timeout=10000)
-                ),
-                asyncio.create_task(
-                    report_row.wait_for_selector(selector="//kat-button[@label='Request Again']", timeout=10000)
-                )
-            ]
-
-            text_content, download_button, refresh_button, request_button = \
-                await asyncio.gather(*tasks, return_exceptions=True)
-
-            if "No Data Available" in text_content:
-                download_button = None
-                logger.warning("No Data Available")
-            elif "Canceled" in text_content:
-                download_button = None
-                logger.warning("Canceled")
-            elif "Failed" in text_content:
-                download_button = None
-                logger.warning("Failed")
-
-            if isinstance(download_button, ElementHandle):
-                logger.info("report was generated")
-                break
-
-            if isinstance(refresh_button, ElementHandle):
-                logger.warning("trying to refresh")
-                await refresh_button.click()
-
-            if isinstance(request_button, ElementHandle):
-                logger.warning("trying to request again")
-                await request_button.click()
-
-            logger.warning("report is not ready")
-            await asyncio.sleep(50)
-
-        if not download_button:
-            logger.error("not found report row")
-            return False
-
-        try:
-            async with self.page.expect_download() as download_info:
-                await download_button.click()
-
-            download: Download = await download_info.value
-            # report_path: str = os.path.join(config.reports_path, category, download.suggested_filename)
-            report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-            await download.save_as(path=report_path)
-            await asyncio.sleep(10)
-        except Exception as e:
-            logger.error(e)
+        async for name, is_downloaded in self.collect_reports():
+            if name == report_name and not is_downloaded:
+                logger.error("not found report row")
+                return False
 
         return True
 
     @utils.async_exception
-    async def get_report(self, period: t.Optional[str] = None, report_name: t.Optional[str] = None) -> bool:
+    async def get_report(
+            self,
+            period: t.Optional[str] = None,
+            report_name: t.Optional[str] = None,
+            wait: bool = True
+    ) -> bool:
+        report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
+        if await self.direct_report(
+            service_name=self.service_name, category=self.category, report_path=report_path, period=period
+        ):
+            return True
+
         await asyncio.sleep(5)
         await self.set_date(period=period, service_name=self.service_name)
         await asyncio.sleep(5)
 
-        request_report_button: ElementHandle = await self.wait_for_selector(
-            selector="//kat-button[@label='Request Report']"
-        )
+        request_report_button: ElementHandle = await self.locate(name="payments.request_report")
         if not request_report_button:
             logger.error("not found request report button")
             return False
@@ -125,6 +67,16 @@ class Payments(PlaywrightAsync):
         await request_report_button.click()
         await asyncio.sleep(5)
 
+        self.poller.add(
+            name=report_name,
+            rows_selector="kat-table-body[role='rowgroup'] kat-table-row[role='row']",
+            ready_selector="kat-button[label='Download CSV']",
+            retry_selectors=["kat-button[label='Refresh']", "kat-button[label='Request Again']"]
+        )
+
+        if not wait:
+            return True
+
         if not await self.download_report(report_name=report_name):
             return False
 
@@ -138,30 +90,44 @@ class Payments(PlaywrightAsync):
         if today <= 3:
             periods.append("previous_month")
 
+        report_names: list = list()
+
+        # every period is requested up front so their generation overlaps, then collected together
         for period in periods:
             month, year = await self.get_date(period=period)
 
             report_name: str = f"{self.category}_{month}_{year}"
 
-            if not await self.get_report(period=period, report_name=report_name):
+            if not await self.get_report(period=period, report_name=report_name, wait=False):
                 continue
 
+            report_names.append(report_name)
+
+        async for report_name, is_downloaded in self.collect_reports():
+            if not is_downloaded:
+                logger.error(f"report was not downloaded :: {report_name}")
+                report_names.remove(report_name)
+
+        for report_name in report_names:
             report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-            if not os.path.isfile(report_path):
+            if not self.has_download(report_path):
                 logger.critical(f"report not found :: {report_path}")
                 return False
 
             postgres_db.add_report(
                 file_path=report_path,
+                buffer=self.pop_download(report_path),
                 dataset=self.dataset,
                 table=self.category,
                 skip_rows=7
             )
 
             logger.info(f"report completed :: {self.service_name} :: {report_name}")
+
+        if report_names:
             await asyncio.sleep(30)
 
-            if not await self.is_logged(reload=True):
+            if not await self.probe_session():
                 return False
 
         return True
@@ -193,7 +159,7 @@ class Payments(PlaywrightAsync):
                 is_opened: bool = False
                 for _ in range(3):
                     try:
-                        await self.page.goto(url=self.url, timeout=60000)
+                        await self.goto(url=self.url, timeout=60000)
                         is_opened: bool = True
                         logger.info(f"page is opened :: {self.url}")
                         break
@@ -211,6 +177,9 @@ class Payments(PlaywrightAsync):
                 self.task["status"] = "failed"
                 logger.warning("login failed")
         finally:
+            await self.flush_downloads()
+            await self.stop_tracing(failed=self.task["status"] == "failed")
+
             if self.task["status"] == "started":
                 self.task["status"] = "stopped"
             await db.update_task(task=self.task)
@@ -1,4 +1,8 @@
+import io
 import os
+import copy
+import json
+import time
 import random
 import asyncio
 import calendar
@@ -7,7 +11,10 @@ from uuid import uuid4
 from pathlib import Path
 from datetime import datetime, timedelta
 
-from playwright.async_api import Playwright, Browser, BrowserContext, Page, ElementHandle, TimeoutError, Locator, FrameLocator
+from playwright.async_api import (
+    Playwright, Browser, BrowserContext, Page, ElementHandle, TimeoutError, Locator, FrameLocator, Download,
+    APIResponse
+)
 
 try:
     from loggers.logger import logger
@@ -16,7 +23,14 @@ try:
     from utils.authenticator import generate_otp
     from utils.exceptions import BrowserExceptions
     from utils.captcha_solver import solve_captcha
+    from base.js_registry import js_registry
+    from base.report_poller import ReportPoller
+    from base.route_blocker import RouteBlocker
+    from base.trace_recorder import TraceRecorder
+    from base.tab_pool import TabPool
+    from base.locators import locators
     from database.database import db
+    from utils.spans import spans
 except ImportError as ie:
     exit(f"{ie} :: {Path(__file__).resolve()}")
 
@@ -30,9 +44,19 @@ class PlaywrightAsync:
         self.context: t.Optional[BrowserContext] = None
         self.endpoint_url: str = f"http://127.0.0.1:{self.port}"
         self.base_url: str = "https://sellercentral.amazon.com/"
+        self.downloads: dict = dict()
+        self.archive_tasks: set = set()
+        self.poller: ReportPoller = ReportPoller()
+        self.route_blocker: t.Optional[RouteBlocker] = None
+        self.tracer: t.Optional[TraceRecorder] = None
+        self.session_stats: dict = {"probes": 0, "reloads_avoided": 0, "reloads": 0}
 
     @utils.async_exception
+    @spans.traced("click", check_result=False)
     async def click(self, element: ElementHandle, hover: bool = True, focus: bool = True, offset: bool = True) -> None:
+        if self.tracer:
+            await self.tracer.tick()
+
         if not await element.is_visible():
             logger.warning(f"element is not visible :: {element}")
             return
@@ -138,13 +162,7 @@ class PlaywrightAsync:
         return calendar.month_name[month] if month_name else month, year
 
     @utils.async_exception
-    async def set_date(
-            self,
-            period: str,
-            element: t.Optional[ElementHandle] = None,
-            service_name: t.Optional[str] = None,
-            category: t.Optional[str] = None
-    ) -> str | None:
+    async def get_date_range(self, period: str) -> tuple:
         start_date = end_date = None
 
         month, year = await self.get_date(period="previous_month")
@@ -171,6 +189,18 @@ class PlaywrightAsync:
             days: int = 1 if period.startswith("1") else (3 if period.startswith("3") else None)
             start_date = end_date = (now - timedelta(days=days)).strftime("%m/%d/%Y")
 
+        return start_date, end_date
+
+    @utils.async_exception
+    async def set_date(
+            self,
+            period: str,
+            element: t.Optional[ElementHandle] = None,
+            service_name: t.Optional[str] = None,
+            category: t.Optional[str] = None
+    ) -> str | None:
+        start_date, end_date = await self.get_date_range(period=period)
+
         if service_name or category:
             if service_name == "shipments" or category == "shipment_awd_inbound":
                 await self.run_js("set_date_shipments.js", element=element, start_date=start_date, end_date=end_date)
@@ -195,6 +225,10 @@ class PlaywrightAsync:
 
     @utils.async_exception
     async def save_screenshot(self, selector: str) -> None:
+        if self.tracer:
+            await self.tracer.dump(reason=selector)
+            return
+
         file_name: str = f"{datetime.now().date().isoformat()}_{selector}_{uuid4()}.png"
         file_path: str = os.path.join(config.screenshots_path, file_name)
 
@@ -202,7 +236,11 @@ class PlaywrightAsync:
             await self.page.screenshot(path=file_path, full_page=True)
 
     @utils.async_exception
+    @spans.traced("wait_for_selector")
     async def wait_for_selector(self, selector: str, timeout: int = 15000, save_screen: bool = False) -> ElementHandle:
+        if self.tracer:
+            await self.tracer.tick()
+
         try:
             element: ElementHandle = await self.page.wait_for_selector(selector=selector, timeout=timeout)
             logger.info(f"selector found :: {selector}")
@@ -212,6 +250,184 @@ class PlaywrightAsync:
                 await self.save_screenshot(selector=selector)
             logger.error(f"selector not found :: {selector}")
 
+    @utils.async_exception
+    async def locate(
+            self,
+            name: str,
+            timeout: t.Optional[int] = None,
+            save_screen: bool = False,
+            page: t.Optional[Page] = None
+    ) -> t.Optional[ElementHandle]:
+        if self.tracer:
+            await self.tracer.tick()
+
+        try:
+            element: ElementHandle = await locators.locate(page=page or self.page, name=name, timeout=timeout)
+            logger.info(f"locator found :: {name}")
+            return element
+        except TimeoutError:
+            if save_screen:
+                await self.save_screenshot(selector=name)
+            logger.error(f"locator not found :: {name}")
+
+    async def _archive_download(self, download: Download, report_path: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(report_path), exist_ok=True)
+            await download.save_as(path=report_path)
+            logger.info(f"report archived :: {report_path}")
+        except Exception as e:
+            logger.error(f"report archive error :: {report_path} :: {e}")
+
+    @utils.async_exception
+    async def capture_download(
+            self,
+            trigger: ElementHandle | Locator,
+            report_path: str,
+            page: t.Optional[Page] = None
+    ) -> bool:
+        page: Page = page or self.page
+
+        async with page.expect_download() as download_info:
+            await trigger.click()
+
+        download: Download = await download_info.value
+
+        try:
+            # path() resolves once the browser has finished writing the file
+            temp_path: str = str(await download.path())
+            content: bytes = await asyncio.to_thread(Path(temp_path).read_bytes)
+        except Exception as e:
+            logger.warning(f"download path is not available, saving directly :: {e}")
+            await self._archive_download(download=download, report_path=report_path)
+            content: bytes = await asyncio.to_thread(Path(report_path).read_bytes)
+        else:
+            task: asyncio.Task = asyncio.create_task(self._archive_download(download=download, report_path=report_path))
+            self.archive_tasks.add(task)
+            task.add_done_callback(self.archive_tasks.discard)
+
+        self.downloads[report_path] = io.BytesIO(content)
+        logger.info(f"report downloaded :: {download.suggested_filename} :: {len(content)} bytes")
+        return True
+
+    async def collect_reports(self, file_type: str = "csv") -> t.AsyncIterator[tuple]:
+        async for report_name, download_button in self.poller.poll(page=self.page):
+            if not download_button:
+                yield report_name, False
+                continue
+
+            report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.{file_type}")
+            yield report_name, bool(await self.capture_download(trigger=download_button, report_path=report_path))
+
+    def has_download(self, report_path: str) -> bool:
+        return report_path in self.downloads or os.path.isfile(report_path)
+
+    def pop_download(self, report_path: str) -> t.Optional[io.BytesIO]:
+        return self.downloads.pop(report_path, None)
+
+    async def flush_downloads(self) -> None:
+        if self.archive_tasks:
+            await asyncio.gather(*self.archive_tasks, return_exceptions=True)
+
+        self.downloads.clear()
+
+    async def _api_json(self, method: str, url: str, **kwargs) -> dict:
+        response: APIResponse = await self.context.request.fetch(url, method=method, **kwargs)
+        if not response.ok:
+            raise BrowserExceptions.PageError(f"report api error :: {response.status} :: {url}")
+
+        return await response.json()
+
+    @staticmethod
+    def _format_endpoint(value: t.Any, fields: dict) -> t.Any:
+        if isinstance(value, str):
+            return value.format(**fields)
+        elif isinstance(value, dict):
+            return {k: PlaywrightAsync._format_endpoint(v, fields) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [PlaywrightAsync._format_endpoint(v, fields) for v in value]
+
+        return value
+
+    @utils.async_exception
+    @spans.traced("direct_report")
+    async def direct_report(
+            self,
+            service_name: str,
+            category: str,
+            report_path: str,
+            period: t.Optional[str] = None
+    ) -> bool:
+        # request -> poll -> download over the context's APIRequestContext (shares the session cookies);
+        # endpoints come from settings/report_api.json, keyed by service and category:
+        # {"request": {"method", "url", "data"}, "id_field", "status": {"url", "status_field", "ready", "failed",
+        #  "url_field", "interval", "attempts"}, "download": {"url"}}
+        # placeholders: {start_date}, {end_date}, {report_id}, {document_url}
+        endpoints: dict = (config.REPORT_API or {}).get(service_name, {})
+        endpoint: t.Optional[dict] = endpoints.get(category)
+        if not endpoint:
+            return False
+
+        fields: dict = {"category": category}
+        if period:
+            fields["start_date"], fields["end_date"] = await self.get_date_range(period=period)
+
+        request: dict = self._format_endpoint(endpoint["request"], fields)
+        payload: dict = await self._api_json(
+            method=request.get("method", "POST"),
+            url=request["url"],
+            data=request.get("data"),
+            headers=request.get("headers")
+        )
+
+        report_id: t.Optional[str] = payload.get(endpoint.get("id_field", "reportId"))
+        if not report_id:
+            logger.error(f"report id not found :: {payload}")
+            return False
+
+        logger.info(f"report was requested over http :: {report_id}")
+        fields["report_id"] = report_id
+
+        status: dict = endpoint["status"]
+        document_url: t.Optional[str] = None
+
+        for _ in range(int(status.get("attempts", 180))):
+            status_url: str = self._format_endpoint(status["url"], fields)
+            payload: dict = await self._api_json(method="GET", url=status_url)
+            state: str = payload.get(status.get("status_field", "status"))
+
+            if state in status.get("ready", ["DONE"]):
+                document_url: str = payload.get(status.get("url_field", "documentUrl"), "")
+                break
+            elif state in status.get("failed", ["CANCELLED", "FATAL"]):
+                logger.warning(f"report failed :: {report_id} :: {state}")
+                return False
+
+            logger.warning(f"report is not ready :: {report_id} :: {state}")
+            await asyncio.sleep(int(status.get("interval", 30)))
+
+        if document_url is None:
+            logger.error(f"report was not generated :: {report_id}")
+            return False
+
+        fields["document_url"] = document_url
+        download_url: str = self._format_endpoint(endpoint.get("download", {}).get("url", "{document_url}"), fields)
+
+        response: APIResponse = await self.context.request.get(download_url)
+        if not response.ok:
+            logger.error(f"report download error :: {response.status} :: {download_url}")
+            return False
+
+        content: bytes = await response.body()
+        self.downloads[report_path] = io.BytesIO(content)
+
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        task: asyncio.Task = asyncio.create_task(asyncio.to_thread(Path(report_path).write_bytes, content))
+        self.archive_tasks.add(task)
+        task.add_done_callback(self.archive_tasks.discard)
+
+        logger.info(f"report downloaded over http :: {report_path} :: {len(content)} bytes")
+        return True
+
     async def _try_connect_and_navigate(self, playwright: Playwright, use_existing_context: bool = True) -> bool:
         self.browser: Browser = await playwright.chromium.connect_over_cdp(endpoint_url=self.endpoint_url)
 
@@ -219,12 +435,14 @@ class PlaywrightAsync:
             self.context: BrowserContext = self.browser.contexts[0]
             self.page: Page = self.context.pages[0]
         else:
-            self.context: BrowserContext = await self.browser.new_context()
+            storage_state: t.Optional[str] = self.state_file if self.is_state_valid() else None
+            self.context: BrowserContext = await self.browser.new_context(storage_state=storage_state)
             self.page: Page = await self.context.new_page()
 
-        await self.page.goto(url=self.base_url, timeout=60000)
+        await self.goto(url=self.base_url, timeout=60000)
 
     @utils.async_exception
+    @spans.traced("connect")
     async def connect_cdp_session(self, playwright: Playwright) -> bool:
         try:
             await self._try_connect_and_navigate(playwright, use_existing_context=True)
@@ -241,9 +459,77 @@ class PlaywrightAsync:
                 return False
 
         logger.info(f"connection established to existed browser session :: {self.endpoint_url}")
+
+        if self.is_enabled(config.ROUTE_BLOCKING) or self.is_enabled(config.ROUTE_MEASURE):
+            await self.block_routes()
+
+        if self.is_enabled(config.TRACING):
+            await self.start_tracing()
+
         return True
 
     @utils.async_exception
+    async def start_tracing(self) -> None:
+        trace_path: str = config.traces_path or os.path.join(os.path.dirname(config.screenshots_path), "traces")
+        self.tracer: TraceRecorder = TraceRecorder(
+            context=self.context,
+            trace_path=trace_path,
+            chunk_actions=int(config.TRACING_ACTIONS or 50),
+            budget_mb=int(config.TRACING_BUDGET_MB or 200)
+        )
+        await self.tracer.start()
+
+    @utils.async_exception
+    async def stop_tracing(self, failed: bool = False) -> None:
+        locators.log_summary()
+
+        if not self.tracer:
+            return
+
+        if failed:
+            await self.tracer.dump(reason=f"{getattr(self, 'service_name', 'task')}_failed")
+
+        await self.tracer.stop()
+        self.tracer = None
+
+    def fork(self, page: Page, **state) -> "PlaywrightAsync":
+        # a worker on another tab of the same context; downloads, tracing and the task are shared,
+        # the page, the poller and the per-unit state are its own
+        worker: PlaywrightAsync = copy.copy(self)
+        worker.page = page
+        worker.poller = ReportPoller()
+        for key, value in state.items():
+            setattr(worker, key, value)
+
+        return worker
+
+    async def run_in_tabs(self, units: dict, width: t.Optional[int] = None) -> dict:
+        width: int = min(width or int(config.TAB_POOL_WIDTH or 3), len(units))
+        if width <= 1:
+            return {name: await unit(self.page) for name, unit in units.items()}
+
+        pool: TabPool = TabPool(
+            context=self.context,
+            width=width,
+            pace=(int(config.TAB_POOL_PACE_MIN or 5), int(config.TAB_POOL_PACE_MAX or 15))
+        )
+        try:
+            return await pool.run(units=units)
+        finally:
+            await pool.close()
+
+    @utils.async_exception
+    async def block_routes(self) -> None:
+        service_name: t.Optional[str] = getattr(self, "service_name", None)
+        self.route_blocker: RouteBlocker = RouteBlocker(service_name=service_name)
+        await self.route_blocker.install(context=self.context)
+
+        if self.is_enabled(config.ROUTE_MEASURE):
+            await self.route_blocker.measure(page=self.page, url=getattr(self, "url", None) or self.base_url)
+            self.route_blocker.enabled = self.is_enabled(config.ROUTE_BLOCKING)
+
+    @utils.async_exception
+    @spans.traced("run_js", check_result=False)
     async def run_js(
             self,
             js_file: str,
@@ -252,36 +538,177 @@ class PlaywrightAsync:
             start_date: t.Optional[str] = None,
             end_date: t.Optional[str] = None
     ) -> t.Any:
-        js_file_path: str = os.path.join(config.js_path, js_file)
-        js_code: str = Path(js_file_path).read_text(encoding="utf-8")
+        if self.tracer:
+            await self.tracer.tick()
 
         if element and start_date and end_date:
-            return await element.evaluate(js_code, arg={"startDate": start_date, "endDate": end_date})
+            return await js_registry.call(
+                page=self.page,
+                js_file=js_file,
+                arg={"startDate": start_date, "endDate": end_date},
+                element=element
+            )
 
-        return await self.page.evaluate(js_code, args[0] if args else None)
+        return await js_registry.call(page=self.page, js_file=js_file, arg=args[0] if args else None)
+
+    @spans.traced("goto", check_result=False)
+    async def goto(self, url: str, timeout: int = 60000, page: t.Optional[Page] = None) -> None:
+        await (page or self.page).goto(url=url, timeout=timeout)
 
     @utils.async_exception
+    @spans.traced("is_logged")
     async def is_logged(self, reload: bool = False) -> bool:
         if reload:
             await self.page.reload(timeout=60000, wait_until="load")
         else:
-            await self.page.goto(url=config.URL["base_url"], timeout=60000)
+            await self.goto(url=config.URL["base_url"], timeout=60000)
 
         await asyncio.sleep(5)
 
-        if await self.wait_for_selector(selector="//div[@aria-label='Settings']", save_screen=False):
+        if await self.locate(name="home.settings"):
             logger.info("already logged in")
             return True
 
         logger.warning("not logged in")
         return False
 
+    @property
+    def state_file(self) -> str:
+        state_path: str = config.state_path or os.path.join(os.path.dirname(config.reports_path), "state")
+        return os.path.join(state_path, f"{self.user_id}.json")
+
+    def is_state_valid(self, margin: int = 3600) -> bool:
+        if not os.path.isfile(self.state_file):
+            return False
+
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as file:
+                state: dict = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"storage state is not readable :: {self.state_file} :: {e}")
+            return False
+
+        if not self.has_session_cookies(cookies=state.get("cookies", []), margin=margin):
+            logger.warning(f"storage state has no valid session cookies :: {self.state_file}")
+            return False
+
+        return True
+
+    @staticmethod
+    def is_enabled(flag: t.Any) -> bool:
+        # switches come as booleans from settings/*.json and as strings from .env, where "0" is still truthy
+        return str(flag).strip().lower() in ("1", "true", "yes", "on")
+
+    @staticmethod
+    def has_session_cookies(cookies: list, margin: int = 0) -> bool:
+        # seller central keeps the signed-in session in the at-main / sess-at-main / x-main cookies
+        amazon_cookies: dict = {
+            cookie["name"]: cookie for cookie in cookies
+            if cookie.get("domain", "").endswith("amazon.com")
+        }
+        auth_cookies: list = [amazon_cookies.get(name) for name in ("at-main", "sess-at-main", "x-main")]
+        if not all(auth_cookies):
+            return False
+
+        deadline: float = time.time() + margin
+        for cookie in auth_cookies:
+            expires: float = cookie.get("expires", -1)
+            if 0 < expires < deadline:
+                logger.warning(f"session cookie is expired :: {cookie['name']}")
+                return False
+
+        return True
+
+    @utils.async_exception
+    @spans.traced("probe_session")
+    async def probe_session(self) -> bool:
+        # cheap check on the page that is already open: session cookies in the context, no redirect to the
+        # sign-in page and the header marker still rendered. a full reload is the fallback when any of them fail
+        self.session_stats["probes"] += 1
+
+        is_alive: bool = (
+            self.has_session_cookies(cookies=await self.context.cookies())
+            and "/ap/signin" not in self.page.url
+            and await self.page.locator(locators.selector("home.settings")).count() > 0
+        )
+
+        if is_alive:
+            self.session_stats["reloads_avoided"] += 1
+        else:
+            logger.warning(f"session probe failed, reloading :: {self.page.url}")
+            self.session_stats["reloads"] += 1
+            is_alive: bool = bool(await self.is_logged(reload=True))
+
+        logger.info(
+            f"session probe :: {'alive' if is_alive else 'lost'} :: "
+            f"reloads avoided {self.session_stats['reloads_avoided']}/{self.session_stats['probes']}"
+        )
+        return is_alive
+
+    @utils.async_exception
+    async def save_state(self) -> None:
+        state: dict = await self.context.storage_state()
+
+        # the snapshot holds the session cookies, the file is readable by its owner only
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        descriptor: int = os.open(f"{self.state_file}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(f"{self.state_file}.tmp", self.state_file)
+
+        logger.info(f"storage state saved :: {self.state_file}")
+
+    @utils.async_exception
+    async def restore_state(self) -> bool:
+        if not self.is_state_valid():
+            return False
+
+        with open(self.state_file, "r", encoding="utf-8") as file:
+            state: dict = json.load(file)
+
+        await self.context.add_cookies(state.get("cookies", []))
+        await self.goto(url=self.base_url, timeout=60000)
+
+        # local storage is written once into the origin the page landed on, the other origins of the snapshot are
+        # left alone; the app reads it from the next navigation on
+        current_origin: str = await self.page.evaluate("window.location.origin")
+        for origin in state.get("origins", []):
+            if origin.get("origin") == current_origin and origin.get("localStorage"):
+                await self.page.evaluate(
+                    "items => { for (const {name, value} of items) window.localStorage.setItem(name, value); }",
+                    origin["localStorage"]
+                )
+
+        logger.info(f"storage state restored :: {self.state_file}")
+
+        # the page is already open, the signed-in marker is waited for instead of a second navigation
+        is_logged: bool = (
+            self.has_session_cookies(cookies=await self.context.cookies())
+            and "/ap/signin" not in self.page.url
+            and bool(await self.locate(name="home.settings", timeout=15000))
+        )
+        if is_logged:
+            logger.info("already logged in")
+            return True
+
+        logger.warning(f"storage state was rejected, removing it :: {self.state_file}")
+        try:
+            os.remove(self.state_file)
+        except FileNotFoundError:
+            pass
+
+        return False
+
     @utils.async_exception
+    @spans.traced("login")
     async def login(self) -> bool:
+        if await self.restore_state():
+            return True
+
         is_opened: bool = False
         for _ in range(3):
             try:
-                await self.page.goto(url=self.base_url, timeout=60000)
+                await self.goto(url=self.base_url, timeout=60000)
                 is_opened: bool = True
                 logger.info(f"page is opened :: {self.base_url}")
                 break
@@ -375,12 +802,12 @@ class PlaywrightAsync:
             logger.error("not found email")
             raise ValueError
 
-        login_button: ElementHandle = await self.wait_for_selector(selector="//strong[text()='Log in']")
+        login_button: ElementHandle = await self.locate(name="login.login_button")
         if login_button:
             await login_button.click()
             await asyncio.sleep(3)
 
-            email_input: ElementHandle = await self.wait_for_selector(selector="//input[@type='email']")
+            email_input: ElementHandle = await self.locate(name="login.email_input")
             if not email_input:
                 logger.error("not found email input")
                 return
@@ -388,7 +815,7 @@ class PlaywrightAsync:
             await email_input.fill(email)
             await asyncio.sleep(5)
 
-            submit_button: ElementHandle = await self.wait_for_selector(selector="//input[@type='submit']")
+            submit_button: ElementHandle = await self.locate(name="login.submit_button")
             if not submit_button:
                 logger.error("not found submit button")
                 return
@@ -443,7 +870,7 @@ class PlaywrightAsync:
             logger.error("not found password")
             raise ValueError
 
-        password_input: ElementHandle = await self.wait_for_selector(selector="//input[@type='password']")
+        password_input: ElementHandle = await self.locate(name="login.password_input")
         if not password_input:
             logger.error("not found password input")
             return
@@ -451,7 +878,7 @@ class PlaywrightAsync:
         await password_input.fill(password)
         await asyncio.sleep(5)
 
-        submit_button: ElementHandle = await self.wait_for_selector(selector="//input[@type='submit']")
+        submit_button: ElementHandle = await self.locate(name="login.submit_button")
         if not submit_button:
             logger.error("not found submit button")
             return
@@ -489,12 +916,12 @@ class PlaywrightAsync:
         #     await submit_button.click()
         #     await asyncio.sleep(5)
 
-        submit_button: ElementHandle = await self.wait_for_selector(selector="//a[@id='auth-get-new-otp-link']")
+        submit_button: ElementHandle = await self.locate(name="login.new_otp_link")
         if submit_button:
             await submit_button.click()
             await asyncio.sleep(15)
 
-        radio_button: ElementHandle = await self.wait_for_selector(selector="(//input[@name='otpDeviceContext'])[1]")
+        radio_button: ElementHandle = await self.locate(name="login.otp_device")
         if not radio_button:
             logger.error("not found radio button")
             return
@@ -503,7 +930,7 @@ class PlaywrightAsync:
         await asyncio.sleep(15)
 
         for _ in range(10):
-            submit_button: ElementHandle = await self.wait_for_selector(selector="//input[@id='auth-send-code']")
+            submit_button: ElementHandle = await self.locate(name="login.send_code")
             if not submit_button:
                 logger.error("not found submit button")
                 return
@@ -511,7 +938,7 @@ class PlaywrightAsync:
             await submit_button.click()
             await asyncio.sleep(10)
 
-            tel_input: ElementHandle = await self.wait_for_selector(selector="//input[@type='tel']")
+            tel_input: ElementHandle = await self.locate(name="login.tel_input")
             if tel_input:
                 break
 
@@ -521,7 +948,7 @@ class PlaywrightAsync:
         await tel_input.fill(otp_code)
         await asyncio.sleep(2)
 
-        submit_button: ElementHandle = await self.wait_for_selector(selector="//input[@type='submit']")
+        submit_button: ElementHandle = await self.locate(name="login.submit_button")
         if not submit_button:
             logger.error("not found submit button")
             return
@@ -532,16 +959,12 @@ class PlaywrightAsync:
         await self.run_js("close_popover.js")
         await asyncio.sleep(5)
 
-        region_button: ElementHandle = await self.wait_for_selector(
-            selector="//span[contains(text(), 'United States')]"
-        )
+        region_button: ElementHandle = await self.locate(name="login.region_button")
         if region_button:
             await region_button.click()
             await asyncio.sleep(3)
 
-            region_submit: ElementHandle = await self.wait_for_selector(
-                selector="//button[contains(text(), 'Select account')]"
-            )
+            region_submit: ElementHandle = await self.locate(name="login.region_submit")
             if region_submit:
                 await region_submit.click()
                 await asyncio.sleep(5)
@@ -550,4 +973,5 @@ class PlaywrightAsync:
         if is_logged is None:
             raise BrowserExceptions.PageError()
         elif is_logged:
+            await self.save_state()
             return True
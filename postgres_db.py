@@ -16,6 +16,7 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 try:
     from loggers.logger import logger
     from utils.decorators import utils
+    from utils.spans import spans
     from settings.config import config
 except ImportError as ie:
     exit(f"{ie} :: {Path(__file__).resolve()}")
@@ -68,6 +69,17 @@ class PostgresDB:
         schema_dict = {col['name']: col['type'] for col in columns}
         return schema_dict
 
+    def _add_marketplace_column(self, schema: str, table: str, default: str = "US") -> None:
+        if "marketplace" in self._get_table_schema(schema, table):
+            return
+
+        # tables created before the marketplace fan-out only hold rows of the default marketplace
+        with self.engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE {schema}."{table}" ADD COLUMN marketplace VARCHAR DEFAULT \'{default}\''))
+            conn.execute(text(f'ALTER TABLE {schema}."{table}" ALTER COLUMN marketplace DROP DEFAULT'))
+
+        logger.info(f"Added marketplace column to {schema}.{table}")
+
     def _adjust_dataframe_to_schema(self, df, schema, table):
         schema_dict = self._get_table_schema(schema, table)
         df_adjusted = df.copy()
@@ -220,19 +232,25 @@ class PostgresDB:
         return df
 
     @staticmethod
-    def read_file(file_path: str, skip_rows: int = 0) -> pd.DataFrame:
+    def read_file(file_path: str, skip_rows: int = 0, buffer: t.Optional[t.BinaryIO] = None) -> pd.DataFrame:
+        source = buffer if buffer is not None else file_path
+
         if file_path.endswith(".csv"):
             try:
-                return pd.read_csv(file_path, skiprows=skip_rows)
+                return pd.read_csv(source, skiprows=skip_rows)
             except UnicodeDecodeError:
                 logger.warning(f"UTF-8 decode failed for {file_path}, trying cp1252...")
                 try:
-                    return pd.read_csv(file_path, skiprows=skip_rows, encoding="cp1252")
+                    if buffer is not None:
+                        buffer.seek(0)
+                    return pd.read_csv(source, skiprows=skip_rows, encoding="cp1252")
                 except UnicodeDecodeError:
                     logger.warning(f"cp1252 decode failed for {file_path}, falling back to latin1...")
-                    return pd.read_csv(file_path, skiprows=skip_rows, encoding="latin1")
+                    if buffer is not None:
+                        buffer.seek(0)
+                    return pd.read_csv(source, skiprows=skip_rows, encoding="latin1")
         elif file_path.endswith(".xlsx"):
-            return pd.read_excel(file_path, skiprows=skip_rows)
+            return pd.read_excel(source, skiprows=skip_rows)
 
     @staticmethod
     def camel_to_snake(name: str) -> str:
@@ -287,6 +305,7 @@ class PostgresDB:
         return df
 
     @utils.exception
+    @spans.traced("sink.update_data")
     def update_data(
             self,
             df: pd.DataFrame,
@@ -302,6 +321,9 @@ class PostgresDB:
         # self._create_schema(schema)
         self._create_table(df, schema, table)
 
+        if "marketplace" in df.columns:
+            self._add_marketplace_column(schema, table)
+
         schema_dict = self._get_table_schema(schema, table)
         dtype_mapping = {
             col: self._map_dtype_to_sqlalchemy(str(col_type))
@@ -360,14 +382,21 @@ class PostgresDB:
 
             all_cols = ', '.join(f'"{col}"' for col in df.columns)
 
-            if table in ["fba_inventory", "manage_fba_inventory"] or table.endswith("_campaign"):
+            if table in ["fba_inventory", "manage_fba_inventory", "orders", "order_items"] or table.endswith("_campaign"):
                 unique_cols = {
                     "fba_inventory": ["snapshot_date", "sku"],
                     "manage_fba_inventory": ["date", "sku"],
+                    "orders": ["amazon_order_id"],
+                    "order_items": ["amazon_order_id", "order_item_id"],
                     "_campaign": ["campaign_id", "start_date", "end_date"]
                 }
 
                 table_unique_cols = unique_cols["_campaign"] if table.endswith("_campaign") else unique_cols[table]
+                if table.endswith("_campaign") and "date" in df.columns:
+                    # DAILY campaign reports hold one row per campaign and day under "date"
+                    table_unique_cols = ["campaign_id", "date"]
+                if "marketplace" in df.columns:
+                    table_unique_cols = table_unique_cols + ["marketplace"]
 
                 conditions = []
                 for col in table_unique_cols:
@@ -424,6 +453,7 @@ class PostgresDB:
             logger.info(f"Inserted rows into {schema}.{table}")
             return True
 
+    @spans.traced("sink.add_report")
     def add_report(
             self,
             file_path: str,
@@ -435,10 +465,35 @@ class PostgresDB:
             custom_date: t.Optional[str] = None,
             period: t.Optional[str] = None,
             asin: t.Optional[str] = None,
-            write_disposition: str = "WRITE_APPEND"
+            write_disposition: str = "WRITE_APPEND",
+            buffer: t.Optional[t.BinaryIO] = None
     ) -> bool:
-        df: pd.DataFrame = self.read_file(file_path=file_path, skip_rows=skip_rows)
+        df: pd.DataFrame = self.read_file(file_path=file_path, skip_rows=skip_rows, buffer=buffer)
+
+        return self.add_dataframe(
+            df=df,
+            dataset=dataset,
+            table=table,
+            add_date=add_date,
+            is_camel=is_camel,
+            custom_date=custom_date,
+            period=period,
+            asin=asin,
+            write_disposition=write_disposition
+        )
 
+    def add_dataframe(
+            self,
+            df: pd.DataFrame,
+            dataset: str,
+            table: str,
+            add_date: bool = False,
+            is_camel: bool = False,
+            custom_date: t.Optional[str] = None,
+            period: t.Optional[str] = None,
+            asin: t.Optional[str] = None,
+            write_disposition: str = "WRITE_APPEND"
+    ) -> bool:
         if len(df) == 0:
             logger.warning("dataframe is empty")
             return False
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import fcntl
+import random
+import asyncio
+import typing as t
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    from loggers.logger import logger
+    from settings.config import config
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+# documented default rate (requests per second) and burst per operation, the rate is replaced
+# by x-amzn-RateLimit-Limit as soon as a response carries it
+DEFAULT_LIMITS: dict = {
+    "sp.createReport": (0.0167, 15),
+    "sp.getReport": (2.0, 15),
+    "sp.getReports": (0.0222, 10),
+    "sp.getReportDocument": (0.0167, 15),
+    "sp.getOrders": (0.0167, 20),
+    "sp.getOrderItems": (0.5, 30),
+    "ad.createReport": (0.1, 5),
+    "ad.getReport": (1.0, 10)
+}
+
+
+class RateLimiter:
+    def __init__(self, limits: dict, max_backoff: int = 1800):
+        self.limits: dict = limits
+        self.max_backoff: int = max_backoff
+
+    @property
+    def state_file(self) -> str:
+        state_path: str = config.state_path or os.path.join(os.path.dirname(config.reports_path), "state")
+        return os.path.join(state_path, "rate_limits.json")
+
+    @contextmanager
+    def _state(self) -> t.Iterator[dict]:
+        # every process reads and writes the buckets under one exclusive lock, so a reservation made
+        # by one job is visible to every other job before it decides how long to wait
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(f"{self.state_file}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_file, "r", encoding="utf-8") as file:
+                        state: dict = json.load(file)
+                except (OSError, ValueError):
+                    state: dict = dict()
+
+                yield state
+
+                with open(f"{self.state_file}.tmp", "w", encoding="utf-8") as file:
+                    json.dump(state, file)
+                os.replace(f"{self.state_file}.tmp", self.state_file)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _bucket(self, state: dict, operation: str, now: float) -> dict:
+        # "sp.createReport:us-east-1" keeps its own bucket per region but starts from the operation defaults
+        rate, burst = self.limits.get(operation.split(":")[0], (1.0, 1))
+        bucket: dict = state.setdefault(operation, {
+            "rate": rate, "burst": burst, "tokens": float(burst), "updated_at": now, "blocked_until": 0.0
+        })
+
+        bucket["tokens"] = min(bucket["burst"], bucket["tokens"] + (now - bucket["updated_at"]) * bucket["rate"])
+        bucket["updated_at"] = now
+        return bucket
+
+    def reserve(self, operation: str) -> float:
+        now: float = time.time()
+        with self._state() as state:
+            bucket: dict = self._bucket(state=state, operation=operation, now=now)
+
+            # tokens may go negative, that is the queue of callers that already hold a reservation
+            bucket["tokens"] -= 1
+            wait: float = -bucket["tokens"] / bucket["rate"] if bucket["tokens"] < 0 else 0.0
+            wait: float = max(wait, bucket["blocked_until"] - now)
+
+        if wait > 0:
+            logger.info(f"rate limit :: {operation} :: waiting {wait:.1f}s")
+        return wait
+
+    def acquire(self, operation: str) -> None:
+        wait: float = self.reserve(operation=operation)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def async_acquire(self, operation: str) -> None:
+        wait: float = await asyncio.to_thread(self.reserve, operation)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def learn(self, operation: str, headers: t.Optional[dict]) -> None:
+        value: t.Optional[str] = (headers or {}).get("x-amzn-RateLimit-Limit")
+        if not value:
+            return
+
+        try:
+            rate: float = float(value)
+        except ValueError:
+            return
+
+        with self._state() as state:
+            bucket: dict = self._bucket(state=state, operation=operation, now=time.time())
+            if rate > 0 and abs(bucket["rate"] - rate) > 1e-6:
+                logger.info(f"rate limit learned :: {operation} :: {bucket['rate']} -> {rate} rps")
+                bucket["rate"] = rate
+
+    def backoff(self, attempt: int, base: float = 5.0) -> float:
+        return min(self.max_backoff, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def throttled(self, operation: str, attempt: int) -> float:
+        now: float = time.time()
+        with self._state() as state:
+            bucket: dict = self._bucket(state=state, operation=operation, now=now)
+
+            # the service saw an empty bucket, wait at least one full token and block everyone else too
+            delay: float = max(self.backoff(attempt=attempt), 1 / bucket["rate"])
+            bucket["tokens"] = min(bucket["tokens"], 0.0)
+            bucket["blocked_until"] = max(bucket["blocked_until"], now + delay)
+
+        logger.warning(f"throttled :: {operation} :: attempt {attempt + 1} :: backoff {delay:.1f}s")
+        return delay
+
+    def call(
+            self,
+            operation: str,
+            func: t.Callable,
+            *args,
+            throttled: tuple = (),
+            attempts: int = 6,
+            **kwargs
+    ) -> t.Any:
+        for attempt in range(attempts):
+            self.acquire(operation=operation)
+            try:
+                response: t.Any = func(*args, **kwargs)
+            except throttled:
+                time.sleep(self.throttled(operation=operation, attempt=attempt))
+                continue
+
+            self.learn(operation=operation, headers=getattr(response, "headers", None))
+            return response
+
+        raise RuntimeError(f"rate limit attempts exhausted :: {operation}")
+
+    async def async_call(
+            self,
+            operation: str,
+            func: t.Callable,
+            *args,
+            throttled: tuple = (),
+            attempts: int = 6,
+            **kwargs
+    ) -> t.Any:
+        # waits on the event loop instead of in a worker thread, only the request itself runs in one
+        for attempt in range(attempts):
+            await self.async_acquire(operation=operation)
+            try:
+                response: t.Any = await asyncio.to_thread(func, *args, **kwargs)
+            except throttled:
+                await asyncio.sleep(await asyncio.to_thread(self.throttled, operation, attempt))
+                continue
+
+            await asyncio.to_thread(self.learn, operation, getattr(response, "headers", None))
+            return response
+
+        raise RuntimeError(f"rate limit attempts exhausted :: {operation}")
+
+
+rate_limiter: RateLimiter = RateLimiter(limits=DEFAULT_LIMITS)
@@ -0,0 +1,661 @@
+import io
+import os
+import sys
+import json
+import time
+import random
+import calendar
+from uuid import uuid4
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import pandas as pd
+import uvicorn
+from fastapi import FastAPI, Request, HTTPException, status
+from fastapi.responses import HTMLResponse, Response, JSONResponse
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+try:
+    from loggers.logger import logger
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+# offline stand-in for the seller central pages the browser services walk through:
+# every page only carries the kat-* widgets, attributes and texts the services select on,
+# reports go through the same "In Progress" -> "Done" state machine and are served as attachments
+REPORT_SECONDS: float = float(os.getenv("REPLICA_REPORT_SECONDS", 20))
+FAILURE_RATE: float = float(os.getenv("REPLICA_FAILURE_RATE", 0))
+ROWS: int = int(os.getenv("REPLICA_ROWS", 200))
+PAGES: int = int(os.getenv("REPLICA_PAGES", 3))
+BRANDS: list = ["Replica Brand A", "Replica Brand B"]
+
+app: FastAPI = FastAPI(
+    docs_url=None,
+    redoc_url=None
+)
+reports: dict = dict()
+
+
+KAT_ELEMENTS: str = """
+const define = (name, cls) => customElements.get(name) || customElements.define(name, cls);
+const escape = (value) => String(value ?? '').replace(/"/g, '&quot;');
+
+window.replicaDownload = (url) => {
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = '';
+    document.body.appendChild(link);
+    link.click();
+    link.remove();
+};
+
+class KatPlain extends HTMLElement {}
+
+class KatShadow extends HTMLElement {
+    static get observedAttributes() { return ['label', 'value', 'visible', 'name', 'start-value', 'end-value']; }
+    constructor() { super(); this.attachShadow({mode: 'open'}); }
+    connectedCallback() { this.render(); }
+    attributeChangedCallback() { if (this.isConnected) this.render(); }
+    render() {}
+}
+
+class KatButton extends KatShadow {
+    render() { this.shadowRoot.innerHTML = `<button part="button">${this.getAttribute('label') || ''}<slot></slot></button>`; }
+}
+
+class KatLink extends KatShadow {
+    constructor() {
+        super();
+        this.addEventListener('click', () => {
+            const href = this.getAttribute('href');
+            if (href) window.replicaDownload(href);
+        });
+    }
+    render() { this.shadowRoot.innerHTML = `<a part="link">${this.getAttribute('label') || ''}<slot></slot></a>`; }
+}
+
+class KatLabelled extends KatShadow {
+    render() { this.shadowRoot.innerHTML = `<span part="label">${this.getAttribute('label') || this.getAttribute('name') || ''}<slot></slot></span>`; }
+}
+
+class KatInput extends KatShadow {
+    static get observedAttributes() { return []; }
+    render() {
+        if (this.shadowRoot.querySelector('input')) return;
+        this.shadowRoot.innerHTML = `<input part="input" placeholder="${escape(this.getAttribute('placeholder'))}">`;
+    }
+    get value() { return this.shadowRoot.querySelector('input')?.value ?? ''; }
+    set value(value) { this.render(); this.shadowRoot.querySelector('input').value = value; }
+}
+
+class KatDatePicker extends KatShadow {
+    static get observedAttributes() { return []; }
+    render() { this.shadowRoot.innerHTML = `<kat-input part="date-picker-input" placeholder="MM/DD/YYYY"></kat-input>`; }
+}
+
+class KatDateRangePicker extends KatShadow {
+    static get observedAttributes() { return []; }
+    render() {
+        this.shadowRoot.innerHTML = `
+            <kat-date-picker class="start" autocomplete="off"></kat-date-picker>
+            <kat-date-picker class="end" autocomplete="off"></kat-date-picker>`;
+    }
+}
+
+class KatDropdown extends KatShadow {
+    get options() {
+        try { return JSON.parse(this.getAttribute('options') || '[]'); } catch (e) { return []; }
+    }
+    render() {
+        const value = this.getAttribute('value') || '';
+        const options = this.options.map(option => typeof option === 'object' ? option : {name: option, value: option});
+        const selected = options.find(option => String(option.value) === value);
+        const title = selected ? selected.name : (this.getAttribute('placeholder') || value);
+
+        this.shadowRoot.innerHTML = `
+            <div class="select-header" title="${escape(title)}">
+                <div part="dropdown-header" class="header-row" title="${escape(title)}">${title}</div>
+            </div>
+            <div part="options" style="display: none">
+                ${options.map(option => `<kat-option value="${escape(option.value)}"><span>${option.name}</span></kat-option>`).join('')}
+            </div>`;
+
+        const list = this.shadowRoot.querySelector('div[part="options"]');
+        this.shadowRoot.querySelector('div[part="dropdown-header"]').addEventListener('click', () => {
+            list.style.display = list.style.display === 'none' ? 'block' : 'none';
+        });
+        this.shadowRoot.querySelectorAll('kat-option').forEach(option => option.addEventListener('click', () => {
+            this.setAttribute('value', option.getAttribute('value'));
+            this.dispatchEvent(new Event('change', {bubbles: true}));
+        }));
+    }
+}
+
+class KatDropdownButton extends KatShadow {
+    render() {
+        this.shadowRoot.innerHTML = `
+            <div class="button-group-header"><button part="button">Download</button><button class="indicator">v</button></div>`;
+        this.shadowRoot.querySelector('button.indicator').addEventListener('click', () => {
+            document.querySelectorAll('[data-dropdown-item]').forEach(item => item.style.display = 'block');
+        });
+    }
+}
+
+class KatModal extends KatShadow {
+    render() {
+        this.style.display = this.getAttribute('visible') === 'true' ? 'block' : 'none';
+        this.shadowRoot.innerHTML = `
+            <div class="container"><div class="dialog">
+                <div class="header"><button class="close">x</button></div>
+                <slot></slot>
+            </div></div>`;
+        this.shadowRoot.querySelector('button.close').addEventListener('click', () => this.setAttribute('visible', 'false'));
+    }
+}
+
+class KatPagination extends KatShadow {
+    render() {
+        const total = Number(this.getAttribute('total') || 1);
+        const items = Array.from({length: total}, (_, index) => `<li data-page="${index + 1}">${index + 1}</li>`);
+        this.shadowRoot.innerHTML = `<ul>${items.join('')}</ul>`;
+        this.shadowRoot.querySelectorAll('li').forEach(item => item.addEventListener('click', () => {
+            const url = new URL(window.location.href);
+            url.searchParams.set('page', item.dataset.page);
+            window.location.href = url.toString();
+        }));
+    }
+}
+
+define('kat-button', KatButton);
+define('kat-link', KatLink);
+define('kat-icon', class extends KatLabelled {});
+define('kat-badge', class extends KatLabelled {});
+define('kat-tab', class extends KatLabelled {});
+define('kat-radiobutton', class extends KatLabelled {});
+define('kat-alert', class extends KatLabelled {});
+define('kat-input', KatInput);
+define('kat-date-picker', KatDatePicker);
+define('kat-date-range-picker', KatDateRangePicker);
+define('kat-dropdown', KatDropdown);
+define('kat-dropdown-button', KatDropdownButton);
+define('kat-modal', KatModal);
+define('kat-pagination', KatPagination);
+['kat-option', 'kat-table', 'kat-table-head', 'kat-table-body', 'kat-table-row', 'kat-table-cell'].forEach(name => {
+    define(name, class extends KatPlain {});
+});
+
+window.replicaRequest = async (body) => {
+    const response = await fetch('/replica/api/reports', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify(body)
+    });
+    return (await response.json()).report_id;
+};
+
+// rows are kept per report id and only rewritten when their status changes,
+// so element handles taken by the services stay attached while other rows update
+window.replicaTable = (body, service, readyHtml, pendingHtml) => {
+    const rows = {};
+    const refresh = async () => {
+        const response = await fetch(`/replica/api/reports?service=${service}`);
+        const items = await response.json();
+        items.slice().reverse().forEach(item => {
+            let row = rows[item.report_id];
+            if (!row) {
+                row = document.createElement('kat-table-row');
+                row.setAttribute('role', 'row');
+                rows[item.report_id] = row;
+                body.prepend(row);
+            }
+            if (row.dataset.status === item.status) return;
+            row.dataset.status = item.status;
+            const action = item.status === 'Done' ? readyHtml(item) : (item.status === 'In Progress' ? pendingHtml(item) : '');
+            row.innerHTML = `
+                <kat-table-cell>${item.name}</kat-table-cell>
+                <kat-table-cell>${item.requested_at}</kat-table-cell>
+                <kat-table-cell>${item.status === 'Done' ? '' : item.status}</kat-table-cell>
+                <kat-table-cell>${action}</kat-table-cell>`;
+        });
+    };
+    refresh();
+    setInterval(refresh, 2000);
+};
+"""
+
+STYLE: str = """
+kat-button, kat-link, kat-icon, kat-badge, kat-tab, kat-radiobutton, kat-dropdown, kat-dropdown-button,
+kat-input, kat-date-picker, kat-date-range-picker, kat-pagination {
+    display: inline-block; min-width: 24px; min-height: 18px; margin: 4px; cursor: pointer;
+}
+kat-table, kat-table-head, kat-table-body { display: block; }
+kat-table-row { display: flex; gap: 16px; padding: 4px; }
+kat-option { display: block; padding: 2px; }
+section { margin: 12px 0; }
+"""
+
+
+def page(title: str, body: str, script: str = "") -> HTMLResponse:
+    html: str = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>{STYLE}</style>
+<script>{KAT_ELEMENTS}</script>
+</head>
+<body>
+<div aria-label="Settings">Settings</div>
+<h1>{title}</h1>
+{body}
+<script>{script}</script>
+</body>
+</html>"""
+    return HTMLResponse(html)
+
+
+def options(values: list) -> str:
+    return json.dumps(values).replace('"', "&quot;")
+
+
+def months_ago(months: int) -> datetime:
+    now: datetime = datetime.now().replace(day=1)
+    for _ in range(months):
+        now = (now - timedelta(days=1)).replace(day=1)
+    return now
+
+
+def fixture(service: str, category: str, meta: dict) -> tuple:
+    now: datetime = datetime.now()
+    rng: random.Random = random.Random(f"{service}:{category}:{meta}")
+    dates: list = [(now - timedelta(days=index % 30)).strftime("%Y-%m-%d") for index in range(ROWS)]
+    skus: list = [f"SKU-{index % 40:03d}" for index in range(ROWS)]
+    asins: list = [f"B0REPLICA{index % 40:02d}" for index in range(ROWS)]
+
+    df: pd.DataFrame = pd.DataFrame({
+        "date": dates,
+        "sku": skus,
+        "asin": asins,
+        "quantity": [rng.randint(0, 500) for _ in range(ROWS)],
+        "amount": [round(rng.uniform(1, 900), 2) for _ in range(ROWS)],
+        "currency": ["USD"] * ROWS,
+        "status": [rng.choice(["Shipped", "Pending", "Closed"]) for _ in range(ROWS)]
+    })
+
+    preamble: list = list()
+    if service == "payments":
+        preamble = [f"\"Includes Amazon Marketplace, Fulfillment by Amazon (FBA), and Amazon Webstore transactions\""] * 7
+    elif service == "awd" and category == "inventory":
+        preamble = ["AWD inventory", f"Generated {now:%m/%d/%Y}", ""]
+    elif service == "brand_analytics":
+        if meta.get("asin"):
+            preamble = [f"ASIN=[\"{meta['asin']}\"],Reporting Range=[\"Weekly\"],Select week=[\"Week 1\"]"]
+        else:
+            preamble = [f"Brand=[\"{meta.get('brand', '')}\"],Reporting Range=[\"Weekly\"],Select week=[\"Week 1\"]"]
+        df = df.rename(columns={"sku": "search_query", "quantity": "search_query_volume"})
+
+    if meta.get("file_type") == "xlsx":
+        buffer: io.BytesIO = io.BytesIO()
+        df.to_excel(buffer, index=False, startrow=len(preamble))
+        return buffer.getvalue(), "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    content: str = "\n".join(preamble + [df.to_csv(index=False)])
+    return content.encode("utf-8"), "csv", "text/csv"
+
+
+def attachment(content: bytes, file_name: str, media_type: str) -> Response:
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=\"{file_name}\""}
+    )
+
+
+def report_status(report: dict) -> str:
+    if time.monotonic() - report["created"] < REPORT_SECONDS:
+        return "In Progress"
+
+    return report["result"]
+
+
+@app.post(path="/replica/api/reports", status_code=status.HTTP_200_OK)
+async def request_report(request: Request) -> JSONResponse:
+    body: dict = await request.json()
+    report_id: str = uuid4().hex[:12]
+    reports[report_id] = {
+        "report_id": report_id,
+        "service": body.get("service"),
+        "category": body.get("category"),
+        "meta": body.get("meta") or {},
+        "name": body.get("name") or body.get("category"),
+        "created": time.monotonic(),
+        "requested_at": datetime.now().strftime("%m/%d/%Y %H:%M:%S"),
+        "result": "No Data Available" if random.random() < FAILURE_RATE else "Done"
+    }
+    logger.info(f"replica report requested :: {body}")
+    return JSONResponse({"report_id": report_id})
+
+
+@app.get(path="/replica/api/reports", status_code=status.HTTP_200_OK)
+async def list_reports(service: str) -> JSONResponse:
+    items: list = [
+        {
+            "report_id": report["report_id"],
+            "name": report["name"],
+            "requested_at": report["requested_at"],
+            "status": report_status(report)
+        }
+        for report in reports.values() if report["service"] == service
+    ]
+    return JSONResponse(list(reversed(items)))
+
+
+@app.get(path="/replica/download/{report_id}")
+async def download(report_id: str) -> Response:
+    report: dict = reports.get(report_id)
+    if not report or report_status(report) != "Done":
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    content, extension, media_type = fixture(report["service"], report["category"], report["meta"])
+    return attachment(content, f"{report['name']}.{extension}", media_type)
+
+
+@app.get(path="/replica/export/{service}")
+async def export(service: str, category: str = "", page: int = 1, file_type: str = "csv") -> Response:
+    content, extension, media_type = fixture(service, category, {"page": page, "file_type": file_type})
+    return attachment(content, f"{service}_{page}.{extension}", media_type)
+
+
+@app.get(path="/home", response_class=HTMLResponse)
+async def home() -> HTMLResponse:
+    return page("Seller Central", "<p>Home</p>")
+
+
+@app.get(path="/reportcentral", response_class=HTMLResponse)
+async def fulfillment() -> HTMLResponse:
+    categories: list = [
+        "Amazon Fulfilled Shipments", "FBA Inventory", "Manage FBA Inventory", "Replacements", "Reimbursements",
+        "Removal Order Detail", "Removal Shipment Detail", "Monthly Storage Fees", "Aged Inventory Surcharge report",
+        "Promotions", "FBA customer returns"
+    ]
+    month, year = months_ago(1).strftime("%B"), datetime.now().year
+    body: str = f"""
+        <section>
+            <label class="reports-nav-show-link">Show more</label>
+            <label class="reports-nav-show-link">Show more</label>
+            <label class="reports-nav-show-link">Show more</label>
+        </section>
+        <section>{''.join(f'<p><span data-category="{name}">{name}</span></p>' for name in categories)}</section>
+        <section><a id="reportpage_download_tab" href="#download">Download</a></section>
+        <section>
+            <kat-dropdown class="daily-time-picker-kat-dropdown-normal" value="Last 30 days"
+                options="{options(['Last 30 days', 'Exact dates'])}"></kat-dropdown>
+            <kat-date-range-picker id="daily-time-picker-kat-date-range-picker"></kat-date-range-picker>
+            <kat-dropdown class="daily-time-picker-kat-dropdown-normal month-year-report-time-picker-month-select-style"
+                value="{month}" options="{options(list(calendar.month_name)[1:] + ['Current'])}"></kat-dropdown>
+            <kat-dropdown class="daily-time-picker-kat-dropdown-normal month-year-report-time-picker-year-select-style"
+                value="{year}" options="{options([str(year), str(year - 1)])}"></kat-dropdown>
+            <kat-button class="download-report-page-kat-button-primary" label="Request .csv Download"></kat-button>
+        </section>
+        <kat-modal visible="false"></kat-modal>
+        <kat-table>
+            <kat-table-head><kat-table-row role="row">Report / Requested / Status / Action</kat-table-row></kat-table-head>
+            <kat-table-body role="rowgroup"></kat-table-body>
+        </kat-table>
+    """
+    script: str = """
+        let category = 'fulfillment';
+        document.querySelectorAll('span[data-category]').forEach(span => span.addEventListener('click', () => {
+            category = span.dataset.category;
+        }));
+        document.querySelector('kat-button.download-report-page-kat-button-primary').addEventListener('click', () => {
+            window.replicaRequest({service: 'fulfillment', category: category, name: category});
+        });
+        window.replicaTable(
+            document.querySelector("kat-table-body[role='rowgroup']"), 'fulfillment',
+            item => `<kat-button label="Download" onclick="replicaDownload('/replica/download/${item.report_id}')"></kat-button>`,
+            item => ''
+        );
+    """
+    return page("Fulfillment Reports", body, script)
+
+
+@app.get(path="/payments/reports", response_class=HTMLResponse)
+async def payments() -> HTMLResponse:
+    body: str = """
+        <section>
+            <kat-date-picker autocomplete="off"></kat-date-picker>
+            <kat-date-picker autocomplete="off"></kat-date-picker>
+            <kat-button label="Request Report"></kat-button>
+        </section>
+        <kat-table>
+            <kat-table-head><kat-table-row role="row">Report / Requested / Status / Action</kat-table-row></kat-table-head>
+            <kat-table-body role="rowgroup"></kat-table-body>
+        </kat-table>
+    """
+    script: str = """
+        document.querySelector("kat-button[label='Request Report']").addEventListener('click', () => {
+            const [start, end] = document.querySelectorAll('kat-date-picker[autocomplete="off"]');
+            const value = picker => picker.shadowRoot.querySelector('kat-input').value;
+            window.replicaRequest({service: 'payments', category: 'transactions', name: `${value(start)}-${value(end)}`});
+        });
+        window.replicaTable(
+            document.querySelector("kat-table-body[role='rowgroup']"), 'payments',
+            item => `<kat-button label="Download CSV" onclick="replicaDownload('/replica/download/${item.report_id}')"></kat-button>`,
+            item => `<kat-button label="Refresh"></kat-button>`
+        );
+    """
+    return page("Payments Reports", body, script)
+
+
+@app.get(path="/awd/{view}", response_class=HTMLResponse)
+async def awd(view: str) -> HTMLResponse:
+    if view == "inventory":
+        body: str = """
+            <kat-dropdown-button id="downloadDropdown"></kat-dropdown-button>
+            <button data-action="DOWNLOAD_INVENTORY_DATA" data-dropdown-item style="display: none"
+                onclick="replicaDownload('/replica/export/awd?category=inventory')">Download inventory data</button>
+        """
+        return page("AWD Inventory", body)
+
+    year: int = months_ago(1).year
+    if view == "inbound":
+        controls: str = f"""
+            <kat-dropdown class="dateRangeDropDown" value="Last 30 days"
+                options="{options(['Last 30 days', 'Exact dates'])}"></kat-dropdown>
+            <kat-date-range-picker start-label="Start Date"></kat-date-range-picker>
+            <kat-button label="Request .csv Download"></kat-button>
+        """
+        category, file_type = "shipment_awd_inbound", "csv"
+    else:
+        controls: str = f"""
+            <kat-link label="AWD Monthly Storage Fee Report" data-category="storage"></kat-link>
+            <kat-link label="AWD Monthly Processing Fee Report" data-category="processing"></kat-link>
+            <kat-link label="AWD Monthly Transportation Fee Report" data-category="transportation"></kat-link>
+            <kat-dropdown label="Event Year" value="{year}" options="{options([str(year), str(year - 1)])}"></kat-dropdown>
+            <kat-dropdown label="Event Month" value="{calendar.month_name[months_ago(1).month]}"
+                options="{options(list(calendar.month_name)[1:])}"></kat-dropdown>
+            <kat-button label="Request Download"></kat-button>
+        """
+        category, file_type = "storage", "xlsx"
+
+    body: str = f"""
+        <section>{controls}</section>
+        <kat-modal visible="false"></kat-modal>
+        <kat-table>
+            <kat-table-head><kat-table-row role="row">Report / Requested / Status / Action</kat-table-row></kat-table-head>
+            <kat-table-body role="rowgroup"></kat-table-body>
+        </kat-table>
+    """
+    script: str = f"""
+        let category = '{category}', name = '{category}';
+        document.querySelectorAll('kat-link[data-category]').forEach(link => link.addEventListener('click', () => {{
+            category = link.dataset.category;
+            name = link.getAttribute('label');
+        }}));
+        document.querySelector("kat-button[label^='Request']").addEventListener('click', () => {{
+            window.replicaRequest({{service: 'awd', category: category, name: name, meta: {{file_type: '{file_type}'}}}});
+        }});
+        window.replicaTable(
+            document.querySelector("kat-table-body[role='rowgroup']"), 'awd',
+            item => `<kat-button label="Download" onclick="replicaDownload('/replica/download/${{item.report_id}}')"></kat-button>`,
+            item => ''
+        );
+    """
+    return page("AWD Reports", body, script)
+
+
+@app.get(path="/fba/sendtoamazon", response_class=HTMLResponse)
+async def shipments(request: Request) -> HTMLResponse:
+    page_number: int = int(request.query_params.get("page", 1))
+    next_link: str = f"<a href='?page={page_number + 1}'>Next</a>" if page_number < PAGES else ""
+    body: str = f"""
+        <section>
+            <kat-icon class="inline-filter-chip-icon" name="calendar"></kat-icon>
+            <kat-radiobutton label="Custom date range" name="lastUpdatedInline"></kat-radiobutton>
+            <kat-date-range-picker start-label="From Date"></kat-date-range-picker>
+            <kat-date-range-picker start-label="From Date"></kat-date-range-picker>
+            <kat-button class="date-range-apply-button" label="Apply"></kat-button>
+        </section>
+        <section>
+            <kat-dropdown value="25" options="{options(['10', '25', '50', '100'])}"></kat-dropdown>
+            <kat-link class="export-table-link" label="Export"
+                href="/replica/export/shipments?page={page_number}"></kat-link>
+        </section>
+        <p>Page {page_number}</p>
+        {next_link}
+    """
+    return page("Shipments", body)
+
+
+@app.get(path="/cu/case-lobby", response_class=HTMLResponse)
+async def support(request: Request) -> HTMLResponse:
+    page_number: int = int(request.query_params.get("page", 1))
+    date: datetime = months_ago(page_number - 1)
+    rows: str = "".join(
+        f"<tr><td>Case {page_number}{index:02d}</td><td>{date.strftime('%b')} {index + 1}, {date.year}</td></tr>"
+        for index in range(10)
+    )
+    body: str = f"""
+        <kat-dropdown value="10" options="{options(['10', '25', '50'])}"></kat-dropdown>
+        <table>{rows}</table>
+        <kat-button class="export-report-button" label="Export"
+            onclick="replicaDownload('/replica/export/support?page={page_number}&file_type=xlsx')"></kat-button>
+        <kat-pagination total="{PAGES}"></kat-pagination>
+    """
+    return page("Case Log", body)
+
+
+@app.get(path="/business-reports", response_class=HTMLResponse)
+async def business_reports() -> HTMLResponse:
+    body: str = f"""
+        <section>
+            <p><span>Brand Performance</span></p>
+            <p><span>Detail Page Sales and Traffic</span></p>
+            <p><span>Detail Page Sales and Traffic</span></p>
+        </section>
+        <section>
+            <kat-dropdown data-testid="selection-box-dropdown" value="Last 30 days"
+                options="{options(['Last 30 days', 'Custom'])}"></kat-dropdown>
+            <kat-dropdown data-testid="selection-box-dropdown" value="Default"
+                options="{options(['Default', 'All Columns'])}"></kat-dropdown>
+            <kat-date-picker autocomplete="off"></kat-date-picker>
+            <kat-date-picker autocomplete="off"></kat-date-picker>
+            <kat-button data-testid="BR_TABLE_BAR_DOWNLOAD_BUTTON" label="Download (.csv)"
+                onclick="replicaDownload('/replica/export/business_reports')"></kat-button>
+        </section>
+    """
+    return page("Business Reports", body)
+
+
+@app.get(path="/brand-analytics/dashboard", response_class=HTMLResponse)
+async def brand_analytics() -> HTMLResponse:
+    week_end: datetime = datetime.now() - timedelta(days=(datetime.now().weekday() + 2) % 7 or 7)
+    weeks: list = [
+        f"Week {(week_end - timedelta(weeks=index)).isocalendar()[1]} | "
+        f"{(week_end - timedelta(weeks=index, days=6)):%Y-%m-%d} - {(week_end - timedelta(weeks=index)):%Y-%m-%d}"
+        for index in range(4)
+    ]
+    body: str = f"""
+        <section>
+            <kat-tab tab-id="query-performance-brand-view" label="Brand"></kat-tab>
+            <kat-tab tab-id="query-performance-asin-view" label="ASIN"></kat-tab>
+        </section>
+        <section>
+            <kat-dropdown id="brand" value="{BRANDS[0]}" options="{options(BRANDS)}"></kat-dropdown>
+            <kat-input placeholder="Search for 1 ASIN"></kat-input>
+            <kat-dropdown id="reporting-range" value="Monthly" options="{options(['Weekly', 'Monthly'])}"></kat-dropdown>
+            <kat-dropdown id="weekly-week" value="{weeks[0]}" options="{options(weeks)}"></kat-dropdown>
+            <kat-button data-test-id="RequiredFilterApplyButton" label="Apply"></kat-button>
+            <kat-button id="GenerateDownloadButton" label="Generate Download"></kat-button>
+        </section>
+        <kat-modal id="download-modal" visible="false">
+            <kat-radiobutton kat-aria-label="Comprehensive View" label="Comprehensive View"></kat-radiobutton>
+            <kat-button id="downloadModalGenerateDownloadButton" label="Generate Download"></kat-button>
+        </kat-modal>
+    """
+    script: str = """
+        let view = 'brand';
+        let requested = false;
+        const modal = document.querySelector('#download-modal');
+        document.querySelector("kat-tab[tab-id='query-performance-asin-view']").addEventListener('click', () => view = 'asin');
+        document.querySelector("kat-tab[tab-id='query-performance-brand-view']").addEventListener('click', () => view = 'brand');
+        document.querySelector('#GenerateDownloadButton').addEventListener('click', () => {
+            requested = false;
+            modal.setAttribute('visible', 'true');
+        });
+        // the first click queues the report, the second opens the download manager in a new tab
+        document.querySelector('#downloadModalGenerateDownloadButton').addEventListener('click', () => {
+            if (!requested) {
+                requested = true;
+                const asin = document.querySelector("kat-input[placeholder='Search for 1 ASIN']").value;
+                const brand = document.querySelector('kat-dropdown#brand').getAttribute('value');
+                const meta = view === 'asin' ? {asin: asin} : {brand: brand};
+                window.replicaRequest({service: 'brand_analytics', category: view, name: meta.asin || meta.brand, meta: meta});
+                return;
+            }
+            modal.setAttribute('visible', 'false');
+            window.open('/brand-analytics/download-manager', '_blank');
+        });
+    """
+    return page("Brand Analytics", body, script)
+
+
+@app.get(path="/brand-analytics/download-manager", response_class=HTMLResponse)
+async def download_manager() -> HTMLResponse:
+    body: str = """
+        <kat-table>
+            <kat-table-body role="rowgroup"></kat-table-body>
+        </kat-table>
+    """
+    script: str = """
+        window.replicaTable(
+            document.querySelector("kat-table-body[role='rowgroup']"), 'brand_analytics',
+            item => `<kat-icon name="file_download" onclick="replicaDownload('/replica/download/${item.report_id}')"></kat-icon>`,
+            item => `<kat-badge label="In Progress"></kat-badge>`
+        );
+    """
+    return page("Download Manager", body, script)
+
+
+def urls(base_url: str) -> dict:
+    return {
+        "base_url": f"{base_url}/home",
+        "fulfillment": f"{base_url}/reportcentral",
+        "payments": f"{base_url}/payments/reports",
+        "awd": {
+            "monthly": f"{base_url}/awd/monthly",
+            "inventory": f"{base_url}/awd/inventory",
+            "shipment_awd_inbound": f"{base_url}/awd/inbound"
+        },
+        "shipments": f"{base_url}/fba/sendtoamazon",
+        "support": f"{base_url}/cu/case-lobby",
+        "business_reports": f"{base_url}/business-reports",
+        "brand_analytics": f"{base_url}/brand-analytics/dashboard"
+    }
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="127.0.0.1", port=int(os.getenv("REPLICA_PORT", 8700)))
@@ -0,0 +1,117 @@
+import asyncio
+import typing as t
+from pathlib import Path
+
+from playwright.async_api import Page, ElementHandle
+
+try:
+    from loggers.logger import logger
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+class ReportPoller:
+    def __init__(self, interval: int = 50, attempts: int = 180):
+        self.interval: int = interval
+        self.attempts: int = attempts
+        self.pending: dict = dict()
+
+    def add(
+            self,
+            name: str,
+            rows_selector: str,
+            ready_selector: str,
+            failed_texts: t.Optional[list] = None,
+            retry_selectors: t.Optional[list] = None,
+            row_texts: t.Optional[list] = None
+    ) -> None:
+        # a freshly requested report is rendered as the first row of its table
+        # and pushes every report requested earlier in the same table one row down;
+        # a report with row texts is found by its content instead and keeps no position
+        for handle in self.pending.values():
+            if handle["rows_selector"] == rows_selector and not handle["row_texts"]:
+                handle["position"] += 1
+
+        self.pending[name] = {
+            "rows_selector": rows_selector,
+            "position": 0,
+            "row_texts": row_texts or [],
+            "ready_selector": ready_selector,
+            "failed_texts": failed_texts or [],
+            "retry_selectors": retry_selectors or []
+        }
+        logger.info(f"report is pending :: {name} :: total {len(self.pending)}")
+
+    @staticmethod
+    async def find_rows(page: Page, rows_selector: str, row_texts: list) -> list:
+        # rows holding every text, newest first like the table itself
+        rows: list = list()
+        for row in await page.query_selector_all(rows_selector):
+            text_content: str = await row.text_content() or ""
+            if all(text in text_content for text in row_texts):
+                rows.append(row)
+
+        return rows
+
+    async def _check(self, page: Page, name: str, handle: dict) -> tuple:
+        if handle["row_texts"]:
+            rows: list = await self.find_rows(page=page, rows_selector=handle["rows_selector"], row_texts=handle["row_texts"])
+            position: int = 0
+        else:
+            rows: list = await page.query_selector_all(handle["rows_selector"])
+            position: int = handle["position"]
+
+        if len(rows) <= position:
+            logger.warning(f"report row not found :: {name}")
+            return name, None, False
+
+        row: ElementHandle = rows[position]
+        text_content: str = await row.text_content() or ""
+
+        for text in handle["failed_texts"]:
+            if text in text_content:
+                logger.warning(f"{text} :: {name}")
+                return name, None, True
+
+        download_button: t.Optional[ElementHandle] = await row.query_selector(handle["ready_selector"])
+        if download_button:
+            logger.info(f"report was generated :: {name}")
+            return name, download_button, True
+
+        for selector in handle["retry_selectors"]:
+            retry_button: t.Optional[ElementHandle] = await row.query_selector(selector)
+            if retry_button:
+                logger.warning(f"trying to retry report :: {name} :: {selector}")
+                await retry_button.click()
+
+        return name, None, False
+
+    async def poll(self, page: Page) -> t.AsyncIterator[tuple]:
+        for _ in range(self.attempts):
+            results: list = await asyncio.gather(
+                *[self._check(page=page, name=name, handle=handle) for name, handle in self.pending.items()],
+                return_exceptions=True
+            )
+
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"report polling error :: {result}")
+                    continue
+
+                name, download_button, is_finished = result
+                if not is_finished:
+                    continue
+
+                self.pending.pop(name)
+                yield name, download_button
+
+            if not self.pending:
+                return
+
+            logger.warning(f"reports are not ready :: {', '.join(self.pending)}")
+            await asyncio.sleep(self.interval)
+
+        for name in list(self.pending):
+            logger.error(f"report was not generated in time :: {name}")
+            self.pending.pop(name)
+            yield name, None
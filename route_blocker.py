@@ -0,0 +1,152 @@
+import time
+import asyncio
+import typing as t
+from pathlib import Path
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Page, Route, Request, Response
+
+try:
+    from loggers.logger import logger
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+BLOCKED_TYPES: set = {"image", "font", "media"}
+
+BLOCKED_HOSTS: tuple = (
+    "fls-na.amazon.com",
+    "fls-eu.amazon.com",
+    "unagi.amazon.com",
+    "unagi-na.amazon.com",
+    "device-metrics-us.amazon.com",
+    "device-metrics-us-2.amazon.com",
+    "aax-us-east.amazon-adsystem.com",
+    "amazon-adsystem.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hotjar.com",
+    "sentry.io",
+    "nr-data.net",
+)
+
+# login captcha images and report files must always reach the page
+ALLOWED: tuple = (
+    "/ap/",
+    "captcha",
+    "/download",
+    "download-manager",
+    "reportcentral",
+    "amazonaws.com",
+)
+
+PROFILES: dict = {
+    "default": {
+        "types": BLOCKED_TYPES,
+        "hosts": BLOCKED_HOSTS,
+        "allowed": ALLOWED
+    },
+    "fulfillment": {
+        "allowed": ("/reportcentral/", "/fba/")
+    },
+    "payments": {
+        "allowed": ("/payments/reports/", "/payments/api/")
+    },
+    "business_reports": {
+        "allowed": ("/business-reports/",)
+    },
+    "brand_analytics": {
+        "allowed": ("/brand-analytics/", "/api/brand-analytics/")
+    },
+    "awd": {
+        "allowed": ("/awd/",)
+    },
+    "shipments": {
+        "allowed": ("/fba/sendtoamazon/", "/fba/inbound")
+    },
+    "support": {
+        "allowed": ("/cu/", "/help/")
+    }
+}
+
+
+class RouteBlocker:
+    def __init__(self, service_name: t.Optional[str] = None):
+        default: dict = PROFILES["default"]
+        profile: dict = PROFILES.get(service_name, {})
+
+        self.service_name: t.Optional[str] = service_name
+        self.types: set = set(profile.get("types", default["types"]))
+        self.hosts: tuple = tuple(default["hosts"]) + tuple(profile.get("hosts", ()))
+        self.allowed: tuple = tuple(default["allowed"]) + tuple(profile.get("allowed", ()))
+        self.enabled: bool = True
+        self.stats: dict = {"blocked": 0, "continued": 0}
+
+    def is_blocked(self, request: Request) -> bool:
+        url: str = request.url
+        if any(pattern in url for pattern in self.allowed):
+            return False
+
+        if request.resource_type in self.types:
+            return True
+
+        host: str = urlparse(url).hostname or ""
+        return any(host == blocked or host.endswith(f".{blocked}") for blocked in self.hosts)
+
+    async def handle(self, route: Route, request: Request) -> None:
+        if self.enabled and self.is_blocked(request):
+            self.stats["blocked"] += 1
+            await route.abort(error_code="blockedbyclient")
+            return
+
+        self.stats["continued"] += 1
+        await route.fallback()
+
+    async def install(self, context: BrowserContext) -> None:
+        await context.route("**/*", self.handle)
+        logger.info(f"route blocking installed :: {self.service_name}")
+
+    async def uninstall(self, context: BrowserContext) -> None:
+        await context.unroute("**/*", self.handle)
+        logger.info(f"route blocking removed :: {self.service_name} :: {self.stats}")
+
+    @staticmethod
+    async def _load(page: Page, url: str) -> dict:
+        responses: list = list()
+        page.on("response", responses.append)
+
+        start: float = time.perf_counter()
+        try:
+            await page.goto(url=url, timeout=60000, wait_until="load")
+            elapsed: float = time.perf_counter() - start
+        finally:
+            page.remove_listener("response", responses.append)
+
+        async def size(response: Response) -> int:
+            try:
+                sizes: dict = await response.request.sizes()
+                return sizes["responseBodySize"] + sizes["responseHeadersSize"]
+            except Exception:
+                return 0
+
+        transferred: list = await asyncio.gather(*[size(response) for response in responses])
+        return {"seconds": round(elapsed, 2), "requests": len(responses), "bytes": sum(transferred)}
+
+    async def measure(self, page: Page, url: str) -> dict:
+        # loads the same page with blocking switched off and then on, the route stays installed for both;
+        # the second load may be served partly from cache, so compare several runs before drawing conclusions
+        results: dict = dict()
+        for enabled in (False, True):
+            self.enabled = enabled
+            results["blocked" if enabled else "unblocked"] = await self._load(page=page, url=url)
+
+        self.enabled = True
+        unblocked, blocked = results["unblocked"], results["blocked"]
+        logger.info(
+            f"route blocking measurement :: {self.service_name} :: {url} :: "
+            f"{unblocked['seconds']}s -> {blocked['seconds']}s :: "
+            f"{unblocked['bytes']} -> {blocked['bytes']} bytes :: "
+            f"{unblocked['requests']} -> {blocked['requests']} requests"
+        )
+        return results
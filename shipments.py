@@ -5,11 +5,12 @@ from uuid import uuid4
 from pathlib import Path
 from datetime import datetime
 
-from playwright.async_api import Playwright, ElementHandle, Locator, Download, TimeoutError
+from playwright.async_api import Playwright, ElementHandle, Locator, TimeoutError
 
 try:
     from loggers.logger import logger
     from utils.decorators import utils
+    from utils.spans import spans
     from settings.config import config
     from utils.exceptions import BrowserExceptions
     from base.playwright_async import PlaywrightAsync
@@ -31,25 +32,15 @@ class Shipments(PlaywrightAsync):
         self.task: t.Optional[dict] = None
 
     @utils.async_exception
+    @spans.traced("download_report")
     async def download_report(self, report_name: str) -> bool:
-        download_button: ElementHandle = await self.page.wait_for_selector(
-            selector="//kat-link[@class='export-table-link']"
-        )
+        download_button: ElementHandle = await self.locate(name="shipments.export_link")
         if not download_button:
             logger.error("not found download button")
             return False
 
-        try:
-            async with self.page.expect_download() as download_info:
-                await download_button.click()
-
-            download: Download = await download_info.value
-            # report_path: str = os.path.join(config.reports_path, category, download.suggested_filename)
-            report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-            await download.save_as(path=report_path)
-            await asyncio.sleep(10)
-        except Exception as e:
-            logger.error(e)
+        report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
+        await self.capture_download(trigger=download_button, report_path=report_path)
 
         return True
 
@@ -64,9 +55,7 @@ class Shipments(PlaywrightAsync):
         await self.set_date(element=date_picker, period=period, service_name=self.service_name)
         await asyncio.sleep(5)
 
-        apply_button: ElementHandle = await self.wait_for_selector(
-            selector="kat-button[class='date-range-apply-button']"
-        )
+        apply_button: ElementHandle = await self.locate(name="shipments.apply_button")
         if not apply_button:
             logger.error("not found apply button")
             return False
@@ -74,7 +63,7 @@ class Shipments(PlaywrightAsync):
         await apply_button.click()
         await asyncio.sleep(5)
 
-        results_range: ElementHandle = await self.wait_for_selector(selector="//kat-dropdown[@value='25']")
+        results_range: ElementHandle = await self.locate(name="shipments.results_range")
         if results_range:
             if not await self.scroll_to_element(element=results_range):
                 await results_range.scroll_into_view_if_needed(timeout=10000)
@@ -92,7 +81,7 @@ class Shipments(PlaywrightAsync):
             await asyncio.sleep(5)
 
             report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.csv")
-            if not os.path.isfile(report_path):
+            if not self.has_download(report_path):
                 logger.critical(f"report not found :: {report_path}")
                 return False
 
@@ -105,6 +94,7 @@ class Shipments(PlaywrightAsync):
             #     return False
             if not postgres_db.add_report(
                 file_path=report_path,
+                buffer=self.pop_download(report_path),
                 dataset=self.dataset,
                 table=self.service_name,
                 add_date=True
@@ -115,7 +105,7 @@ class Shipments(PlaywrightAsync):
 
             await asyncio.sleep(5)
 
-            next_button = await self.wait_for_selector(selector="//a[text()='Next']", timeout=10000)
+            next_button = await self.locate(name="shipments.next_page")
             if next_button:
                 if not await self.scroll_to_element(element=next_button):
                     await next_button.scroll_into_view_if_needed(timeout=10000)
@@ -156,7 +146,7 @@ class Shipments(PlaywrightAsync):
                 is_opened: bool = False
                 for _ in range(3):
                     try:
-                        await self.page.goto(url=self.url, timeout=60000)
+                        await self.goto(url=self.url, timeout=60000)
                         is_opened: bool = True
                         logger.info(f"page is opened :: {self.url}")
                         break
@@ -174,6 +164,9 @@ class Shipments(PlaywrightAsync):
                 self.task["status"] = "failed"
                 logger.warning("login failed")
         finally:
+            await self.flush_downloads()
+            await self.stop_tracing(failed=self.task["status"] == "failed")
+
             if self.task["status"] == "started":
                 self.task["status"] = "stopped"
             await db.update_task(task=self.task)
@@ -0,0 +1,63 @@
+import math
+import asyncio
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+try:
+    from database.database import db
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+def percentile(values: list, rank: float) -> float:
+    ordered: list = sorted(values)
+    index: int = max(math.ceil(rank / 100 * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def summarize(rows: list) -> list:
+    groups: dict = dict()
+    for row in rows:
+        groups.setdefault((row["service"] or "-", row["step"]), []).append(row)
+
+    summary: list = list()
+    for (service, step), items in sorted(groups.items()):
+        durations: list = [item["duration_ms"] for item in items]
+        summary.append({
+            "service": service,
+            "step": step,
+            "count": len(items),
+            "misses": sum(1 for item in items if not item["is_ok"]),
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "total": sum(durations)
+        })
+
+    return summary
+
+
+def run() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="p50/p95 per step per service")
+    parser.add_argument("--service", default=None)
+    parser.add_argument("--days", type=int, default=7)
+    args: argparse.Namespace = parser.parse_args()
+
+    since: str = (datetime.now() - timedelta(days=args.days)).strftime("%Y-%m-%d %H:%M:%S")
+    rows: list = asyncio.run(db.get_spans(since=since, service=args.service)) or []
+    if not rows:
+        print(f"no spans since {since}")
+        return
+
+    header: str = f"{'service':<20} {'step':<20} {'count':>7} {'misses':>7} {'p50 ms':>10} {'p95 ms':>10} {'total s':>10}"
+    print(header)
+    print("-" * len(header))
+    for item in summarize(rows):
+        print(
+            f"{item['service']:<20} {item['step']:<20} {item['count']:>7} {item['misses']:>7} "
+            f"{item['p50']:>10.0f} {item['p95']:>10.0f} {item['total'] / 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    run()
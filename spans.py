@@ -0,0 +1,108 @@
+import time
+import asyncio
+import functools
+import threading
+import typing as t
+from datetime import datetime
+from contextvars import ContextVar
+from contextlib import contextmanager
+
+
+class Spans:
+    def __init__(self):
+        self.task: ContextVar = ContextVar("span_task", default=None)
+        self.records: dict = dict()
+        self.lock: threading.Lock = threading.Lock()
+
+    def bind(self, task: dict) -> None:
+        self.task.set({
+            "task_id": task.get("task_id"),
+            "service": task.get("service"),
+            "category": task.get("category")
+        })
+
+    def record(self, step: str, started_at: datetime, duration: float, is_ok: bool) -> None:
+        task: t.Optional[dict] = self.task.get()
+        if not task:
+            return
+
+        with self.lock:
+            self.records.setdefault(task["task_id"], []).append({
+                **task,
+                "step": step,
+                "started_at": started_at.strftime("%Y-%m-%d %H:%M:%S"),
+                "duration_ms": round(duration * 1000, 1),
+                "is_ok": int(is_ok)
+            })
+
+    def drain(self, task_id: str) -> list:
+        with self.lock:
+            return self.records.pop(task_id, [])
+
+    @contextmanager
+    def span(self, step: str) -> t.Iterator[None]:
+        started_at: datetime = datetime.now()
+        start: float = time.perf_counter()
+        is_ok: bool = False
+        try:
+            yield
+            is_ok: bool = True
+        finally:
+            self.record(step=step, started_at=started_at, duration=time.perf_counter() - start, is_ok=is_ok)
+
+    @staticmethod
+    def is_ok(result: t.Any, done: bool, check_result: bool) -> bool:
+        if not done:
+            return False
+
+        return (result is not None and result is not False) if check_result else True
+
+    def traced(self, step: str, check_result: bool = True):
+        # a call counts as failed when it raises or, with check_result, returns False/None,
+        # which is how the services signal a miss
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    started_at: datetime = datetime.now()
+                    start: float = time.perf_counter()
+                    result: t.Any = None
+                    done: bool = False
+                    try:
+                        result = await func(*args, **kwargs)
+                        done = True
+                        return result
+                    finally:
+                        self.record(
+                            step=step,
+                            started_at=started_at,
+                            duration=time.perf_counter() - start,
+                            is_ok=self.is_ok(result=result, done=done, check_result=check_result)
+                        )
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                started_at: datetime = datetime.now()
+                start: float = time.perf_counter()
+                result: t.Any = None
+                done: bool = False
+                try:
+                    result = func(*args, **kwargs)
+                    done = True
+                    return result
+                finally:
+                    self.record(
+                        step=step,
+                        started_at=started_at,
+                        duration=time.perf_counter() - start,
+                        is_ok=self.is_ok(result=result, done=done, check_result=check_result)
+                    )
+
+            return wrapper
+
+        return decorator
+
+
+spans: Spans = Spans()
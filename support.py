@@ -5,11 +5,12 @@ from uuid import uuid4
 from pathlib import Path
 from datetime import datetime
 
-from playwright.async_api import Playwright, ElementHandle, Download, TimeoutError
+from playwright.async_api import Playwright, ElementHandle, TimeoutError
 
 try:
     from loggers.logger import logger
     from utils.decorators import utils
+    from utils.spans import spans
     from settings.config import config
     from utils.exceptions import BrowserExceptions
     from base.playwright_async import PlaywrightAsync
@@ -31,10 +32,9 @@ class Support(PlaywrightAsync):
         self.task: t.Optional[dict] = None
 
     @utils.async_exception
+    @spans.traced("download_report")
     async def download_report(self, report_name: str) -> bool:
-        download_button: ElementHandle = await self.wait_for_selector(
-            selector="//kat-button[@class='export-report-button']"
-        )
+        download_button: ElementHandle = await self.locate(name="support.export_button")
         if not download_button:
             logger.error("not found download button")
             return False
@@ -44,23 +44,14 @@ class Support(PlaywrightAsync):
 
         await asyncio.sleep(5)
 
-        try:
-            async with self.page.expect_download() as download_info:
-                await download_button.click()
-
-            download: Download = await download_info.value
-            # report_path: str = os.path.join(config.reports_path, category, download.suggested_filename)
-            report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.xlsx")
-            await download.save_as(path=report_path)
-            await asyncio.sleep(10)
-        except Exception as e:
-            logger.error(e)
+        report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.xlsx")
+        await self.capture_download(trigger=download_button, report_path=report_path)
 
         return True
 
     @utils.async_exception
     async def get_report(self) -> bool:
-        results_range: ElementHandle = await self.wait_for_selector(selector="//kat-dropdown[@value='10']")
+        results_range: ElementHandle = await self.locate(name="support.results_range")
         if results_range:
             if not await self.scroll_to_element(element=results_range):
                 await results_range.scroll_into_view_if_needed(timeout=10000)
@@ -90,7 +81,7 @@ class Support(PlaywrightAsync):
                     return False
 
                 report_path: str = os.path.join(config.reports_path, self.service_name, f"{report_name}.xlsx")
-                if not os.path.isfile(report_path):
+                if not self.has_download(report_path):
                     logger.critical(f"report not found :: {report_path}")
                     return False
 
@@ -102,6 +93,7 @@ class Support(PlaywrightAsync):
                 #     return False
                 if not postgres_db.add_report(
                     file_path=report_path,
+                    buffer=self.pop_download(report_path),
                     dataset=self.dataset,
                     table=self.service_name
                 ):
@@ -112,10 +104,7 @@ class Support(PlaywrightAsync):
                 await asyncio.sleep(5)
 
             if is_current or is_previous:
-                next_button: ElementHandle = await self.wait_for_selector(
-                    # selector="(//kat-pagination)[2]"
-                    selector="//kat-pagination"
-                )
+                next_button: ElementHandle = await self.locate(name="support.pagination")
                 if not next_button:
                     logger.error("not found pagination")
                     break
@@ -168,7 +157,7 @@ class Support(PlaywrightAsync):
                 is_opened: bool = False
                 for _ in range(3):
                     try:
-                        await self.page.goto(url=self.url, timeout=60000)
+                        await self.goto(url=self.url, timeout=60000)
                         is_opened: bool = True
                         logger.info(f"page is opened :: {self.url}")
                         break
@@ -186,6 +175,9 @@ class Support(PlaywrightAsync):
                 self.task["status"] = "failed"
                 logger.warning("login failed")
         finally:
+            await self.flush_downloads()
+            await self.stop_tracing(failed=self.task["status"] == "failed")
+
             if self.task["status"] == "started":
                 self.task["status"] = "stopped"
             await db.update_task(task=self.task)
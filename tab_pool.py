@@ -0,0 +1,70 @@
+import time
+import random
+import asyncio
+import typing as t
+from pathlib import Path
+
+from playwright.async_api import BrowserContext, Page
+
+try:
+    from loggers.logger import logger
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+class TabPool:
+    def __init__(self, context: BrowserContext, width: int = 3, pace: tuple = (5, 15)):
+        self.context: BrowserContext = context
+        self.width: int = max(width, 1)
+        self.pace: tuple = pace
+        self.tabs: asyncio.Queue = asyncio.Queue()
+        self.pages: list = list()
+        self.next_at: dict = dict()
+
+    async def open(self) -> None:
+        for index in range(self.width):
+            page: Page = await self.context.new_page()
+            self.pages.append(page)
+            # tabs start staggered so they never act in lockstep
+            self.next_at[page] = time.monotonic() + index * random.uniform(*self.pace)
+            self.tabs.put_nowait(page)
+
+        logger.info(f"tab pool opened :: {self.width} tabs")
+
+    async def close(self) -> None:
+        for page in self.pages:
+            try:
+                await page.close()
+            except Exception as e:
+                logger.warning(f"tab was not closed :: {e}")
+
+        self.pages.clear()
+        self.next_at.clear()
+
+    async def _run_unit(self, name: str, unit: t.Callable[[Page], t.Awaitable]) -> t.Any:
+        page: Page = await self.tabs.get()
+        try:
+            # the pacing a single page gets from its own sleeps is kept per tab, not per pool
+            delay: float = self.next_at[page] - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            logger.info(f"tab unit started :: {name}")
+            return await unit(page)
+        except Exception as e:
+            logger.error(f"tab unit failed :: {name} :: {e}")
+            return False
+        finally:
+            self.next_at[page] = time.monotonic() + random.uniform(*self.pace)
+            self.tabs.put_nowait(page)
+
+    async def run(self, units: dict) -> dict:
+        if not self.pages:
+            await self.open()
+
+        tasks: dict = {
+            name: asyncio.create_task(self._run_unit(name=name, unit=unit)) for name, unit in units.items()
+        }
+        await asyncio.gather(*tasks.values())
+
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,133 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from services.api_sp import AmazonSP
+
+
+@pytest.fixture
+def parser() -> AmazonSP:
+    # the parsers need no api client
+    return AmazonSP.__new__(AmazonSP)
+
+
+XML_DOCUMENTS: dict = {
+    "browse tree": (
+        '<?xml version=""1.0"" encoding=""UTF-8""?>\n<Result>'
+        '<Node><browseNodeId>1</browseNodeId><browseNodeAttributes count=""1"">'
+        '<attribute name=""refinement"">size</attribute></browseNodeAttributes>'
+        '<browseNodeName>Category 1</browseNodeName><hasChildren>true</hasChildren></Node>'
+        '<Node><browseNodeId>2</browseNodeId><browseNodeName>Category 2</browseNodeName>'
+        '<productTypeDefinitions>SHIRT</productTypeDefinitions></Node>'
+        '</Result>'
+    ),
+    "nested records": (
+        '<Result><Node><id>1</id><children><Node><id>2</id></Node><Node><id>3</id></Node></children></Node>'
+        '<Node><id>4</id></Node></Result>'
+    ),
+    "candidate order picks the tag": (
+        '<Report><Row><sku>A</sku><qty>1</qty></Row><Item><sku>B</sku></Item><Row><sku>C</sku></Row></Report>'
+    ),
+    "top level children": (
+        '<Inventory><Entry><sku>A</sku><qty>1</qty></Entry><Entry><sku>B</sku><qty>2</qty></Entry></Inventory>'
+    ),
+    "root only": '<Summary total="3" currency="USD"></Summary>',
+    "noise after root": '<Result><Record><id>1</id></Record><Record><id>2</id></Record></Result>\n\x00trailer',
+}
+
+
+@pytest.mark.parametrize("name", list(XML_DOCUMENTS))
+def test_xml_stream_matches_tree(parser, name):
+    document: str = XML_DOCUMENTS[name]
+    expected: pd.DataFrame = parser._parse_xml_tree(document)
+
+    from_text: pd.DataFrame = pd.DataFrame(list(parser.iter_xml_records(source=document)))
+    from_stream: pd.DataFrame = pd.DataFrame(list(parser.iter_xml_records(source=io.BytesIO(document.encode("utf-8")))))
+
+    pd.testing.assert_frame_equal(from_text, expected)
+    pd.testing.assert_frame_equal(from_stream, expected)
+
+
+def test_xml_stream_split_quotes(parser, monkeypatch):
+    # a doubled quote split across two read chunks still collapses into one
+    document: str = XML_DOCUMENTS["browse tree"]
+    chunks = AmazonSP._xml_chunks
+    monkeypatch.setattr(AmazonSP, "_xml_chunks", staticmethod(lambda source: chunks(source, size=7)))
+
+    records: pd.DataFrame = pd.DataFrame(list(parser.iter_xml_records(source=io.BytesIO(document.encode("utf-8")))))
+
+    pd.testing.assert_frame_equal(records, parser._parse_xml_tree(document))
+
+
+def test_xml_record_tag(parser):
+    document: str = XML_DOCUMENTS["browse tree"]
+
+    records: pd.DataFrame = pd.DataFrame(list(parser.iter_xml_records(source=document, record_tag="Node")))
+
+    pd.testing.assert_frame_equal(records, parser._parse_xml_tree(document))
+
+
+def test_xml_records_stream_without_record_tag(parser):
+    # the first record comes out long before the document is read, nothing is buffered until the end
+    document: bytes = ("<Result>" + "<Node><id>1</id></Node>" * 100000 + "</Result>").encode("utf-8")
+    source: io.BytesIO = io.BytesIO(document)
+
+    records = parser.iter_xml_records(source=source)
+
+    assert next(records) == {"id": "1"}
+    assert source.tell() < len(document)
+
+
+def money(amount: str) -> str:
+    return json.dumps({"OrderTotal": {"amount": amount, "currencyCode": "USD"}})
+
+
+JSON_FRAMES: dict = {
+    "orders": pd.DataFrame({
+        "amazon-order-id": ["111-1", "111-2", "111-3", "111-4"],
+        "quantity": [1, 2, 3, 4],
+        "OrderTotal": [money("1.50"), money("2.00"), None, money("1.50")],
+        "ShippingAddress": [
+            json.dumps({"ShippingAddress": {"City": "Austin", "PostalCode": "73301"}, "IsBusinessOrder": False}),
+            None,
+            json.dumps({"ShippingAddress": {"City": "Boston", "StateOrRegion": "MA"}}),
+            json.dumps({"ShippingAddress": {"City": "Austin", "PostalCode": "73301"}, "IsBusinessOrder": False})
+        ]
+    }),
+    "keys first seen late": pd.DataFrame({
+        "id": [1, 2, 3],
+        "Details": [json.dumps({"a": 1}), json.dumps({"b": 2, "a": 3}), json.dumps({"c": {"d": "x"}})]
+    }),
+    "later column overwrites": pd.DataFrame({
+        "id": [1, 2],
+        "First": [json.dumps({"name": "first", "only_first": 1}), json.dumps({"name": "first"})],
+        "Second": [json.dumps({"name": "second"}), None]
+    }),
+    "python literals and garbage": pd.DataFrame({
+        "id": [1, 2, 3],
+        "Details": ["{'a': 'x'}", "not json", json.dumps({"a": "y"})]
+    }),
+    "dict cells": pd.DataFrame({
+        "id": [1, 2],
+        "Details": [{"a": {"amount": "5.00", "currencyCode": "USD"}}, {"b": True}]
+    }),
+}
+
+
+@pytest.mark.parametrize("name", list(JSON_FRAMES))
+def test_columnar_json_matches_rows(parser, name):
+    df: pd.DataFrame = JSON_FRAMES[name]
+    columns: list = [column for column in df.columns if column[0].isupper()]
+
+    expected: pd.DataFrame = parser._processing_dataframe_rows(df=df.copy(), columns=columns)
+    result: pd.DataFrame = parser.processing_dataframe(df=df.copy(), columns=columns)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_columnar_json_empty(parser):
+    df: pd.DataFrame = pd.DataFrame({"id": [], "Details": []})
+
+    assert parser.processing_dataframe(df=df, columns=["Details"]).empty
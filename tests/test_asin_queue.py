@@ -0,0 +1,154 @@
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from settings.config import config
+from database import database as database_module
+from database.database import Database
+
+WEEK: str = "2026-10-17"
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch) -> Database:
+    monkeypatch.setattr(config, "db_path", str(tmp_path / "queue.db"))
+    return Database()
+
+
+def rows() -> dict:
+    with sqlite3.connect(config.db_path) as connection:
+        connection.row_factory = sqlite3.Row
+        return {row["sku"]: dict(row) for row in connection.execute("SELECT * FROM asin_queue")}
+
+
+def fill(db: Database, count: int = 3) -> None:
+    asyncio.run(db.add_asin_items(items=[(f"SKU-{index}", f"ASIN{index}") for index in range(count)], week=WEEK))
+
+
+def test_add_ignores_known_items(db):
+    assert asyncio.run(db.add_asin_items(items=[("SKU-0", "ASIN0"), ("SKU-1", "ASIN0")], week=WEEK)) == 2
+    assert asyncio.run(db.add_asin_items(items=[("SKU-0", "ASIN0"), ("SKU-2", "ASIN2")], week=WEEK)) == 1
+
+    assert {row["status"] for row in rows().values()} == {"pending"}
+
+
+def test_claim_hands_out_each_item_once(db):
+    fill(db)
+
+    first: list = asyncio.run(db.claim_asin_items(user_id="a", week=WEEK, limit=2))
+    second: list = asyncio.run(db.claim_asin_items(user_id="b", week=WEEK, limit=2))
+    third: list = asyncio.run(db.claim_asin_items(user_id="c", week=WEEK, limit=2))
+
+    assert [item["sku"] for item in first] == ["SKU-0", "SKU-1"]
+    assert [item["sku"] for item in second] == ["SKU-2"]
+    assert third == []
+
+    state: dict = rows()
+    assert {sku: (row["status"], row["user_id"], row["attempts"]) for sku, row in state.items()} == {
+        "SKU-0": ("claimed", "a", 1),
+        "SKU-1": ("claimed", "a", 1),
+        "SKU-2": ("claimed", "b", 1)
+    }
+
+
+def test_ack_done_and_retries(db):
+    fill(db, count=1)
+
+    item: dict = asyncio.run(db.claim_asin_items(user_id="a", week=WEEK))[0]
+    asyncio.run(db.ack_asin_item(item=item, user_id="a", is_done=False))
+    assert rows()["SKU-0"]["status"] == "pending"
+
+    item: dict = asyncio.run(db.claim_asin_items(user_id="b", week=WEEK))[0]
+    asyncio.run(db.ack_asin_item(item=item, user_id="b", is_done=True))
+    assert (rows()["SKU-0"]["status"], rows()["SKU-0"]["attempts"]) == ("done", 2)
+
+    assert asyncio.run(db.claim_asin_items(user_id="a", week=WEEK)) == []
+
+
+def test_ack_fails_after_max_attempts(db):
+    fill(db, count=1)
+
+    for _ in range(3):
+        item: dict = asyncio.run(db.claim_asin_items(user_id="a", week=WEEK))[0]
+        asyncio.run(db.ack_asin_item(item=item, user_id="a", is_done=False))
+
+    assert (rows()["SKU-0"]["status"], rows()["SKU-0"]["attempts"]) == ("failed", 3)
+    assert asyncio.run(db.claim_asin_items(user_id="a", week=WEEK)) == []
+
+
+def test_expired_lease_is_reclaimed(db):
+    fill(db, count=1)
+    item: dict = asyncio.run(db.claim_asin_items(user_id="a", week=WEEK))[0]
+
+    # the browser holding the claim died, its lease runs out
+    expired: str = (datetime.now() - timedelta(hours=5)).strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(config.db_path) as connection:
+        connection.execute("UPDATE asin_queue SET claimed_at = ?", (expired,))
+
+    claimed: list = asyncio.run(db.claim_asin_items(user_id="b", week=WEEK))
+    assert [claimed_item["sku"] for claimed_item in claimed] == [item["sku"]]
+    assert (rows()["SKU-0"]["user_id"], rows()["SKU-0"]["attempts"]) == ("b", 2)
+
+
+def test_stale_ack_leaves_new_claim(db):
+    fill(db, count=1)
+    item: dict = asyncio.run(db.claim_asin_items(user_id="a", week=WEEK))[0]
+
+    expired: str = (datetime.now() - timedelta(hours=5)).strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(config.db_path) as connection:
+        connection.execute("UPDATE asin_queue SET claimed_at = ?", (expired,))
+    asyncio.run(db.claim_asin_items(user_id="b", week=WEEK))
+
+    # the first browser comes back after its lease ran out, neither outcome touches the claim of the second
+    asyncio.run(db.ack_asin_item(item=item, user_id="a", is_done=False))
+    asyncio.run(db.ack_asin_item(item=item, user_id="a", is_done=True))
+    assert (rows()["SKU-0"]["status"], rows()["SKU-0"]["user_id"]) == ("claimed", "b")
+    assert asyncio.run(db.claim_asin_items(user_id="c", week=WEEK)) == []
+
+    asyncio.run(db.ack_asin_item(item=item, user_id="b", is_done=True))
+    assert rows()["SKU-0"]["status"] == "done"
+
+
+def test_renew_keeps_lease(db):
+    fill(db, count=1)
+    items: list = asyncio.run(db.claim_asin_items(user_id="a", week=WEEK))
+
+    expired: str = (datetime.now() - timedelta(hours=5)).strftime("%Y-%m-%d %H:%M:%S")
+    with sqlite3.connect(config.db_path) as connection:
+        connection.execute("UPDATE asin_queue SET claimed_at = ?", (expired,))
+
+    # only the owner renews, a claim of another browser is left alone
+    asyncio.run(db.renew_asin_items(items=items, user_id="b"))
+    assert rows()["SKU-0"]["claimed_at"] == expired
+
+    asyncio.run(db.renew_asin_items(items=items, user_id="a"))
+    assert rows()["SKU-0"]["claimed_at"] > expired
+    assert asyncio.run(db.claim_asin_items(user_id="b", week=WEEK)) == []
+
+
+def test_locked_queue_is_not_empty(db, monkeypatch):
+    fill(db, count=1)
+
+    connect = database_module.aiosqlite.connect
+    monkeypatch.setattr(
+        database_module.aiosqlite, "connect", lambda database, timeout: connect(database=database, timeout=0.1)
+    )
+
+    async def no_sleep(delay: float) -> None:
+        pass
+
+    monkeypatch.setattr(database_module.asyncio, "sleep", no_sleep)
+
+    # another browser holds the write lock for longer than the claim is willing to wait
+    blocker: sqlite3.Connection = sqlite3.connect(config.db_path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            asyncio.run(db.claim_asin_items(user_id="a", week=WEEK))
+    finally:
+        blocker.execute("ROLLBACK")
+        blocker.close()
+
+    assert [item["sku"] for item in asyncio.run(db.claim_asin_items(user_id="a", week=WEEK))] == ["SKU-0"]
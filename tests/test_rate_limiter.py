@@ -0,0 +1,140 @@
+import pytest
+
+from utils import rate_limiter as rate_limiter_module
+from utils.rate_limiter import RateLimiter
+
+
+class Clock:
+    def __init__(self, now: float = 1000000.0):
+        self.now: float = now
+        self.sleeps: list = list()
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch) -> Clock:
+    monkeypatch.setenv("state_path", str(tmp_path))
+    clock: Clock = Clock()
+    monkeypatch.setattr(rate_limiter_module.time, "time", clock.time)
+    monkeypatch.setattr(rate_limiter_module.time, "sleep", clock.sleep)
+    # backoff jitter off, a delay is always its upper bound
+    monkeypatch.setattr(rate_limiter_module.random, "uniform", lambda low, high: high)
+    return clock
+
+
+@pytest.fixture
+def limiter(clock) -> RateLimiter:
+    return RateLimiter(limits={"sp.getReport": (2.0, 3)}, max_backoff=60)
+
+
+def test_reserve_spends_burst_then_queues(limiter):
+    waits: list = [limiter.reserve("sp.getReport") for _ in range(5)]
+
+    assert waits == [0.0, 0.0, 0.0, 0.5, 1.0]
+
+
+def test_reserve_refills_at_rate(limiter, clock):
+    for _ in range(3):
+        limiter.reserve("sp.getReport")
+
+    clock.now += 1.0
+    assert limiter.reserve("sp.getReport") == 0.0
+    assert limiter.reserve("sp.getReport") == 0.0
+    assert limiter.reserve("sp.getReport") == 0.5
+
+    # a long pause refills up to the burst and no further
+    clock.now += 3600
+    assert [limiter.reserve("sp.getReport") for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+
+def test_region_buckets_are_separate(limiter):
+    for _ in range(3):
+        limiter.reserve("sp.getReport:us-east-1")
+
+    assert limiter.reserve("sp.getReport:us-east-1") == 0.5
+    assert limiter.reserve("sp.getReport:eu-west-1") == 0.0
+
+
+def test_buckets_are_shared_through_state(limiter, clock):
+    for _ in range(3):
+        limiter.reserve("sp.getReport")
+
+    # another process starts with the same state file
+    other: RateLimiter = RateLimiter(limits={"sp.getReport": (2.0, 3)})
+    assert other.reserve("sp.getReport") == 0.5
+
+
+def test_throttled_blocks_everyone(limiter, clock):
+    delay: float = limiter.throttled("sp.getReport", attempt=1)
+
+    assert delay == 10.0
+    # the bucket still had tokens, the block wins over them
+    assert limiter.reserve("sp.getReport") == 10.0
+
+    clock.now += 10.0
+    assert limiter.reserve("sp.getReport") == 0.0
+
+
+def test_throttled_waits_at_least_one_token(clock):
+    limiter: RateLimiter = RateLimiter(limits={"sp.createReport": (0.0167, 15)})
+
+    assert limiter.throttled("sp.createReport", attempt=0) == pytest.approx(1 / 0.0167)
+
+
+def test_backoff_is_capped(limiter):
+    assert limiter.backoff(attempt=20) == 60
+
+
+def test_learn_replaces_rate(limiter):
+    limiter.learn("sp.getReport", headers={"x-amzn-RateLimit-Limit": "0.5"})
+    for _ in range(3):
+        limiter.reserve("sp.getReport")
+
+    assert limiter.reserve("sp.getReport") == 2.0
+
+
+@pytest.mark.parametrize("headers", [None, {}, {"x-amzn-RateLimit-Limit": "n/a"}, {"x-amzn-RateLimit-Limit": "0"}])
+def test_learn_ignores_unusable_headers(limiter, headers):
+    limiter.learn("sp.getReport", headers=headers)
+    for _ in range(3):
+        limiter.reserve("sp.getReport")
+
+    assert limiter.reserve("sp.getReport") == 0.5
+
+
+class Throttled(Exception):
+    pass
+
+
+class Response:
+    headers: dict = {"x-amzn-RateLimit-Limit": "1.0"}
+
+
+def test_call_retries_throttled(limiter, clock):
+    calls: list = list()
+
+    def request(report_id: str) -> Response:
+        calls.append(report_id)
+        if len(calls) == 1:
+            raise Throttled()
+        return Response()
+
+    response: Response = limiter.call("sp.getReport", request, "1", throttled=(Throttled,))
+
+    assert isinstance(response, Response)
+    assert calls == ["1", "1"]
+    assert clock.sleeps == [5.0]
+
+
+def test_call_gives_up(limiter):
+    def request() -> None:
+        raise Throttled()
+
+    with pytest.raises(RuntimeError):
+        limiter.call("sp.getReport", request, throttled=(Throttled,), attempts=3)
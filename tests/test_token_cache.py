@@ -0,0 +1,157 @@
+import json
+
+import pytest
+import requests
+from sp_api.api import Reports as SpReports
+from sp_api.auth import AccessTokenResponse as SpAccessTokenResponse
+from sp_api.base.marketplaces import Marketplaces as SpMarketplaces
+from sp_api.base.exceptions import SellingApiForbiddenException
+from ad_api.api.reports import Reports as AdReports
+from ad_api.auth import AccessTokenResponse as AdAccessTokenResponse
+from ad_api.base.marketplaces import Marketplaces as AdMarketplaces
+from ad_api.base.exceptions import AdvertisingApiUnauthorizedException
+
+from utils import token_cache as token_cache_module
+from utils.token_cache import TokenCache, SharedAccessToken
+
+
+def make_response(status_code: int, body: dict) -> requests.Response:
+    response: requests.Response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode("utf-8")
+    return response
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch) -> TokenCache:
+    monkeypatch.setenv("state_path", str(tmp_path))
+    return TokenCache()
+
+
+@pytest.fixture
+def lwa(monkeypatch) -> list:
+    # every token request is answered with the next token, the list keeps the calls
+    calls: list = list()
+
+    def post(url, data=None, headers=None, timeout=None, **kwargs):
+        calls.append({"url": url, "data": data, "timeout": timeout})
+        return make_response(200, {"access_token": f"token-{len(calls)}", "token_type": "bearer", "expires_in": 3600})
+
+    monkeypatch.setattr(token_cache_module.requests, "post", post)
+    return calls
+
+
+@pytest.fixture
+def sp_client(cache):
+    client = SpReports(
+        credentials={"refresh_token": "sp-refresh", "lwa_app_id": "sp-client-id", "lwa_client_secret": "sp-secret"},
+        marketplace=SpMarketplaces.US
+    )
+    return cache.wrap(client=client, response_class=SpAccessTokenResponse)
+
+
+@pytest.fixture
+def ad_client(cache):
+    client = AdReports(
+        credentials={
+            "refresh_token": "ad-refresh",
+            "client_id": "ad-client-id",
+            "client_secret": "ad-secret",
+            "profile_id": "1"
+        },
+        marketplace=AdMarketplaces.US
+    )
+    return cache.wrap(client=client, response_class=AdAccessTokenResponse)
+
+
+# the cache reaches into private parts of both sdks, these tests fail first when an upgrade moves them
+@pytest.mark.parametrize("client_name", ["sp_client", "ad_client"])
+def test_sdk_internals(request, client_name):
+    client = request.getfixturevalue(client_name)
+
+    assert isinstance(client._auth, SharedAccessToken)
+    assert callable(client._check_response)
+
+    auth = client._auth.auth
+    assert auth.scheme + auth.host + auth.path == "https://api.amazon.com/auth/o2/token"
+    assert auth.data["grant_type"] == "refresh_token"
+    assert auth.data["refresh_token"] == auth.cred.refresh_token
+    assert auth.cred.client_id
+    assert "content-type" in {name.lower() for name in auth.headers}
+
+
+def test_sp_token_goes_through_cache(sp_client, lwa):
+    assert sp_client.headers["x-amz-access-token"] == "token-1"
+    assert sp_client.headers["x-amz-access-token"] == "token-1"
+
+    assert len(lwa) == 1
+    assert lwa[0]["data"]["client_id"] == "sp-client-id"
+    assert lwa[0]["timeout"] == token_cache_module.FETCH_TIMEOUT
+
+
+def test_ad_token_goes_through_cache(ad_client, lwa):
+    assert ad_client.headers["Authorization"] == "Bearer token-1"
+    assert ad_client.headers["Authorization"] == "Bearer token-1"
+
+    assert len(lwa) == 1
+    assert lwa[0]["data"]["client_id"] == "ad-client-id"
+
+
+def test_token_is_shared_between_caches(sp_client, lwa):
+    assert sp_client.headers["x-amz-access-token"] == "token-1"
+
+    # a second process starts with an empty memory and reads the token from the state file
+    other = TokenCache()
+    client = other.wrap(
+        client=SpReports(
+            credentials={"refresh_token": "sp-refresh", "lwa_app_id": "sp-client-id", "lwa_client_secret": "sp-secret"},
+            marketplace=SpMarketplaces.US
+        ),
+        response_class=SpAccessTokenResponse
+    )
+    assert client.headers["x-amz-access-token"] == "token-1"
+    assert len(lwa) == 1
+
+
+def test_sp_revoked_token_is_dropped(sp_client, lwa):
+    assert sp_client.headers["x-amz-access-token"] == "token-1"
+
+    sp_client.method = "GET"
+    response: requests.Response = make_response(403, {"errors": [{
+        "code": "Unauthorized",
+        "message": "Access to requested resource is denied.",
+        "details": "The access token you provided is revoked, malformed or invalid."
+    }]})
+    with pytest.raises(SellingApiForbiddenException):
+        sp_client._check_response(response)
+
+    assert sp_client.headers["x-amz-access-token"] == "token-2"
+    assert len(lwa) == 2
+
+
+def test_sp_forbidden_keeps_token(sp_client, lwa):
+    assert sp_client.headers["x-amz-access-token"] == "token-1"
+
+    # a missing role is a 403 too, the token itself is fine
+    sp_client.method = "GET"
+    response: requests.Response = make_response(403, {"errors": [{
+        "code": "Unauthorized",
+        "message": "Access to requested resource is denied.",
+        "details": ""
+    }]})
+    with pytest.raises(SellingApiForbiddenException):
+        sp_client._check_response(response)
+
+    assert sp_client.headers["x-amz-access-token"] == "token-1"
+    assert len(lwa) == 1
+
+
+def test_ad_unauthorized_token_is_dropped(ad_client, lwa):
+    assert ad_client.headers["Authorization"] == "Bearer token-1"
+
+    response: requests.Response = make_response(401, {"code": "UNAUTHORIZED", "details": "Not authorized"})
+    with pytest.raises(AdvertisingApiUnauthorizedException):
+        ad_client._check_response(response)
+
+    assert ad_client.headers["Authorization"] == "Bearer token-2"
+    assert len(lwa) == 2
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+import fcntl
+import hashlib
+import requests
+import typing as t
+from pathlib import Path
+from contextlib import contextmanager
+
+try:
+    from loggers.logger import logger
+    from settings.config import config
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+# the token request runs under the cross-process lock, it must not hang on a stalled connection
+FETCH_TIMEOUT: int = 30
+
+
+class SharedAccessToken:
+    # stands in for the token client of the sdk, the refresh token grant goes through the shared cache
+    # and everything else (grantless tokens, auth codes) is left to the original client
+    def __init__(self, auth: t.Any, cache: "TokenCache", response_class: type):
+        self.auth: t.Any = auth
+        self.cache: TokenCache = cache
+        self.response_class: type = response_class
+
+    def __getattr__(self, name: str) -> t.Any:
+        return getattr(self.auth, name)
+
+    @property
+    def scope(self) -> str:
+        refresh_token: str = self.auth.cred.refresh_token or ""
+        return f"refresh_token:{hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()[:16]}"
+
+    def fetch(self) -> dict:
+        response: requests.Response = requests.post(
+            self.auth.scheme + self.auth.host + self.auth.path,
+            data=self.auth.data,
+            headers=self.auth.headers,
+            proxies=getattr(self.auth, "proxies", None),
+            verify=getattr(self.auth, "verify", True),
+            timeout=FETCH_TIMEOUT
+        )
+        if response.status_code != 200:
+            logger.error(f"access token request failed :: {response.status_code} :: {response.text[:200]}")
+            response.raise_for_status()
+
+        return response.json()
+
+    def get_auth(self) -> t.Any:
+        token: dict = self.cache.get(client_id=self.auth.cred.client_id, scope=self.scope, fetch=self.fetch)
+        return self.response_class(access_token=token["access_token"], token_type=token.get("token_type"))
+
+    def invalidate(self) -> None:
+        self.cache.drop(client_id=self.auth.cred.client_id, scope=self.scope)
+
+
+class TokenCache:
+    def __init__(self, margin: int = 300):
+        self.margin: int = margin
+        self.tokens: dict = dict()
+
+    @property
+    def state_file(self) -> str:
+        state_path: str = config.state_path or os.path.join(os.path.dirname(config.reports_path), "state")
+        return os.path.join(state_path, "lwa_tokens.json")
+
+    @contextmanager
+    def _state(self) -> t.Iterator[dict]:
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        with open(f"{self.state_file}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_file, "r", encoding="utf-8") as file:
+                        state: dict = json.load(file)
+                except (OSError, ValueError):
+                    state: dict = dict()
+
+                yield state
+
+                # access tokens are credentials, the file is readable by its owner only
+                descriptor: int = os.open(f"{self.state_file}.tmp", os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                    json.dump(state, file)
+                os.replace(f"{self.state_file}.tmp", self.state_file)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def is_valid(self, token: t.Optional[dict]) -> bool:
+        return bool(token) and token["expires_at"] - self.margin > time.time()
+
+    def get(self, client_id: str, scope: str, fetch: t.Callable[[], dict]) -> dict:
+        key: str = f"{client_id}:{scope}"
+        if self.is_valid(self.tokens.get(key)):
+            return self.tokens[key]
+
+        with self._state() as state:
+            token: t.Optional[dict] = state.get(key)
+            if not self.is_valid(token):
+                # the lock is held through the request, processes waiting on it read the new token instead of
+                # asking for one more
+                response: dict = fetch()
+                token: dict = {
+                    "access_token": response["access_token"],
+                    "token_type": response.get("token_type"),
+                    "expires_at": time.time() + int(response.get("expires_in") or 3600)
+                }
+                state[key] = token
+                logger.info(f"access token refreshed :: {client_id[-6:]} :: {scope}")
+
+            for expired in [name for name, item in state.items() if item["expires_at"] < time.time()]:
+                del state[expired]
+
+        self.tokens[key] = token
+        return token
+
+    def drop(self, client_id: str, scope: str) -> None:
+        key: str = f"{client_id}:{scope}"
+        token: t.Optional[dict] = self.tokens.pop(key, None)
+        if not token:
+            return
+
+        with self._state() as state:
+            # another process may have stored a fresh token in the meantime, only the rejected one goes
+            if state.get(key, {}).get("access_token") == token["access_token"]:
+                del state[key]
+
+        logger.warning(f"access token dropped :: {client_id[-6:]} :: {scope}")
+
+    def wrap(self, client: t.Any, response_class: type) -> t.Any:
+        if isinstance(client._auth, SharedAccessToken):
+            return client
+
+        auth: SharedAccessToken = SharedAccessToken(auth=client._auth, cache=self, response_class=response_class)
+        check_response: t.Callable = client._check_response
+
+        def checked_response(response: requests.Response, *args, **kwargs) -> t.Any:
+            # a token revoked before it expires comes back as 401 (ads) or as 403 naming the access token (sp),
+            # it is dropped so the next call asks for a new one instead of reusing it until expires_at
+            if response.status_code == 401 or (response.status_code == 403 and "access token" in response.text.lower()):
+                auth.invalidate()
+            return check_response(response, *args, **kwargs)
+
+        client._auth = auth
+        client._check_response = checked_response
+        return client
+
+
+token_cache: TokenCache = TokenCache()
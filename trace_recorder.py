@@ -0,0 +1,99 @@
+import os
+import re
+import shutil
+import tempfile
+import typing as t
+from uuid import uuid4
+from pathlib import Path
+from datetime import datetime
+
+from playwright.async_api import BrowserContext
+
+try:
+    from loggers.logger import logger
+except ImportError as ie:
+    exit(f"{ie} :: {Path(__file__).resolve()}")
+
+
+class TraceRecorder:
+    def __init__(self, context: BrowserContext, trace_path: str, chunk_actions: int = 50, budget_mb: int = 200):
+        self.context: BrowserContext = context
+        self.trace_path: str = trace_path
+        self.chunk_actions: int = chunk_actions
+        self.budget: int = budget_mb * 1024 * 1024
+        self.actions: int = 0
+        self.is_started: bool = False
+        # the chunk before the current one, overwritten on every rotation so a dump always covers a full chunk
+        self.chunk_path: t.Optional[str] = None
+        self.previous_chunk: t.Optional[str] = None
+
+    async def start(self) -> None:
+        os.makedirs(self.trace_path, exist_ok=True)
+        # next to the traces so the previous chunk is moved into a dump, not copied
+        self.chunk_path = tempfile.mkdtemp(prefix=".chunks_", dir=self.trace_path)
+        await self.context.tracing.start(screenshots=True, snapshots=True)
+        await self.context.tracing.start_chunk()
+        self.is_started = True
+        logger.info(f"tracing started :: chunk of {self.chunk_actions} actions")
+
+    async def tick(self) -> None:
+        if not self.is_started:
+            return
+
+        self.actions += 1
+        if self.actions < self.chunk_actions:
+            return
+
+        # only the latest full chunk is kept on disk, each rotation overwrites the one before
+        previous_chunk: str = os.path.join(self.chunk_path, "previous.zip")
+        await self.context.tracing.stop_chunk(path=previous_chunk)
+        await self.context.tracing.start_chunk()
+        self.previous_chunk = previous_chunk
+        self.actions = 0
+
+    async def dump(self, reason: str) -> t.Optional[str]:
+        if not self.is_started:
+            return None
+
+        name: str = re.sub(r"[^\w\-]+", "_", reason).strip("_")[:80]
+        prefix: str = os.path.join(
+            self.trace_path, f"{datetime.now().strftime('%Y-%m-%d_%H%M%S')}_{name}_{uuid4().hex[:8]}"
+        )
+        file_path: str = f"{prefix}.zip"
+        os.makedirs(self.trace_path, exist_ok=True)
+
+        # the current chunk may hold only the last few actions, the previous one brings it to at least a full chunk
+        if self.previous_chunk and os.path.isfile(self.previous_chunk):
+            os.replace(self.previous_chunk, f"{prefix}_previous.zip")
+            logger.info(f"trace saved :: {prefix}_previous.zip")
+        self.previous_chunk = None
+
+        await self.context.tracing.stop_chunk(path=file_path)
+        await self.context.tracing.start_chunk()
+        self.actions = 0
+
+        logger.info(f"trace saved :: {file_path}")
+        self.enforce_budget()
+        return file_path
+
+    def enforce_budget(self) -> None:
+        files: list = sorted(Path(self.trace_path).glob("*.zip"), key=lambda file: file.stat().st_mtime)
+        total: int = sum(file.stat().st_size for file in files)
+
+        while files and total > self.budget:
+            file: Path = files.pop(0)
+            total -= file.stat().st_size
+            file.unlink(missing_ok=True)
+            logger.info(f"trace removed over budget :: {file}")
+
+    async def stop(self) -> None:
+        if not self.is_started:
+            return
+
+        await self.context.tracing.stop_chunk()
+        await self.context.tracing.stop()
+        self.is_started = False
+
+        shutil.rmtree(self.chunk_path, ignore_errors=True)
+        self.previous_chunk = None
+        logger.info("tracing stopped")